@@ -1,6 +1,6 @@
 # NLP/API_Endpoints/app.py  — clean, no docstring YAML
 
-import os, csv, re, tempfile, threading, webbrowser, requests, uuid, sys
+import os, io, csv, re, tempfile, threading, webbrowser, requests, sys
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from flasgger import Swagger
@@ -9,9 +9,13 @@ from flasgger import Swagger
 HERE = os.path.dirname(os.path.abspath(__file__))
 if HERE not in sys.path:
     sys.path.insert(0, HERE)
+# the chatbot is the shared one in ../Chatbot
+if os.path.dirname(HERE) not in sys.path:
+    sys.path.append(os.path.dirname(HERE))
 
-# --- Chatbot core (now in API_Endpoints/Chatbot/) ---
+# --- Chatbot core (../Chatbot/chat.py, English profile) ---
 from Chatbot.chat import route_message, reset_state, predict_tag, bot_name, dialog_state
+from audio_mix import ClipMirror, LRUCache, TTSPool, choose_voice
 
 # Optional heavy deps (installed via pip)
 from faster_whisper import WhisperModel
@@ -259,21 +263,23 @@ def load_csv():
 
 load_csv()
 
+# ---------------- Arrernte clip mirror + audio caches ----------------
+# speak_translated_mixed never downloads on the reply path: clips come from the local mirror,
+# which is filled by a background prefetch of every audio_url in the glossary.
+CLIP_MIRROR_DIR = os.environ.get("ARR_CLIP_MIRROR_DIR", os.path.join(BASE_DIR, "clips_mirror"))
+clip_mirror = ClipMirror(CLIP_MIRROR_DIR, max_workers=int(os.environ.get("ARR_CLIP_PREFETCH_WORKERS", "8")))
+segment_cache = LRUCache(int(os.environ.get("ARR_SEGMENT_CACHE_SIZE", "512")))      # decoded clips + TTS chunks
+mixed_output_cache = LRUCache(int(os.environ.get("ARR_MIXED_CACHE_SIZE", "128")))  # final encoded output per text
+tts_pool = TTSPool(int(os.environ.get("TTS_WORKERS", "2")))
+
+def prefetch_clips():
+    return clip_mirror.prefetch_async(e.get("audio_url") for e in ARR2ENG.values())
+
+prefetch_clips()
+
 # ---------------- Speech model ----------------
 whisper_model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8")
 
-def choose_voice(engine):
-    voices = engine.getProperty("voices")
-    cand = None
-    for v in voices:
-        name = (getattr(v, "name", "") or "").lower()
-        langs = [str(x).lower() for x in getattr(v, "languages", [])]
-        if "en" in "".join(langs) or "english" in name:
-            cand = v
-            if any(k in name for k in ("zira", "aria", "jenny", "david", "guy")):
-                return v
-    return cand or (voices[0] if voices else None)
-
 def tts_to_file(text, out_path):
     engine = pyttsx3.init()
     v = choose_voice(engine)
@@ -619,6 +625,36 @@ def transcribe():
         except Exception:
             pass
 
+def _clip_segment(url):
+    """Decoded clip from the local mirror (LRU-cached). None if the clip isn't mirrored yet."""
+    key = ("clip", url)
+    seg = segment_cache.get(key)
+    if seg is None:
+        path = clip_mirror.local_path(url)
+        if not path:
+            return None
+        seg = AudioSegment.from_file(path)
+        segment_cache.put(key, seg)
+    return seg
+
+def _tts_segments(phrases):
+    """Decoded TTS segments for each phrase; cache misses are synthesized concurrently."""
+    out = {}
+    missing = []
+    for p in dict.fromkeys(phrases):
+        seg = segment_cache.get(("tts", p))
+        if seg is None:
+            missing.append(p)
+        else:
+            out[p] = seg
+    if missing:
+        with tempfile.TemporaryDirectory(prefix="mix_") as tmpdir:
+            for p, wav in tts_pool.synthesize_many(missing, tmpdir).items():
+                seg = AudioSegment.from_file(wav)
+                segment_cache.put(("tts", p), seg)
+                out[p] = seg
+    return out
+
 @app.route("/api/speak_translated_mixed", methods=["POST"])
 def speak_translated_mixed():
     data = request.get_json(silent=True) or {}
@@ -627,27 +663,32 @@ def speak_translated_mixed():
         return jsonify({"error": "Provide JSON with 'text'"}), 400
     fmt = (data.get("format") or "mp3").lower()
     pause_ms = int(data.get("pause_ms", 120))
+    mimetype = "audio/mpeg" if fmt == "mp3" else "audio/wav"
 
-    def is_word(token): return re.fullmatch(r"[A-Za-z']+", token) is not None
-    def split_with_separators(s): return [p for p in re.split(r"(\b[A-Za-z']+\b)", s) if p != ""]
+    cache_key = (text, fmt, pause_ms)
+    cached = mixed_output_cache.get(cache_key)
+    if cached is not None:
+        return send_file(io.BytesIO(cached), as_attachment=True, download_name=f"mixed.{fmt}", mimetype=mimetype)
 
+    # Plan the output as ("clip", url) / ("tts", phrase) / ("pause", None) items.
+    # Only mirrored clips are used; anything missing is spoken in English and fetched in the background.
     parts = split_with_separators(text)
-    audio_segments = []
-    tmpdir = tempfile.mkdtemp(prefix="mix_")
+    plan = []
+    unmirrored = []
     i = 0
     while i < len(parts):
         token = parts[i]
         if is_word(token) and token.lower() in EN2ARR:
-            entry = EN2ARR[token.lower()]
-            url = entry.get("audio_url") or ""
+            url = EN2ARR[token.lower()].get("audio_url") or ""
             if not url:
-                audio_segments.append(AudioSegment.silent(duration=pause_ms))
+                plan.append(("pause", None))
+            elif clip_mirror.local_path(url):
+                plan.append(("clip", url))
+                plan.append(("pause", None))
             else:
-                tmpf = os.path.join(tmpdir, f"arr_{i}_{uuid.uuid4().hex}.mp3")
-                safe_download(url, tmpf)
-                seg = AudioSegment.from_file(tmpf)
-                audio_segments.append(seg)
-                audio_segments.append(AudioSegment.silent(duration=pause_ms))
+                unmirrored.append(url)
+                plan.append(("tts", token))
+                plan.append(("pause", None))
             i += 1
             continue
         if is_word(token):
@@ -656,23 +697,37 @@ def speak_translated_mixed():
             while j < len(parts) and is_word(parts[j]) and parts[j].lower() not in EN2ARR:
                 chunk_words.append(parts[j])
                 j += 1
-            phrase = " ".join(chunk_words)
-            tfile = os.path.join(tmpdir, f"tts_{i}_{uuid.uuid4().hex}.wav")
-            tts_to_file(phrase, tfile)
-            seg = AudioSegment.from_file(tfile)
-            audio_segments.append(seg)
-            audio_segments.append(AudioSegment.silent(duration=pause_ms))
+            plan.append(("tts", " ".join(chunk_words)))
+            plan.append(("pause", None))
             i = j
             continue
         i += 1
-    if not audio_segments:
-        tfile = os.path.join(tmpdir, f"tts_all_{uuid.uuid4().hex}.wav")
-        tts_to_file(text, tfile)
-        audio_segments.append(AudioSegment.from_file(tfile))
-    out_path = os.path.join(tmpdir, f"output.{fmt}")
-    export_audio(audio_segments, fmt, out_path)
-    return send_file(out_path, as_attachment=True, download_name=f"mixed.{fmt}",
-                     mimetype="audio/mpeg" if fmt == "mp3" else "audio/wav")
+    if not plan:
+        plan.append(("tts", text))
+    if unmirrored:
+        clip_mirror.prefetch_async(unmirrored)
+
+    tts = _tts_segments([v for kind, v in plan if kind == "tts"])
+    audio_segments = []
+    degraded = bool(unmirrored)  # English stand-ins or silent gaps: don't cache, the clips are on their way
+    for kind, v in plan:
+        if kind == "pause":
+            audio_segments.append(AudioSegment.silent(duration=pause_ms))
+        elif kind == "clip":
+            seg = _clip_segment(v)
+            if seg is None:
+                degraded = True
+                seg = AudioSegment.silent(duration=pause_ms)
+            audio_segments.append(seg)
+        else:
+            audio_segments.append(tts[v])
+
+    buf = io.BytesIO()
+    export_audio(audio_segments, fmt, buf)
+    payload = buf.getvalue()
+    if not degraded:
+        mixed_output_cache.put(cache_key, payload)
+    return send_file(io.BytesIO(payload), as_attachment=True, download_name=f"mixed.{fmt}", mimetype=mimetype)
 
 ARR_KEYS = None
 
@@ -0,0 +1,167 @@
+# NLP/API_Endpoints/audio_mix.py — local clip mirror + decoded segment caches for speak_translated_mixed
+
+import os, hashlib, threading, tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import requests
+
+
+class LRUCache:
+    """Small thread-safe LRU keyed by any hashable. Used for decoded segments and mixed outputs."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = max(1, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class ClipMirror:
+    """
+    Local on-disk copy of the remote Arrernte clips.
+    The reply path only ever reads from disk (local_path); downloads run on one
+    shared pool of max_workers threads (prefetch_async / prefetch).
+    """
+
+    def __init__(self, root, max_workers=8, timeout=20):
+        self.root = root
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = None  # one download pool for every request, so concurrent prefetches share max_workers
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, url):
+        ext = os.path.splitext(url.split("?", 1)[0])[1] or ".mp3"
+        return os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest() + ext)
+
+    def local_path(self, url):
+        """Mirrored file for url, or None. Never touches the network."""
+        if not url:
+            return None
+        p = self.path_for(url)
+        return p if os.path.isfile(p) else None
+
+    def _fetch(self, url):
+        dest = self.path_for(url)
+        try:
+            if os.path.isfile(dest):
+                return True
+            r = requests.get(url, timeout=self.timeout)
+            r.raise_for_status()
+            # write to a temp file in the same dir, then swap in atomically
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(r.content)
+            os.replace(tmp, dest)
+            return True
+        except Exception as e:
+            print(f"[WARN] clip mirror fetch failed for {url}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="clip-mirror")
+            return self._pool
+
+    def prefetch_async(self, urls):
+        """Queue every missing url on the shared download pool. Returns the futures (one per new url)."""
+        todo = []
+        with self._lock:
+            for u in dict.fromkeys(u for u in urls if u):
+                if u in self._pending or os.path.isfile(self.path_for(u)):
+                    continue
+                self._pending.add(u)
+                todo.append(u)
+        if not todo:
+            return []
+        pool = self._executor()
+        return [pool.submit(self._fetch, u) for u in todo]
+
+    def prefetch(self, urls):
+        """Download every missing url concurrently and wait. Returns (fetched, failed)."""
+        results = [f.result() for f in self.prefetch_async(urls)]
+        ok = sum(1 for x in results if x)
+        return ok, len(results) - ok
+
+
+def choose_voice(engine):
+    """An English pyttsx3 voice, preferring the clearer named ones; None if the engine has no voices."""
+    voices = engine.getProperty("voices") or []
+    cand = None
+    for v in voices:
+        name = (getattr(v, "name", "") or "").lower()
+        langs = [str(x).lower() for x in getattr(v, "languages", [])]
+        if "en" in "".join(langs) or "english" in name:
+            cand = v
+            if any(k in name for k in ("zira", "aria", "jenny", "david", "guy")):
+                return v
+    return cand or (voices[0] if voices else None)
+
+
+def synthesize_wav(text, out_path):
+    """pyttsx3 to a wav file. Module-level so it can run in a worker process (pyttsx3 is not thread-safe)."""
+    import pyttsx3
+    engine = pyttsx3.init()
+    v = choose_voice(engine)
+    if v:
+        engine.setProperty("voice", v.id)
+    engine.save_to_file(text, out_path)
+    engine.runAndWait()
+    return out_path
+
+
+class TTSPool:
+    """Runs English chunk synthesis concurrently, one pyttsx3 engine per worker process."""
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max(1, int(max_workers))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def synthesize_many(self, phrases, tmpdir):
+        """Returns {phrase: wav_path} for every distinct phrase."""
+        uniq = list(dict.fromkeys(phrases))
+        if not uniq:
+            return {}
+        paths = {p: os.path.join(tmpdir, f"tts_{i}.wav") for i, p in enumerate(uniq)}
+        pool = self._executor()
+        futures = {p: pool.submit(synthesize_wav, p, paths[p]) for p in uniq}
+        return {p: f.result() for p, f in futures.items()}
@@ -1,9 +1,17 @@
 import numpy as np
-import nltk
 import re
 # nltk.download('punkt')
-from nltk.stem.porter import PorterStemmer
-_stemmer = PorterStemmer()
+
+# Importing nltk pulls in most of the package (and scipy.stats), so the
+# stemmer is built on first use rather than when the chatbot is imported.
+_stemmer = None
+
+def _get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem.porter import PorterStemmer
+        _stemmer = PorterStemmer()
+    return _stemmer
 
 def tokenize(sentence: str):
     """
@@ -16,7 +24,7 @@ def tokenize(sentence: str):
 
 def stem(word: str):
     """Lowercase + Porter stem."""
-    return _stemmer.stem(word.lower())
+    return _get_stemmer().stem(word.lower())
 
 def bag_of_words(tokenized_sentence, all_words):
     """
@@ -1,31 +1,57 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, decode_token
 from flask_cors import CORS
-from flask_restx import Api, Resource, fields
+from flask_restx import Api, Resource, fields, marshal
 from werkzeug.datastructures import FileStorage
 from dotenv import load_dotenv
 import os
 import csv
 import re
+
+# Load environment variables before the local modules below read their settings
+load_dotenv()
+
 from Glossary.glossary_translator import Glossary as _Glossary, translate as _gloss_translate
 #import arrernte_classifier as arrcls
-import tempfile
 import threading
 import webbrowser
 import requests
 import uuid
 import sys
+import time
 import base64
 import io
-import joblib
 import numpy as np
 import importlib.util
+import inspect
 from pathlib import Path
+import asr_service
+import voice_stream
+import voice_jobs
+import metrics
+import tracing
+import log_config
+import profiler
+import memstats
+import warmup
+import model_registry
+import serving
+import cpu_budget
+from pipeline import Pipeline, Stage
+import json
+
+# Optional: WebSocket support for streaming voice (pip install flask-sock)
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
 
-# Load environment variables
-load_dotenv()
+log_config.setup_logging()
+log = log_config.get_logger("app")
+if not serving.prefork:  # a preforked worker applies its budget after the fork
+    cpu_budget.apply()
 
 # --- Audio mapping for follow-up questions ---
 def load_audio_mapping():
@@ -42,13 +68,13 @@ def load_audio_mapping():
                     question = question.strip()
                     audio_path = audio_path.strip()
                     mapping[question] = audio_path
-        print(f"[DEBUG] Loaded {len(mapping)} audio mappings")
+        log.debug("Loaded %s audio mappings", len(mapping))
         return mapping
     except FileNotFoundError:
-        print(f"[WARNING] Audio mapping file not found: {mapping_file}")
+        log.warning("Audio mapping file not found: %s", mapping_file)
         return {}
     except Exception as e:
-        print(f"[ERROR] Failed to load audio mapping: {e}")
+        log.error("Failed to load audio mapping: %s", e)
         return {}
 
 # Load audio mapping at startup
@@ -77,8 +103,8 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
 
 # --- Configure external model endpoints here ---
-ML1_URL = "http://localhost:5000/api/ml1/predict"   # kept for reference/logging
-ML2_URL = "http://localhost:5000/api/ml2/predict"   # kept for reference/logging
+ML1_URL = "http://localhost:5000/api/ml1/predict"
+ML2_URL = "http://localhost:5000/api/ml2/predict"
 FUSION_URL = "http://localhost:5000/api/fusion/compare"  # << updated
 
 # CORS Configuration
@@ -93,7 +119,8 @@ jwt = JWTManager(app)
 CORS(app, 
      resources={r"/*": {"origins": "*"}},  # Allow all origins for development
      supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization", "X-Language", "X-Mode", "Accept", "Origin", "X-Requested-With"],
+     allow_headers=["Content-Type", "Authorization", "X-Language", "X-Mode", "Accept", "Origin", "X-Requested-With", "X-Debug-Trace", "X-Profile", "X-Memory-Token", "X-Admin-Token"],
+     expose_headers=["Server-Timing", "X-Job-Id", "X-Profile-Id"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD", "PATCH"])
 
 # Initialize API with Swagger
@@ -164,13 +191,14 @@ class SavePrediction(Resource):
             )
             
             db.session.add(prediction)
-            db.session.commit()
+            with metrics.timed("db_commit"):
+                db.session.commit()
             
-            print(f"Prediction saved for user {user.username}: {prediction.id}")
+            log.info("Prediction saved for user %s: %s", user.username, prediction.id)
             return {'message': 'Prediction saved successfully', 'prediction_id': prediction.id}, 201
             
         except Exception as e:
-            print(f"Error saving prediction: {e}")
+            log.error("Error saving prediction: %s", e)
             db.session.rollback()
             return {'message': f'Error saving prediction: {str(e)}'}, 500
 
@@ -196,29 +224,30 @@ class TestSavePrediction(Resource):
             )
             
             db.session.add(prediction)
-            db.session.commit()
+            with metrics.timed("db_commit"):
+                db.session.commit()
             
             return {'message': 'Test prediction saved successfully', 'prediction_id': prediction.id}, 201
             
         except Exception as e:
-            print(f"Error saving test prediction: {e}")
+            log.error("Error saving test prediction: %s", e)
             db.session.rollback()
             return {'message': f'Error saving test prediction: {str(e)}'}, 500
 
 # Helper function to save prediction for logged-in users
 def save_prediction_if_logged_in(disease_prediction, prediction_text, language, mode, request_headers=None):
     """Save prediction to database if user is logged in"""
-    print(f"[DEBUG] save_prediction_if_logged_in called with: prediction_text={prediction_text[:50]}..., language={language}, mode={mode}")
+    log.debug("save_prediction_if_logged_in called with: prediction_text=%s..., language=%s, mode=%s", prediction_text[:50], language, mode)
     try:
         # Check if user is logged in by looking for JWT token in headers
         if not request_headers:
-            print("[DEBUG] No request headers provided")
+            log.debug("No request headers provided")
             return False
             
         auth_header = request_headers.get('Authorization')
-        print(f"[DEBUG] Auth header present: {bool(auth_header)}")
+        log.debug("Auth header present: %s", bool(auth_header))
         if not auth_header or not auth_header.startswith('Bearer '):
-            print("[DEBUG] No valid Authorization header found")
+            log.debug("No valid Authorization header found")
             return False
             
         # Extract token and verify it
@@ -249,26 +278,29 @@ def save_prediction_if_logged_in(disease_prediction, prediction_text, language,
             )
             
             db.session.add(prediction)
-            db.session.commit()
+            with metrics.timed("db_commit"):
+                db.session.commit()
             
-            print(f"Prediction saved for user {user_id}: {prediction.id}")
+            log.info("Prediction saved for user %s: %s", user_id, prediction.id)
             return True
             
         except Exception as e:
-            print(f"Error decoding token or saving prediction: {e}")
+            log.error("Error decoding token or saving prediction: %s", e)
             return False
             
     except Exception as e:
-        print(f"Error in save_prediction_if_logged_in: {e}")
+        log.error("Error in save_prediction_if_logged_in: %s", e)
         return False
 
 # --- Chatbot core imports ---
+# One core (Chatbot/chat.py); the English bot is its module API, the Arrernte
+# bot is the profile in Chatbot_arr/chat.py.
 try:
     from Chatbot.chat import route_message, reset_state, predict_tag, bot_name, dialog_state
 except ImportError:
     # Fallback if running from different directory
-    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'Chatbot'))
-    from chat import route_message, reset_state, predict_tag, bot_name, dialog_state
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from Chatbot.chat import route_message, reset_state, predict_tag, bot_name, dialog_state
 
 # --- Arrernte Chatbot imports (same-process) ---
 try:
@@ -279,45 +311,85 @@ try:
         bot_name as arr_bot_name,
         dialog_state as arr_dialog_state,
     )
-except ImportError:
+except Exception as e:
+    log.warning("Arrernte chatbot not available: %s", e)
+    arr_route_message = None
+    arr_reset_state = None
+    arr_predict_tag = None
+    arr_bot_name = "ArrBot"
+    arr_dialog_state = {}
+
+def _chatbot(route_fn):
+    """The Chatbot (one language profile of Chatbot/chat.py) that route_fn belongs to."""
+    return getattr(inspect.unwrap(route_fn), "__self__", None)
+
+def _instrument_predict_tag(route_fn, op):
+    """predict_tag is called from inside route_message, so time it by wrapping the bot's method."""
+    bot = _chatbot(route_fn)
+    fn = getattr(bot, "predict_tag", None)
+    if fn is None or hasattr(fn, "__wrapped__"):
+        return fn
+    bot.predict_tag = metrics.timed_fn(op)(fn)
+    return bot.predict_tag
+
+def _load_intent_model(bot, version):
     try:
-        sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'Chatbot_arr'))
-        from chat import (
-            route_message as arr_route_message,
-            reset_state as arr_reset_state,
-            predict_tag as arr_predict_tag,
-            bot_name as arr_bot_name,
-            dialog_state as arr_dialog_state,
-        )
-    except Exception as e:
-        arr_route_message = None
-        arr_reset_state = None
-        arr_predict_tag = None
-        arr_bot_name = "ArrBot"
-        arr_dialog_state = {}
+        intent = bot.load_intent_model(bot.profile.pkg_dir / version)
+    except ImportError as e:
+        log.warning("PyTorch not available, the %s chatbot uses keyword matching: %s", bot.profile.name, e)
+        return None
+    cpu_budget.configure_torch()  # torch is imported by the first load
+    return intent
 
-# Optional heavy deps (installed via pip)
-try:
-    from faster_whisper import WhisperModel
-    from pydub import AudioSegment
-    import pyttsx3
-    from rapidfuzz import process, fuzz, distance
-    HEAVY_DEPS_AVAILABLE = True
-    print("[SUCCESS] All heavy dependencies loaded successfully!")
-    print("   - faster_whisper: OK")
-    print("   - pydub: OK") 
-    print("   - pyttsx3: OK")
-    print("   - rapidfuzz: OK")
-except (ImportError, OSError) as e:
-    HEAVY_DEPS_AVAILABLE = False
-    print("[ERROR] Some optional dependencies not available. Audio features will be limited.")
-    print(f"   Import error: {str(e)}")
-    print("   Please install missing dependencies with: pip install faster-whisper pydub pyttsx3 rapidfuzz")
+def _register_intent_model(name, route_fn):
+    """Put the bot's classifier in the model registry; route_message then classifies with a leased version."""
+    bot = _chatbot(route_fn) if route_fn else None
+    if bot is None or name in model_registry.registry:
+        return
+    fn = bot.predict_tag
+    profile = bot.profile
+    default = profile.data_path.name if profile.data_path.parent == profile.pkg_dir else str(profile.data_path)
+    model_registry.registry.register(
+        name, lambda version: _load_intent_model(bot, version), default,
+        versions=lambda: {p.name for p in profile.pkg_dir.glob("*.pth")} | {default},
+        warm=lambda intent: fn("hello", intent), publish=bot.set_intent_model)
+
+    def predict_tag(msg):
+        with model_registry.registry.use(name) as intent:
+            return fn(msg, intent)
+    bot.predict_tag = predict_tag
+
+_register_intent_model("intent.english", route_message)
+_register_intent_model("intent.arrernte", arr_route_message)
+predict_tag = _instrument_predict_tag(route_message, "predict_tag") or predict_tag
+if arr_route_message:
+    arr_predict_tag = _instrument_predict_tag(arr_route_message, "arr_predict_tag") or arr_predict_tag
+
+# Under the preforked server (serving.py) each bot's dialog state is shared by
+# all workers, so a conversation continues whichever worker takes the next turn.
+if serving.prefork:
+    _shared_state = serving.SharedDialogState()
+    route_message = _shared_state.wrap(route_message, dialog_state)
+    reset_state = _shared_state.wrap(reset_state, dialog_state)
+    if arr_route_message:
+        _arr_shared_state = serving.SharedDialogState()
+        arr_route_message = _arr_shared_state.wrap(arr_route_message, arr_dialog_state)
+        arr_reset_state = _arr_shared_state.wrap(arr_reset_state, arr_dialog_state)
+
+# Optional heavy deps (installed via pip). Only their presence is checked here.
+# Each one is imported where it is used (asr_service, tts_to_file, export_audio),
+# so a cold start doesn't pay for them.
+HEAVY_DEPS = ("faster_whisper", "pydub", "pyttsx3", "rapidfuzz")
+_missing_deps = [m for m in HEAVY_DEPS if importlib.util.find_spec(m) is None]
+HEAVY_DEPS_AVAILABLE = not _missing_deps
+if _missing_deps:
+    log.error("Some optional dependencies not available, audio features will be limited: %s. "
+              "Install them with: pip install faster-whisper pydub pyttsx3 rapidfuzz", ", ".join(_missing_deps))
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, "Glossary", "arrernte_audio.csv")
-WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base.en")
+WHISPER_MODEL = asr_service.WHISPER_MODEL  # one setting, read once the env is loaded
 CLIPS_DIR = os.path.join(BASE_DIR, "clips")
 
 # Flask-RESTx will automatically generate Swagger documentation
@@ -349,7 +421,8 @@ chat_response_model = api.model('ChatResponse', {
     'disease_prediction': fields.Raw(description='Disease prediction results (if final message)'),
     'audio_url': fields.String(description='URL to the audio response (voice mode only)'),
     'detected_keywords': fields.List(fields.String, description='Detected medical keywords from Arrernte audio (Arrernte voice mode only)'),
-    'keyword_string': fields.String(description='Comma-separated string of detected keywords (Arrernte voice mode only)')
+    'keyword_string': fields.String(description='Comma-separated string of detected keywords (Arrernte voice mode only)'),
+    'stage_timings': fields.Raw(description='Wall time per turn stage in ms (final-turn stages run concurrently), plus total')
 })
 
 translate_request_model = api.model('TranslateRequest', {
@@ -386,24 +459,37 @@ arr_response_model = api.model('ArrernteAnalyzeResponse', {
     'concatenated_string': fields.String
 })
 
+# Dummy input that warms a freshly loaded model (at startup and on a swap)
+WARMUP_TEXT = "headache and fever for two days"
+
 # ---------------- ML Model-1: Triage API ----------------
 ML1_DIR = os.path.join(BASE_DIR, "Ml model-1")
 ML1_TRIAGE_MODULE_PATH = os.path.join(ML1_DIR, "triage_model.py")
+ML1_ARTIFACTS_DIR = os.path.join(ML1_DIR, "artifacts")
 
-_ml1 = None
+def _ml1_versions():
+    """Artifact directories under ML1_ARTIFACTS_DIR (e.g. saca-triage-v1)."""
+    if not os.path.isdir(ML1_ARTIFACTS_DIR):
+        return set()
+    return {d for d in os.listdir(ML1_ARTIFACTS_DIR) if os.path.isdir(os.path.join(ML1_ARTIFACTS_DIR, d))}
 
-def _load_ml1_module():
-    global _ml1
-    if _ml1 is not None:
-        return _ml1
+def _ml1_load(version):
+    """A fresh triage_model module with its artifacts loaded from ML1_ARTIFACTS_DIR/<version>."""
     if not os.path.exists(ML1_TRIAGE_MODULE_PATH):
         raise FileNotFoundError(f"triage_model.py not found at {ML1_TRIAGE_MODULE_PATH}")
     spec = importlib.util.spec_from_file_location("triage_model", ML1_TRIAGE_MODULE_PATH)
     mod = importlib.util.module_from_spec(spec)
     assert spec and spec.loader
     spec.loader.exec_module(mod)
-    _ml1 = mod
-    return _ml1
+    mod.ART_DIR = Path(ML1_ARTIFACTS_DIR) / version  # an absolute MODEL_DIR stays as it is
+    mod._model.load()
+    cpu_budget.configure_xgboost(mod._model.xgb)
+    cpu_budget.configure_blas()  # scikit-learn brings scipy's BLAS
+    return mod
+
+model_registry.registry.register("ml1", _ml1_load, os.environ.get("MODEL_DIR") or "saca-triage-v1",
+                                 versions=_ml1_versions, warm=lambda mod: mod.triage_predict(WARMUP_TEXT),
+                                 describe=lambda mod: {"artifact_dir": str(mod.ART_DIR)})
 
 ml1_predict_request_model = api.model('ML1PredictRequest', {
     'input': fields.String(required=True, description='Free-form symptom description', example='I have chest pain and shortness of breath'),
@@ -454,11 +540,7 @@ fusion_response_model = api.model('FusionResponse', {
 # Uses components under 'Ml model-2/model_components': vectorizer, kmeans, q_table, label_encoder
 ML2_DIR = os.path.join(BASE_DIR, "Ml model-2")
 ML2_COMPONENTS_DIR = os.path.join(ML2_DIR, "model_components")
-ML2_VECTORIZER_PATH = os.path.join(ML2_COMPONENTS_DIR, "vectorizer.pkl")
-ML2_KMEANS_PATH = os.path.join(ML2_COMPONENTS_DIR, "kmeans.pkl")
-ML2_QTABLE_PATH = os.path.join(ML2_COMPONENTS_DIR, "q_table.npy")
-ML2_LABEL_ENCODER_PATH = os.path.join(ML2_COMPONENTS_DIR, "label_encoder.pkl")
-ML2_LABEL_NAME_MAP_PATH = os.path.join(ML2_COMPONENTS_DIR, "label_name_map.json")
+ML2_FILES = ("vectorizer.pkl", "kmeans.pkl", "q_table.npy", "label_encoder.pkl")
 
 ml2_predict_request_model = api.model('ML2PredictRequest', {
     'input': fields.String(required=True, description='Free-form symptom description string', example='I have severe headache and nausea for two days')
@@ -475,46 +557,43 @@ ml2_predict_response_model = api.model('ML2PredictResponse', {
     'top': fields.List(fields.Nested(ml2_top_item_model), description='Top 3 predictions')
 })
 
-_ml2_vectorizer = None
-_ml2_kmeans = None
-_ml2_qtable = None
-_ml2_label_encoder = None
-_ml2_label_name_map = None
-
-def _ml2_get_components():
-    global _ml2_vectorizer, _ml2_kmeans, _ml2_qtable, _ml2_label_encoder
-    if all(x is not None for x in (_ml2_vectorizer, _ml2_kmeans, _ml2_qtable, _ml2_label_encoder)):
-        return _ml2_vectorizer, _ml2_kmeans, _ml2_qtable, _ml2_label_encoder
-    missing = []
-    for p in [ML2_VECTORIZER_PATH, ML2_KMEANS_PATH, ML2_QTABLE_PATH, ML2_LABEL_ENCODER_PATH]:
-        if not os.path.exists(p):
-            missing.append(p)
-    if missing:
-        raise FileNotFoundError(f"Missing ML2 components: {missing}")
-    _ml2_vectorizer = joblib.load(ML2_VECTORIZER_PATH)
-    _ml2_kmeans = joblib.load(ML2_KMEANS_PATH)
-    _ml2_qtable = np.load(ML2_QTABLE_PATH)
-    _ml2_label_encoder = joblib.load(ML2_LABEL_ENCODER_PATH)
-    return _ml2_vectorizer, _ml2_kmeans, _ml2_qtable, _ml2_label_encoder
-
-def _ml2_get_label_name_map():
-    """Optional mapping of numeric/string label codes -> human disease names.
-    File: ML2_LABEL_NAME_MAP_PATH containing {"186": "Migraine", ...}
-    """
-    global _ml2_label_name_map
-    if _ml2_label_name_map is not None:
-        return _ml2_label_name_map
+def _ml2_read_label_name_map(path):
+    """Optional mapping of numeric/string label codes -> human disease names ({"186": "Migraine", ...})."""
     try:
-        if os.path.exists(ML2_LABEL_NAME_MAP_PATH):
-            import json
-            with open(ML2_LABEL_NAME_MAP_PATH, "r", encoding="utf-8") as f:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
-                _ml2_label_name_map = {str(k): str(v) for k, v in dict(raw).items()}
-        else:
-            _ml2_label_name_map = {}
+                return {str(k): str(v) for k, v in dict(raw).items()}
     except Exception:
-        _ml2_label_name_map = {}
-    return _ml2_label_name_map
+        pass
+    return {}
+
+class ML2Components:
+    """One ML2 artifact version: vectorizer, kmeans, q_table, label_encoder and label_name_map.json."""
+
+    def __init__(self, directory):
+        missing = [os.path.join(directory, f) for f in ML2_FILES if not os.path.exists(os.path.join(directory, f))]
+        if missing:
+            raise FileNotFoundError(f"Missing ML2 components: {missing}")
+        import joblib
+        self.directory = directory
+        self.vectorizer = joblib.load(os.path.join(directory, "vectorizer.pkl"))
+        self.kmeans = joblib.load(os.path.join(directory, "kmeans.pkl"))
+        self.q_table = np.load(os.path.join(directory, "q_table.npy"))
+        self.label_encoder = joblib.load(os.path.join(directory, "label_encoder.pkl"))
+        self.label_name_map = _ml2_read_label_name_map(os.path.join(directory, "label_name_map.json"))
+
+def _ml2_versions():
+    """Directories under ML2_DIR holding a set of components (e.g. model_components)."""
+    return {d for d in os.listdir(ML2_DIR) if os.path.exists(os.path.join(ML2_DIR, d, ML2_FILES[0]))}
+
+def _ml2_load(version):
+    ml2 = ML2Components(os.path.join(ML2_DIR, version))
+    cpu_budget.configure_blas()
+    return ml2
+
+model_registry.registry.register("ml2", _ml2_load, os.path.basename(ML2_COMPONENTS_DIR), versions=_ml2_versions,
+                                 warm=lambda ml2: _ml2_predict(ml2, WARMUP_TEXT))
 
 @ml2_ns.route('/predict')
 class ML2Predict(Resource):
@@ -528,10 +607,16 @@ class ML2Predict(Resource):
             api.abort(400, "Provide JSON with 'input' or 'text'")
 
         try:
-            vectorizer, kmeans, q_table, label_encoder = _ml2_get_components()
+            model_registry.registry.get("ml2")
         except FileNotFoundError as e:
             api.abort(500, str(e))
 
+        with model_registry.registry.use("ml2") as ml2:
+            return self._predict(ml2, input_text)
+
+    @staticmethod
+    def _predict(ml2, input_text):
+        vectorizer, kmeans, q_table, label_encoder = ml2.vectorizer, ml2.kmeans, ml2.q_table, ml2.label_encoder
         try:
             X = vectorizer.transform([input_text])
             state = int(kmeans.predict(X)[0])
@@ -565,7 +650,7 @@ class ML2Predict(Resource):
         except Exception as e:
             api.abort(500, f"Model inference failed: {str(e)}")
 
-        name_map = _ml2_get_label_name_map()
+        name_map = ml2.label_name_map
         def as_name(x):
             sx = str(x)
             return name_map.get(sx, sx)
@@ -590,11 +675,11 @@ class ML1Predict(Resource):
         if not text:
             api.abort(400, "Provide JSON with 'input' or 'text'")
         try:
-            mod = _load_ml1_module()
             kwargs = {}
             if isinstance(topk, int) and topk > 0:
                 kwargs['topk_diseases'] = topk
-            result = mod.triage_predict(text, **kwargs)
+            with model_registry.registry.use("ml1") as mod:
+                result = mod.triage_predict(text, **kwargs)
             return result
         except FileNotFoundError as e:
             api.abort(500, str(e))
@@ -606,8 +691,8 @@ class ML1Meta(Resource):
     @ml1_ns.marshal_with(ml1_meta_response_model)
     def get(self):
         try:
-            mod = _load_ml1_module()
-            meta = mod.triage_meta()
+            with model_registry.registry.use("ml1") as mod:
+                meta = mod.triage_meta()
             return meta
         except FileNotFoundError as e:
             api.abort(500, str(e))
@@ -615,7 +700,11 @@ class ML1Meta(Resource):
             api.abort(500, f"ML1 meta failed: {str(e)}")
 
 def _ml2_predict_from_text_freeform(text: str):
-    vectorizer, kmeans, q_table, label_encoder = _ml2_get_components()
+    with model_registry.registry.use("ml2") as ml2:
+        return _ml2_predict(ml2, text)
+
+def _ml2_predict(ml2, text: str):
+    vectorizer, kmeans, q_table, label_encoder = ml2.vectorizer, ml2.kmeans, ml2.q_table, ml2.label_encoder
     X = vectorizer.transform([text])
     state = int(kmeans.predict(X)[0])
     q_values = q_table[state]
@@ -644,7 +733,7 @@ def _ml2_predict_from_text_freeform(text: str):
     best_idx = int(np.argmax(probs))
     labels = label_encoder.inverse_transform(np.arange(len(probs)))
     top_indices = list(np.argsort(-probs)[:3])
-    name_map = _ml2_get_label_name_map()
+    name_map = ml2.label_name_map
     def as_name(x):
         sx = str(x)
         return name_map.get(sx, sx)
@@ -671,60 +760,62 @@ class FusionCompare(Resource):
 
         # Run ML1
         try:
-            mod = _load_ml1_module()
-            kwargs = {}
-            if isinstance(topk, int) and topk > 0:
-                kwargs['topk_diseases'] = topk
-            ml1_res = mod.triage_predict(text, **kwargs)
+            with metrics.timed("ml1_predict"), model_registry.registry.use("ml1") as mod:
+                kwargs = {}
+                if isinstance(topk, int) and topk > 0:
+                    kwargs['topk_diseases'] = topk
+                ml1_res = mod.triage_predict(text, **kwargs)
         except Exception as e:
             api.abort(500, f"ML1 failed: {str(e)}")
 
         # Run ML2
         try:
-            ml2_res = _ml2_predict_from_text_freeform(text)
+            with metrics.timed("ml2_predict"):
+                ml2_res = _ml2_predict_from_text_freeform(text)
         except Exception as e:
             api.abort(500, f"ML2 failed: {str(e)}")
 
-        # Decision policy:
-        # - Severity comes from ML1 (it knows severity)
-        # - Disease label: compare ML1 top-1 (if available) vs ML2 top-1 by probability
-        policy = "ml1-severity + maxprob(disease from ml1 vs ml2)"
-        ml1_top1 = None
-        if isinstance(ml1_res, dict) and isinstance(ml1_res.get('disease_topk'), list) and len(ml1_res['disease_topk']) > 0:
-            d0 = ml1_res['disease_topk'][0]
-            ml1_top1 = {'label': d0.get('disease'), 'probability': d0.get('p', 0.0)}
-
-        ml2_top1 = None
-        if isinstance(ml2_res, dict) and isinstance(ml2_res.get('top'), list) and len(ml2_res['top']) > 0:
-            d0 = ml2_res['top'][0]
-            ml2_top1 = {'label': d0.get('label'), 'probability': d0.get('probability', 0.0)}
-
-        chosen = None
-        if ml1_top1 and ml2_top1:
-            chosen = ml1_top1 if ml1_top1['probability'] >= ml2_top1['probability'] else ml2_top1
-            chosen['source'] = 'ml1' if chosen is ml1_top1 else 'ml2'
-        elif ml1_top1:
-            chosen = {**ml1_top1, 'source': 'ml1'}
-        elif ml2_top1:
-            chosen = {**ml2_top1, 'source': 'ml2'}
-        else:
-            chosen = {'label': None, 'probability': 0.0, 'source': 'none'}
-
-        final = {
-            'severity': ml1_res.get('severity'),
-            'disease_label': chosen.get('label'),
-            'probability': chosen.get('probability'),
-            'source': chosen.get('source'),
-            'policy': policy
-        }
-
         return {
             'input': text,
             'ml1': ml1_res,
             'ml2': ml2_res,
-            'final': final
+            'final': _fuse_predictions(ml1_res, ml2_res)
         }
 
+def _fuse_predictions(ml1_res, ml2_res):
+    # Decision policy:
+    # - Severity comes from ML1 (it knows severity)
+    # - Disease label: compare ML1 top-1 (if available) vs ML2 top-1 by probability
+    policy = "ml1-severity + maxprob(disease from ml1 vs ml2)"
+    ml1_top1 = None
+    if isinstance(ml1_res, dict) and isinstance(ml1_res.get('disease_topk'), list) and len(ml1_res['disease_topk']) > 0:
+        d0 = ml1_res['disease_topk'][0]
+        ml1_top1 = {'label': d0.get('disease'), 'probability': d0.get('p', 0.0)}
+
+    ml2_top1 = None
+    if isinstance(ml2_res, dict) and isinstance(ml2_res.get('top'), list) and len(ml2_res['top']) > 0:
+        d0 = ml2_res['top'][0]
+        ml2_top1 = {'label': d0.get('label'), 'probability': d0.get('probability', 0.0)}
+
+    chosen = None
+    if ml1_top1 and ml2_top1:
+        chosen = ml1_top1 if ml1_top1['probability'] >= ml2_top1['probability'] else ml2_top1
+        chosen['source'] = 'ml1' if chosen is ml1_top1 else 'ml2'
+    elif ml1_top1:
+        chosen = {**ml1_top1, 'source': 'ml1'}
+    elif ml2_top1:
+        chosen = {**ml2_top1, 'source': 'ml2'}
+    else:
+        chosen = {'label': None, 'probability': 0.0, 'source': 'none'}
+
+    return {
+        'severity': ml1_res.get('severity'),
+        'disease_label': chosen.get('label'),
+        'probability': chosen.get('probability'),
+        'source': chosen.get('source'),
+        'policy': policy
+    }
+
 
 # ---------------- Glossary loading ----------------
 EN2ARR = {}
@@ -756,23 +847,75 @@ def load_csv():
 
 load_csv()
 
-# ---------------- Speech model ----------------
-if HEAVY_DEPS_AVAILABLE:
-    print(f"[INFO] Loading Whisper model: {WHISPER_MODEL}")
-    try:
-        whisper_model = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8")
-        print("[SUCCESS] Whisper model loaded successfully!")
-        print(f"   Model: {WHISPER_MODEL}")
-        print(f"   Device: cpu")
-        print(f"   Compute type: int8")
-    except Exception as e:
-        print(f"[ERROR] Failed to load Whisper model: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        whisper_model = None
-else:
-    print("[WARNING] Heavy dependencies not available, Whisper model not loaded")
-    whisper_model = None
+_glossary_obj = None
+_glossary_lock = threading.Lock()
+
+def _glossary():
+    """The translator glossary, parsed once (it is read-only after loading)."""
+    global _glossary_obj
+    if _glossary_obj is None:
+        with _glossary_lock:
+            if _glossary_obj is None:
+                _glossary_obj = _Glossary.load_csv(CSV_PATH)
+    return _glossary_obj
+
+# ---------------- Model warm-up (see warmup.py) ----------------
+# MODEL_PRELOAD=background (default): models, the glossary and the clip index load
+# concurrently on warm-up threads, and the server answers /health as soon as
+# app.py is imported (/ready tells when they are done). "eager" finishes the
+# warm-up during import. "lazy" loads each one when a request first needs it.
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "background").lower()
+ASR_LOAD_WAIT_S = float(os.environ.get("ASR_LOAD_WAIT_S", "120"))  # voice requests wait this long for Whisper
+
+asr_backend = None
+
+def _load_asr(version):
+    """The Whisper backend: at startup (ASR_AUTO_TIER may pick another tier than WHISPER_MODEL), or beside the live one for a swap."""
+    if not HEAVY_DEPS_AVAILABLE:
+        raise RuntimeError("heavy dependencies not available, Whisper model not loaded")
+    if asr_backend is not None or version != WHISPER_MODEL:
+        log.info("Loading Whisper model %s for a swap", version)
+        return asr_service.build_backend(version)
+    log.info("Loading Whisper model: %s", version)
+    # In-process model, or ASR_WORKERS worker processes each holding a replica
+    backend = asr_service.start()
+    if backend is None:
+        raise RuntimeError("faster-whisper could not be imported")
+    asr_stats = backend.stats()
+    asr_tier = asr_service.tier_status()
+    log.info("Whisper model loaded: tier=%s (fallback under load: %s, auto=%s) device=cpu "
+             "compute_type=%s mode=%s workers=%s cpu_threads=%s queue=%s",
+             asr_tier['active'], asr_tier['fallback'], asr_tier['auto'], asr_service.WHISPER_COMPUTE_TYPE,
+             asr_stats['mode'], asr_stats['workers'], asr_stats['cpu_threads'], asr_stats['queue_size'])
+    return backend
+
+def _publish_asr(backend):
+    global asr_backend
+    asr_service.install_backend(backend)
+    asr_backend = backend
+    asr_service.transcript_cache.clear()  # transcripts from the previous model
+
+# Requests don't lease Whisper: each backend counts its own admitted jobs, and a
+# retired one drains them before its workers exit.
+model_registry.registry.register(
+    "whisper", _load_asr, WHISPER_MODEL,
+    versions=lambda: {t.model for t in asr_service.ASR_TIERS} | {WHISPER_MODEL},
+    warm=lambda backend: asr_service.warm_up(backend=backend), publish=_publish_asr,
+    unload=asr_service.retire_backend, describe=lambda backend: {"tiers": [t.name for t in backend.tiers if t]})
+
+def wait_for_asr(timeout=ASR_LOAD_WAIT_S):
+    """The Whisper backend once it has loaded (starting the load if needed), or None if unavailable."""
+    warmup.manager.ensure("whisper", timeout)
+    return asr_backend
+
+@api.errorhandler(asr_service.ASRBusyError)
+def handle_asr_busy(error):
+    """ASR queue is full: shed load with 503 + Retry-After instead of queueing unbounded."""
+    return {'message': str(error)}, error.status_code, {'Retry-After': str(error.retry_after)}
+
+@api.errorhandler(voice_jobs.JobQueueFullError)
+def handle_voice_jobs_full(error):
+    return {'message': str(error)}, error.status_code, {'Retry-After': str(error.retry_after)}
 
 def normalize_numbers_in_text(text: str) -> str:
     """Normalize numbers in text for better processing."""
@@ -793,38 +936,34 @@ def normalize_numbers_in_text(text: str) -> str:
     
     return normalized
 
+@metrics.timed_fn("transcribe")
 def transcribe_audio_file(audio_file) -> str:
-    """Transcribe audio file to text using Whisper."""
-    if not HEAVY_DEPS_AVAILABLE or whisper_model is None:
-        print("[WARNING] Audio transcription dependencies not available, using fallback")
+    """Transcribe audio (bytes, file-like or FileStorage) to text using Whisper, fully in memory."""
+    if not HEAVY_DEPS_AVAILABLE or wait_for_asr() is None:
+        log.warning("Audio transcription dependencies not available, using fallback")
         return "I have a headache and feel dizzy"  # Fallback text for testing
     
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-            audio_file.save(tmp_file.name)
-            tmp_path = tmp_file.name
-        
-        # Transcribe using Whisper
-        segments, info = whisper_model.transcribe(tmp_path, beam_size=5)
-        
-        # Combine all segments
-        transcribed_text = ""
-        for segment in segments:
-            transcribed_text += segment.text + " "
-            print(f"[DEBUG] Whisper segment: '{segment.text}'")
-        
-        print(f"[DEBUG] Full transcribed text: '{transcribed_text.strip()}'")
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
-        return transcribed_text.strip()
+        result = asr_service.transcribe(audio_file, beam_size=5)
+        if result.get("cached"):
+            log.debug("Transcript served from cache (identical upload)")
+        if result.get("preprocess"):
+            log.debug("%s", asr_service.describe_preprocess(result['preprocess']))
+        for segment in result["segments"]:
+            log.debug("Whisper segment: '%s'", segment['text'])
+        
+        log.debug("Full transcribed text: '%s'", result['text'])
+        
+        return result["text"]
+    except asr_service.ASRBusyError:
+        raise
     except Exception as e:
-        print(f"[ERROR] Audio transcription failed: {str(e)}")
-        print("[FALLBACK] Using fallback text for testing")
+        metrics.error("transcribe")
+        log.error("Audio transcription failed: %s", e)
+        log.warning("Using fallback text for testing")
         return "I have a headache and feel dizzy"  # Fallback text for testing
 
+@metrics.timed_fn("tts")
 def text_to_speech(text: str, language: str = "en") -> str:
     """Convert text to speech and return audio URL."""
     if not HEAVY_DEPS_AVAILABLE or not text:
@@ -845,7 +984,8 @@ def text_to_speech(text: str, language: str = "en") -> str:
         # Return URL path
         return f"/static/audio/{audio_filename}"
     except Exception as e:
-        print(f"[ERROR] TTS generation failed: {str(e)}")
+        metrics.error("tts")
+        log.error("TTS generation failed: %s", e)
         return None
 
 # --- Arrernte voice clips lookup ---
@@ -855,6 +995,23 @@ def _slugify_filename(s: str) -> str:
     s = re.sub(r"\s+", "_", s).strip("_")
     return s
 
+_clip_index = None
+
+def _load_clip_index():
+    """(lowercased name without extension, path under CLIPS_DIR) of every clip; the directory is walked once."""
+    global _clip_index
+    if _clip_index is None:
+        index = []
+        if os.path.isdir(CLIPS_DIR):
+            for root, _dirs, files in os.walk(CLIPS_DIR):
+                for fn in files:
+                    if fn.lower().endswith((".mp3", ".wav", ".ogg", ".m4a")):
+                        rel = os.path.relpath(os.path.join(root, fn), CLIPS_DIR).replace("\\", "/")
+                        index.append((os.path.splitext(fn)[0].lower(), rel))
+        _clip_index = index
+    return _clip_index
+
+@metrics.timed_fn("clip_lookup")
 def find_arrernte_clip_for_prompt(prompt_text: str):
     """Given an Arrernte prompt (bot follow-up), try to find a matching audio clip.
     First tries to match against the English question mapping, then falls back to filename matching.
@@ -874,25 +1031,18 @@ def find_arrernte_clip_for_prompt(prompt_text: str):
                 if audio_path.startswith('clips/'):
                     audio_path = audio_path[6:]  # Remove 'clips/' prefix
                 audio_url = f"http://localhost:5000/static/audio/{audio_path}"
-                print(f"[DEBUG] Found audio for follow-up question: {audio_url}")
+                log.debug("Found audio for follow-up question: %s", audio_url)
                 return audio_url
         
         # Fallback to original filename matching approach
-        if not os.path.isdir(CLIPS_DIR):
-            return None
         slug = _slugify_filename(prompt_text)
         best_match = None
         best_len = 0
-        for root, _dirs, files in os.walk(CLIPS_DIR):
-            for fn in files:
-                if not fn.lower().endswith((".mp3", ".wav", ".ogg", ".m4a")):
-                    continue
-                base = os.path.splitext(fn)[0].lower()
-                if base == slug or base.startswith(slug):
-                    rel = os.path.relpath(os.path.join(root, fn), CLIPS_DIR).replace("\\", "/")
-                    if len(base) > best_len:
-                        best_len = len(base)
-                        best_match = rel
+        for base, rel in _load_clip_index():
+            if base == slug or base.startswith(slug):
+                if len(base) > best_len:
+                    best_len = len(base)
+                    best_match = rel
         if best_match:
             return f"/clips/{best_match}"
         return None
@@ -914,6 +1064,7 @@ def choose_voice(engine):
 def tts_to_file(text, out_path):
     if not HEAVY_DEPS_AVAILABLE:
         raise ImportError("pyttsx3 not available")
+    import pyttsx3
     engine = pyttsx3.init()
     v = choose_voice(engine)
     if v:
@@ -937,6 +1088,7 @@ def split_with_separators(s):
 def export_audio(segments, fmt, out_path):
     if not HEAVY_DEPS_AVAILABLE:
         raise ImportError("pydub not available")
+    from pydub import AudioSegment
     joined = AudioSegment.silent(duration=1)
     for seg in segments:
         joined += seg
@@ -973,11 +1125,74 @@ def _apply_arrernte_glossary_to_reply(text: str):
     return mixed, replaced
 
 # ---------------- Disease Prediction Function ----------------
+def _ml_api_call(label: str, url: str, payload: dict) -> dict:
+    """POST to one of our ML endpoints; returns {"json": ...} or {"error": ..., "status"?: ...}."""
+    with metrics.timed(label.lower()):
+        out = _ml_api_post(label, url, payload)
+    if "error" in out:
+        metrics.error(label.lower())
+    return out
+
+def _ml_api_post(label: str, url: str, payload: dict) -> dict:
+    log.debug("Calling %s API: %s", label, url)
+    try:
+        response = requests.post(url, json=payload, timeout=30)
+        result = response.json() if response.status_code == 200 else None
+    except requests.exceptions.RequestException as e:
+        log.error("API request failed: %s", e)
+        return {"error": f"API request failed: {str(e)}"}
+    except Exception as e:
+        log.error("Unexpected error calling %s API: %s", label, e)
+        return {"error": f"Unexpected error: {str(e)}"}
+    if not result:
+        log.error("%s API failed: %s", label, response.status_code)
+        return {"error": f"{label} API failed", "status": response.status_code}
+    log.debug("%s result: %s", label, result)
+    return {"json": result}
+
+ML_STAGE_TIMEOUT_S = 35  # the HTTP calls themselves give up after 30s
+
+def _combine_disease_prediction(ml1=None, ml2=None, ml_fusion=None):
+    # Same precedence as calling ML1, ML2, Fusion one after another: first failure wins
+    for label, call in (("ml1", ml1), ("ml2", ml2), ("fusion", ml_fusion)):
+        call = call or {"error": f"{label} call did not complete"}
+        if "error" in call:
+            out = {"error": call["error"]}
+            if "status" in call:
+                out[f"{label}_status"] = call["status"]
+            return out
+    # Return the fusion result (which contains ml1, ml2, and final predictions)
+    return ml_fusion["json"]
+
+def _prediction_summary(prediction_text, state, history=None):
+    # Build summary from conversation history, dialog state, and final message
+    summary = Chat()._build_summary_for_models(state, prediction_text, history)
+    log.debug("Calling ML APIs with summary: %s", summary)
+    return summary
+
+# prediction_summary -> ml1 | ml2 | ml_fusion -> disease_prediction (only on final turns)
+DISEASE_PREDICTION_STAGES = [
+    Stage("prediction_summary", _prediction_summary, ["prediction_text", "state"], optional=["history"],
+          when="is_final_message"),
+    Stage("ml1", lambda prediction_summary: _ml_api_call("ML1", ML1_URL, {"input": prediction_summary, "topk": 3}),
+          ["prediction_summary"], executor="thread", timeout=ML_STAGE_TIMEOUT_S),
+    Stage("ml2", lambda prediction_summary: _ml_api_call("ML2", ML2_URL, {"input": prediction_summary}),
+          ["prediction_summary"], executor="thread", timeout=ML_STAGE_TIMEOUT_S),
+    Stage("ml_fusion", lambda prediction_summary: _ml_api_call("Fusion", FUSION_URL, {"input": prediction_summary, "topk": 3}),
+          ["prediction_summary"], executor="thread", timeout=ML_STAGE_TIMEOUT_S),
+    # ML results are optional inputs so a timed-out call still yields an error entry here
+    Stage("disease_prediction", lambda prediction_summary, ml1, ml2, ml_fusion: _combine_disease_prediction(ml1, ml2, ml_fusion),
+          ["prediction_summary"], optional=["ml1", "ml2", "ml_fusion"]),
+]
+
+PREDICTION_PIPELINE = Pipeline("disease_prediction", DISEASE_PREDICTION_STAGES,
+                               params=["prediction_text", "state", "history", "is_final_message"])
+
 def predict_disease_from_conversation(final_user_message, dialog_state, conversation_history=None):
     """
     Predict disease based on conversation history and final user message.
     
-    This function calls ML1, ML2, and Fusion APIs to get disease predictions.
+    This function calls ML1, ML2, and Fusion APIs (concurrently) to get disease predictions.
     
     Args:
         final_user_message (str): The final message from the user
@@ -987,70 +1202,147 @@ def predict_disease_from_conversation(final_user_message, dialog_state, conversa
     Returns:
         dict: Disease prediction results from the fusion API
     """
-    try:
-        # Build summary from conversation history, dialog state, and final message
-        # Create a temporary instance to call the method
-        temp_instance = Chat()
-        summary = temp_instance._build_summary_for_models(dialog_state, final_user_message, conversation_history)
-        
-        print(f"[DEBUG] Calling ML APIs with summary: {summary}")
-        
-        # Call ML1 API
-        ml1_url = "http://localhost:5000/api/ml1/predict"
-        ml1_payload = {"input": summary, "topk": 3}
-        
-        print(f"[DEBUG] Calling ML1 API: {ml1_url}")
-        ml1_response = requests.post(ml1_url, json=ml1_payload, timeout=30)
-        ml1_result = ml1_response.json() if ml1_response.status_code == 200 else None
-        
-        if not ml1_result:
-            print(f"[ERROR] ML1 API failed: {ml1_response.status_code}")
-            return {"error": "ML1 API failed", "ml1_status": ml1_response.status_code}
-        
-        print(f"[DEBUG] ML1 result: {ml1_result}")
-        
-        # Call ML2 API
-        ml2_url = "http://localhost:5000/api/ml2/predict"
-        ml2_payload = {"input": summary}
-        
-        print(f"[DEBUG] Calling ML2 API: {ml2_url}")
-        ml2_response = requests.post(ml2_url, json=ml2_payload, timeout=30)
-        ml2_result = ml2_response.json() if ml2_response.status_code == 200 else None
-        
-        if not ml2_result:
-            print(f"[ERROR] ML2 API failed: {ml2_response.status_code}")
-            return {"error": "ML2 API failed", "ml2_status": ml2_response.status_code}
-        
-        print(f"[DEBUG] ML2 result: {ml2_result}")
-        
-        # Call Fusion API
-        fusion_url = "http://localhost:5000/api/fusion/compare"
-        fusion_payload = {"input": summary, "topk": 3}
-        
-        print(f"[DEBUG] Calling Fusion API: {fusion_url}")
-        fusion_response = requests.post(fusion_url, json=fusion_payload, timeout=30)
-        fusion_result = fusion_response.json() if fusion_response.status_code == 200 else None
-        
-        if not fusion_result:
-            print(f"[ERROR] Fusion API failed: {fusion_response.status_code}")
-            return {"error": "Fusion API failed", "fusion_status": fusion_response.status_code}
-        
-        print(f"[DEBUG] Fusion result: {fusion_result}")
-        
-        # Return the fusion result (which contains ml1, ml2, and final predictions)
-        return fusion_result
-        
-    except requests.exceptions.RequestException as e:
-        print(f"[ERROR] API request failed: {str(e)}")
-        return {"error": f"API request failed: {str(e)}"}
-    except Exception as e:
-        print(f"[ERROR] Unexpected error in predict_disease_from_conversation: {str(e)}")
-        return {"error": f"Unexpected error: {str(e)}"}
+    run = PREDICTION_PIPELINE.run({"prediction_text": final_user_message, "state": dialog_state,
+                                   "history": conversation_history, "is_final_message": True})
+    return run.values.get("disease_prediction") or {"error": "Unexpected error: prediction stages failed"}
+
+# ---------------- Request tracing ----------------
+# These endpoints report per-stage durations in a Server-Timing header; with
+# "X-Debug-Trace: 1" the JSON body also gets the nested span tree as debug_trace.
+TRACED_PATHS = {"/api/chat/", "/api/chat/transcribe", "/api/fusion/compare", "/api/arrernte/analyze_audio"}
+# Requests that may be sampled by the on-demand profiler (see profiler.py)
+PROFILED_PATHS = {"/api/chat/", "/api/chat/transcribe", "/api/fusion/compare"}
+
+@app.before_request
+def _begin_request_trace():
+    if request.path in TRACED_PATHS and request.method != "OPTIONS":
+        g.trace = tracing.begin(f"{request.method} {request.path}")
+        if (request.path in PROFILED_PATHS and profiler.enabled()
+                and profiler.should_profile(request.headers.get("X-Profile"))):
+            profiler.start(g.trace, f"{request.method} {request.path}")
+            g.profiling = True
+
+@app.after_request
+def _report_request_trace(response):
+    root = g.pop("trace", None)
+    if root is None:
+        return response
+    tracing.end(root)
+    if g.pop("profiling", False):
+        profile_id = profiler.stop(root)
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+    response.headers["Server-Timing"] = tracing.server_timing(root)
+    response.headers["Timing-Allow-Origin"] = "*"
+    if (request.headers.get("X-Debug-Trace", "").lower() in ("1", "true", "yes")
+            and response.is_json and not response.is_streamed):
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body["debug_trace"] = root.to_dict()
+            response.set_data(json.dumps(body, default=str))
+    return response
 
 # ---------------- Routes ----------------
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "service": "SwinSACA Flask API"})
+    body = {"status": "ok", "service": "SwinSACA Flask API"}
+    if asr_backend is not None:
+        body["asr"] = asr_service.stats()
+    return jsonify(body)
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once the required models are loaded and warmed, else 503; per-component status and load times"""
+    body = warmup.manager.report()
+    return jsonify(body), 200 if body["ready"] else 503
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus text exposition: per-stage latency histograms, error and cache counters"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def _asr_stat(key):
+    return asr_service.stats().get(key) if asr_backend is not None else None
+
+metrics.REGISTRY.gauge("saca_asr_in_flight", "Transcriptions running or waiting for a worker",
+                       lambda: _asr_stat("in_flight"))
+metrics.REGISTRY.gauge("saca_asr_rejected", "Transcriptions rejected with 503 since start",
+                       lambda: _asr_stat("rejected"))
+metrics.REGISTRY.gauge("saca_voice_jobs_active", "Unfinished async chat turns",
+                       lambda: voice_jobs.jobs.stats()["active"])
+metrics.REGISTRY.gauge("saca_process_rss_bytes", "Resident set size of this worker",
+                       memstats.rss_bytes)
+metrics.REGISTRY.gauge("saca_log_dropped", "Log records dropped because the log queue was full, since start",
+                       log_config.dropped)
+
+@app.route("/debug/profiles", methods=["GET"])
+def list_profiles():
+    """Recent request profiles (collapsed stacks, see profiler.py)"""
+    if not profiler.authorized(request.headers.get("X-Profile")):
+        return jsonify({"error": "X-Profile token required (set PROFILE_TOKEN to enable)"}), 403
+    return jsonify({"enabled": profiler.enabled(), "sample_rate": profiler.PROFILE_SAMPLE_RATE,
+                    "profiles": profiler.recent()})
+
+@app.route("/debug/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    if not profiler.authorized(request.headers.get("X-Profile")):
+        return jsonify({"error": "X-Profile token required (set PROFILE_TOKEN to enable)"}), 403
+    path = profiler.path_for(profile_id)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=profile_id + profiler.SUFFIX)
+
+@app.route("/debug/memory", methods=["GET"])
+def memory_report():
+    """Approximate footprint of models, caches and generated files, plus tracemalloc top allocators"""
+    if not memstats.authorized(request.headers.get("X-Memory-Token")):
+        return jsonify({"error": "X-Memory-Token required (set MEMORY_TOKEN to enable)"}), 403
+    toggle = request.args.get("tracemalloc")
+    if toggle == "start":
+        memstats.start_tracemalloc(request.args.get("frames", 1, type=int))
+    elif toggle == "stop":
+        memstats.stop_tracemalloc()
+    top = request.args.get("top", memstats.MEMORY_TOP, type=int)
+    body = memstats.report(top=min(max(0, top), memstats.MEMORY_MAX_TOP))
+    if request.args.get("baseline"):
+        memstats.set_baseline()
+    return jsonify(body)
+
+@app.route("/asr/status", methods=["GET"])
+def asr_status():
+    """Active Whisper tier, probe results and queue state"""
+    if asr_backend is None:
+        return jsonify({"available": False, "warmup": warmup.manager.get("whisper").to_dict()}), 503
+    return jsonify({"available": True, "tier": asr_service.tier_status(), "backend": asr_service.stats()})
+
+@app.route("/admin/models", methods=["GET"])
+def models_status():
+    """Loaded version, in-flight users and available versions of every model"""
+    if not model_registry.authorized(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "X-Admin-Token required"}), 403
+    return jsonify(model_registry.registry.report())
+
+@app.route("/admin/models/<name>/swap", methods=["POST"])
+def models_swap(name):
+    """Load another artifact version of a model and switch to it without a restart ({"version": ...})"""
+    if not model_registry.authorized(request.headers.get("X-Admin-Token"), swap=True):
+        return jsonify({"error": "X-Admin-Token required (set MODEL_ADMIN_TOKEN to enable swaps)"}), 403
+    if name not in model_registry.registry:
+        return jsonify({"error": f"Unknown model: {name}"}), 404
+    version = (request.get_json(silent=True) or {}).get("version")
+    if not isinstance(version, str) or not version:
+        return jsonify({"error": "Provide JSON with 'version'"}), 400
+    try:
+        model_registry.registry.swap(name, version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except model_registry.SwapInProgressError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        # the version that was serving (if any) still is
+        return jsonify({"error": f"Loading {name} {version} failed: {e}",
+                        "current": model_registry.registry.model(name).to_dict()["current"]}), 500
+    return jsonify(model_registry.registry.model(name).to_dict())
 
 @app.route("/cors-test", methods=["GET", "POST", "OPTIONS"])
 def cors_test():
@@ -1073,13 +1365,18 @@ def cors_test():
 @chat_ns.route("/")
 class Chat(Resource):
     @chat_ns.expect(chat_request_model)
-    @chat_ns.marshal_with(chat_response_model)
+    @chat_ns.response(200, 'Chat reply', chat_response_model)
+    @chat_ns.doc(params={'stream': "'ndjson' or 'sse' to stream the reply first, then audio_url and model results"})
     def post(self):
         """Chat with the SwinSACA medical assistant - handles both text and voice input"""
+        stream_format = self._stream_format()
         if request.content_type and 'multipart/form-data' in request.content_type:
-            return self._handle_voice_input()
+            result = self._handle_voice_input(stream_format)
         else:
-            return self._handle_text_input()
+            result = self._handle_text_input(stream_format)
+        if isinstance(result, Response):
+            return result
+        return marshal(result, chat_response_model)
 
     # ------------------------------- #
     # Helpers for summary + HTTP I/O  #
@@ -1193,7 +1490,7 @@ class Chat(Resource):
                 return " ".join(text.split())[:800]
                 
         except Exception as e:
-            print(f"[ERROR] Error building summary: {str(e)}")
+            log.error("Error building summary: %s", e)
             # Fallback to latest user text
             text = (latest_user_text or "").strip()
             if not text:
@@ -1232,56 +1529,44 @@ class Chat(Resource):
             "final": {...}    # fused decision
           }
         """
-        print(f"[DEBUG] Calling fusion/compare API with summary:")
-        print(f"   Summary text: {summary_text[:200]}...")
-        print(f"   URL: {FUSION_URL}")
+        log.debug("Calling fusion/compare API %s with summary: %.200s", FUSION_URL, summary_text)
         
         payload = {"input": summary_text, "topk": int(topk)}
-        result = self._post_json(FUSION_URL, payload)
-        
-        print(f"[DEBUG] Fusion API response:")
-        print(f"   Success: {result.get('ok')}")
-        print(f"   Status: {result.get('status')}")
+        with metrics.timed("fusion_compare"):
+            result = self._post_json(FUSION_URL, payload)
         if not result.get('ok'):
-            print(f"   Error: {result.get('error')}")
-            print(f"   Body: {result.get('body')}")
+            metrics.error("fusion_compare")
+        
+        if result.get('ok'):
+            log.debug("Fusion API response: status=%s", result.get('status'))
+        else:
+            log.warning("Fusion API failed: status=%s error=%s body=%s",
+                        result.get('status'), result.get('error'), result.get('body'))
         
         return result
 
     # -------------------- #
     # Voice input handling #
     # -------------------- #
-    def _handle_voice_input(self):
+    def _handle_voice_input(self, stream_format=None):
         audio_file = None
         lang = "english"
         mode = "voice"
 
         try:
-            print(f"[DEBUG] Voice chat request received:")
-            print(f"   Content-Type: {request.content_type}")
-            print(f"   Files: {list(request.files.keys())}")
-            print(f"   Form data: {dict(request.form)}")
-            print(f"   Headers: {dict(request.headers)}")
-
             if 'audio' not in request.files:
-                print("[ERROR] No audio file in request.files")
+                log.warning("Voice chat request without audio file (files=%s)", list(request.files.keys()))
                 api.abort(400, "No audio file provided")
 
             audio_file = request.files['audio']
-            print(f"[DEBUG] Audio file details:")
-            print(f"   Filename: '{audio_file.filename}'")
-            print(f"   Content type: {audio_file.content_type}")
-            print(f"   MIME type: {audio_file.mimetype}")
-
             audio_content = audio_file.read()
             audio_file.seek(0)
-            print(f"   Size: {len(audio_content)} bytes")
 
             if not audio_file.filename:
-                print("[ERROR] Audio file has no filename")
+                log.warning("Voice chat audio file has no filename")
                 api.abort(400, "No audio file selected")
             if len(audio_content) == 0:
-                print("[ERROR] Audio file is empty")
+                log.warning("Voice chat audio file is empty")
                 api.abort(400, "Audio file is empty")
 
             lang_raw = (request.headers.get("X-Language") or request.form.get("language") or "english").lower()
@@ -1294,251 +1579,35 @@ class Chat(Resource):
             else:
                 lang = lang_raw
 
-            print(f"   Final lang: {lang}")
-            print(f"   Final mode: {mode}")
+            log.debug("Voice chat request: file=%r mimetype=%s size=%d lang=%s mode=%s",
+                      audio_file.filename, audio_file.mimetype, len(audio_content), lang, mode)
 
         except Exception as e:
-            print(f"[ERROR] Exception in voice chat endpoint: {str(e)}")
+            log.exception("Exception in voice chat endpoint: %s", e)
             api.abort(500, f"Internal server error: {str(e)}")
 
-        if mode == "voice" and lang in ("english", "arrernte"):
-            try:
-                transcribed_text = self._call_transcribe_api(audio_file)
-                print(f"[DEBUG] Transcribed text from API: {transcribed_text}")
-
-                normalized_text = normalize_numbers_in_text(transcribed_text)
-                print(f"[DEBUG] Normalized text for chatbot: {normalized_text}")
-
-                # For Arrernte, detect keywords and use them directly for chatbot
-                detected_keywords = []
-                if lang == "arrernte":
-                    # First translate to get English text for keyword detection
-                    user_msg_for_bot, _repl = translate_arr_to_english_simple(normalized_text)
-                    print(f"[DEBUG] ARR->EN (for keyword detection): {user_msg_for_bot}")
-                    
-                    # Detect medical keywords in the translated text
-                    detected_keywords = detect_medical_keywords_in_text(user_msg_for_bot)
-                    if detected_keywords:
-                        print(f"[DEBUG] Detected keywords (after Arrernte translation lookup): {detected_keywords}")
-                        # Use only the detected keywords as the message for the chatbot
-                        keyword_string = ", ".join(detected_keywords)
-                        user_msg_for_bot = f"I have {keyword_string}"
-                        print(f"[DEBUG] Final chatbot input with Arrernte translations: {user_msg_for_bot}")
-                        print(f"[DEBUG] Will route to English chatbot (route_message)")
-                    else:
-                        # If no keywords detected, use the translated text
-                        user_msg_for_bot = user_msg_for_bot
-                        print(f"[DEBUG] No keywords detected, using translated text: {user_msg_for_bot}")
-                else:
-                    user_msg_for_bot = normalized_text
-
-                # Route message through English chat logic
-                bot_reply_english = route_message(user_msg_for_bot)
-                state_copy = _copy_state()
-
-                replaced_out = []
-                final_reply = bot_reply_english
-                # For Arrernte voice, convert English reply to Arrernte via glossary
-                if lang == "arrernte":
-                    final_reply, replaced_out = _apply_arrernte_glossary_to_reply(bot_reply_english)
-
-                is_final_message = False
-                disease_prediction = None
-                summary_text = None
-                ml1_json = None
-                ml2_json = None
-                fused_json = None
-                fusion_resp = None
-                
-                
-                # Check for final message indicators - be more specific to avoid false positives
-                final_message_indicators = [
-                    "Thanks for the details",  # Specific phrase
-                    "arrule",  # Arrernte thanks
-                    "arnterre"  # Arrernte medical terms that might indicate summary
-                ]
-                
-                # Only check for exact phrase matches, not partial word matches
-                is_final_detected = any(indicator.lower() in bot_reply_english.lower() for indicator in final_message_indicators)
-                
-                # Also check if the reply contains medical assessment keywords - be more specific
-                medical_assessment_keywords = [
-                    "diagnosis", "recommendation", "doctor", "hospital",
-                    "urgent", "emergency", "treatment", "medication", "follow-up"
-                ]
-                
-                # Only trigger if these keywords appear in a summary context, not in questions
-                has_medical_assessment = any(keyword in bot_reply_english.lower() for keyword in medical_assessment_keywords) and not bot_reply_english.strip().endswith('?')
-                
-                # Only check dialog state if we have a meaningful summary
-                # Don't trigger based on dialog state alone for follow-up questions
-                has_sufficient_info = False
-                
-                # Only trigger final message if we have a definitive final summary from the chatbot
-                # Look for the word "Summary" (with capital S) which indicates the final summary message
-                has_meaningful_summary = (
-                    # Look for "Summary" with capital S (most specific indicator)
-                    ("Summary" in bot_reply_english) or
-                    # Look for "summary:" with colon (backup for lowercase)
-                    ("summary:" in bot_reply_english.lower()) or
-                    # Look for Arrernte final patterns with "Summary"
-                    ("arrule" in bot_reply_english.lower() and "Summary" in bot_reply_english) or
-                    ("arrule" in bot_reply_english.lower() and "summary" in bot_reply_english.lower())
-                )
-                
-                if has_meaningful_summary:
-                    print(f"[DEBUG] Meaningful summary detected - triggering final message")
-                    has_sufficient_info = True
-                
-                # Trigger final message if any of these conditions are met
-                if is_final_detected or has_medical_assessment or has_sufficient_info:
-                    is_final_message = True
-                    print(f"[DEBUG] Final message triggered - reasons:")
-                    print(f"   - Final detected: {is_final_detected}")
-                    print(f"   - Medical assessment: {has_medical_assessment}")
-                    print(f"   - Sufficient info: {has_sufficient_info}")
-                    print(f"   - Meaningful summary: {has_meaningful_summary}")
-                    # Use the summary text from the bot reply for prediction, not the initial keywords
-                    summary_text_for_prediction = bot_reply_english
-                    print(f"[DEBUG] Using summary text for prediction: {summary_text_for_prediction}")
-                    disease_prediction = predict_disease_from_conversation(summary_text_for_prediction, state_copy, None)  # Voice input doesn't have conversation history yet
-                    
-                    # ---------- Call ML models only for final messages ----------
-                    print(f"[DEBUG] Final message detected - calling ML models:")
-                    print(f"   Dialog state: {state_copy}")
-                    print(f"   Summary text for prediction: {summary_text_for_prediction}")
-                    
-                    summary_text = self._build_summary_for_models(state_copy, summary_text_for_prediction)
-                    print(f"   Generated summary: {summary_text}")
-                    
-                    fusion_resp = self._call_fusion_compare(summary_text, topk=3)
-                    fused_json = fusion_resp.get("json") if fusion_resp.get("ok") else {
-                        "error": fusion_resp.get("error"),
-                        "body": fusion_resp.get("body")
-                    }
-
-                    # Extract ml1/ml2 blocks if present (for convenience in your UI)
-                    ml1_json = (fused_json or {}).get("ml1")
-                    ml2_json = (fused_json or {}).get("ml2")
-                    
-                    # Save prediction for logged-in users
-                    save_prediction_if_logged_in(
-                        disease_prediction, 
-                        summary_text_for_prediction, 
-                        lang, 
-                        mode, 
-                        request.headers
-                    )
-                else:
-                    print(f"[DEBUG] Not a final message - skipping ML model calls")
-
-                print(f"[CHAT] Voice path lang={lang} mode={mode} -> preparing audio reply")
-                audio_url = None
-                if lang == "arrernte":
-                    # Try to serve pre-recorded Arrernte clip for follow-up prompts
-                    # Use the English reply for matching, not the Arrernte translation
-                    print(f"[DEBUG] Looking for audio for English reply: {bot_reply_english}")
-                    audio_url = find_arrernte_clip_for_prompt(bot_reply_english)
-                    if audio_url:
-                        print(f"[DEBUG] Found pre-recorded audio: {audio_url}")
-                    else:
-                        print(f"[DEBUG] No pre-recorded audio found, using TTS fallback")
-                        # Fallback to TTS if no clip
-                        audio_url = text_to_speech(final_reply, "en")
-                else:
-                    audio_url = text_to_speech(final_reply, "en")
-
-                # Prepare response based on language
-                if lang == "arrernte":
-                    # For Arrernte, don't expose transcribed text to frontend
-                    return {
-                        "reply": final_reply,  # This is already translated to Arrernte
-                        "context": {"language": lang, "mode": mode},
-                        "replaced_words": replaced_out,
-                        "state": state_copy,
-                        "bot": bot_name,
-                        "is_final_message": is_final_message,
-                        "disease_prediction": disease_prediction,
-                        "audio_url": audio_url,
-                        
-                        # --- Keyword detection for Arrernte audio ---
-                        "detected_keywords": detected_keywords,
-                        "keyword_string": ", ".join(detected_keywords) if detected_keywords else "",
-
-                        # --- Model fusion outputs ---
-                        "summary_for_models": summary_text,
-                        "ml1_result": ml1_json,
-                        "ml2_result": ml2_json,
-                        "fused_result": fused_json,
-                        "model_calls": {
-                            "fusion_compare": {
-                                "url": FUSION_URL,
-                                "ok": fusion_resp.get("ok") if fusion_resp else False,
-                                "status": fusion_resp.get("status") if fusion_resp else None
-                            }
-                        },
-                    }
-                else:
-                    # For English, include transcribed text as before
-                    return {
-                        "reply": final_reply,
-                        "transcribed_text": transcribed_text,
-                        "normalized_text": normalized_text,
-                        "context": {"language": lang, "mode": mode},
-                        "replaced_words": replaced_out,
-                        "state": state_copy,
-                        "bot": bot_name,
-                        "is_final_message": is_final_message,
-                        "disease_prediction": disease_prediction,
-                        "audio_url": audio_url,
-                        
-                        # --- Model fusion outputs ---
-                        "summary_for_models": summary_text,
-                        "ml1_result": ml1_json,
-                        "ml2_result": ml2_json,
-                        "fused_result": fused_json,
-                        "model_calls": {
-                            "fusion_compare": {
-                                "url": FUSION_URL,
-                                "ok": fusion_resp.get("ok") if fusion_resp else False,
-                                "status": fusion_resp.get("status") if fusion_resp else None
-                            }
-                        },
-                    }
-            except Exception as e:
-                print(f"[ERROR] Error processing voice chat: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                api.abort(500, f"Error processing voice message: {str(e)}")
-        else:
+        if mode != "voice" or lang not in ("english", "arrernte"):
             api.abort(400, f"Voice chat only supports language 'english' or 'arrernte' and mode 'voice'. Received: lang={lang}, mode={mode}")
 
-    def _call_transcribe_api(self, audio_file):
+        params = {"audio": audio_content, "lang": lang, "mode": mode,
+                  "headers": {"Authorization": request.headers.get("Authorization")}}
+        if stream_format:
+            job = voice_jobs.jobs.create("voice")
+            start_chat_job(job, f"{lang}_voice", dict(params, asr_retries=VOICE_JOB_ASR_RETRIES))
+            return self._stream_job(job, stream_format)
+
         try:
-            print(f"[DEBUG] Calling transcribe API for audio file: {audio_file.filename}")
-            with app.test_request_context('/api/chat/transcribe',
-                                          method='POST',
-                                          data={'audio': audio_file},
-                                          content_type='multipart/form-data'):
-                transcribe_resource = Transcribe()
-                result = transcribe_resource.post()
-                if isinstance(result, dict) and 'text' in result:
-                    transcribed_text = result['text']
-                    print(f"[DEBUG] Transcribe API returned: '{transcribed_text}'")
-                    return transcribed_text
-                else:
-                    print(f"[ERROR] Unexpected transcribe API response: {result}")
-                    return "I have a headache and feel dizzy"
+            return run_chat_turn(f"{lang}_voice", params)
+        except asr_service.ASRBusyError:
+            raise
         except Exception as e:
-            print(f"[ERROR] Failed to call transcribe API: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return transcribe_audio_file(audio_file)
+            log.error("Error processing voice chat: %s", e)
+            api.abort(500, f"Error processing voice message: {str(e)}")
 
     # ------------------- #
     # Text input handling #
     # ------------------- #
-    def _handle_text_input(self):
+    def _handle_text_input(self, stream_format=None):
         data = request.get_json(silent=True) or {}
         ctx = data.get("_context") or {}
         lang = (request.headers.get("X-Language") or ctx.get("language") or "english").lower()
@@ -1552,220 +1621,42 @@ class Chat(Resource):
             reset_state()
         conversation_history = data.get("conversation_history", [])
 
-        print(f"[DEBUG] Received session variables:")
-        print(f"   X-Language header: {request.headers.get('X-Language')}")
-        print(f"   X-Mode header: {request.headers.get('X-Mode')}")
-        print(f"   Context language: {ctx.get('language')}")
-        print(f"   Context mode: {ctx.get('mode')}")
-        print(f"   Final lang: {lang}")
-        print(f"   Final mode: {mode}")
-        print(f"   User message: {user_msg_raw}")
-        print(f"   Conversation history length: {len(conversation_history)}")
-
-        # -------- Images mode (English) integration: build summary and call MLs --------
-        if mode == "images" and lang in ["en", "english"]:
-            print("[CHAT] Images mode detected (English) - building summary and calling ML models")
-            selections = data.get("selections") or []
-            notes = (data.get("message") or "").strip()
-            is_final = bool(data.get("final"))
-
-            state_copy = _copy_state()
-            parts_txt = ", ".join(selections) if selections else "unspecified locations"
-            summary_en = f"Patient reports discomfort at: {parts_txt}."
-            if notes:
-                summary_en += f" Additional notes: {notes}"
-
-            if not is_final:
-                return {
-                    "reply": "Noted your selections. You can add more areas or confirm when done.",
-                    "transcribed_text": None,
-                    "normalized_text": None,
-                    "context": {"language": "english", "mode": mode},
-                    "replaced_words": [],
-                    "state": state_copy,
-                    "bot": bot_name,
-                    "is_final_message": False,
-                    "disease_prediction": None,
-                    "summary_for_models": summary_en,
-                    "ml1_result": None,
-                    "ml2_result": None,
-                    "fused_result": None,
-                    "model_calls": {},
-                    "audio_url": None
-                }
-
-            # Final: run ML pipeline via existing function
-            fusion_result = predict_disease_from_conversation(summary_en, state_copy)
-            ml1_json = fusion_result.get("ml1") if isinstance(fusion_result, dict) else None
-            ml2_json = fusion_result.get("ml2") if isinstance(fusion_result, dict) else None
-            fused_json = fusion_result.get("final") if isinstance(fusion_result, dict) else None
+        log.debug("Text chat request: lang=%s mode=%s history=%d message=%r",
+                  lang, mode, len(conversation_history), user_msg_raw)
 
-            return {
-                "reply": "Thanks. I’ve generated an assessment from your selections.",
-                "transcribed_text": None,
-                "normalized_text": None,
-                "context": {"language": "english", "mode": mode},
-                "replaced_words": [],
-                "state": state_copy,
-                "bot": bot_name,
-                "is_final_message": True,
-                "disease_prediction": fusion_result,
-                "summary_for_models": fusion_result.get("input") if isinstance(fusion_result, dict) else summary_en,
-                "ml1_result": ml1_json,
-                "ml2_result": ml2_json,
-                "fused_result": fused_json,
-                "model_calls": {},
-                "audio_url": None
-            }
-
-        # Route Arrernte text directly to Arrernte chatbot (same process)
-        if lang == "arrernte" and mode == "text" and arr_route_message:
-            print("[CHAT] Routing to Arrernte chatbot (same process)")
-            if data.get("reset") and arr_reset_state:
-                arr_reset_state()
-            arr_reply = arr_route_message(user_msg_raw)
-            state_copy = {
-                "active_domain": arr_dialog_state.get("active_domain"),
-                "stage": arr_dialog_state.get("stage"),
-                "slots": dict(arr_dialog_state.get("slots", {})),
-            }
-            # Detect final summary message from Arrernte bot
-            is_final_message = False
-            disease_prediction = None
-            summary_for_models_en = None
-            ml1_json = None
-            ml2_json = None
-            fused_json = None
-
-            print(f"[DEBUG] Checking final message conditions for voice input (Arrernte):")
-            print(f"   Arrernte reply: '{arr_reply}'")
-            print(f"   Contains 'summary': {'summary' in arr_reply.lower()}")
-            
-            if isinstance(arr_reply, str) and ("summary" in arr_reply.lower()):
-                is_final_message = True
-                print(f"[DEBUG] Final message detected for voice input (Arrernte)!")
-                # Translate latest user input to English for the model summary
-                latest_en, _ = translate_arr_to_english_simple(user_msg_raw)
-                # Use Arr dialog_state to build the English summary inside predictor
-                disease_prediction = predict_disease_from_conversation(latest_en, state_copy)
-                if disease_prediction and not disease_prediction.get("error"):
-                    summary_for_models_en = disease_prediction.get("input")
-                    ml1_json = disease_prediction.get("ml1")
-                    ml2_json = disease_prediction.get("ml2")
-                    fused_json = disease_prediction.get("final")
+        params = {"message": user_msg_raw, "data": data, "reset": bool(data.get("reset")),
+                  "lang": lang, "mode": mode, "history": conversation_history,
+                  "headers": {"Authorization": request.headers.get("Authorization")}}
+        name = text_pipeline_name(lang, mode)
+        if stream_format:
+            job = voice_jobs.jobs.create("chat")
+            start_chat_job(job, name, params)
+            return self._stream_job(job, stream_format)
+        return run_chat_turn(name, params)
 
-            return {
-                "reply": arr_reply,
-                "transcribed_text": None,
-                "normalized_text": None,
-                "context": {"language": lang, "mode": mode},
-                "replaced_words": [],
-                "state": state_copy,
-                "bot": arr_bot_name,
-                "is_final_message": is_final_message,
-                "disease_prediction": disease_prediction,
-                "summary_for_models": summary_for_models_en,
-                "ml1_result": ml1_json,
-                "ml2_result": ml2_json,
-                "fused_result": fused_json,
-                "model_calls": {},
-                "audio_url": None
-            }
+    # -------------------- #
+    # Streamed responses   #
+    # -------------------- #
+    def _stream_format(self):
+        """'ndjson' / 'sse' when the client asked for a streamed response (?stream= or Accept), else None."""
+        fmt = (request.args.get("stream") or "").lower()
+        if fmt in ("ndjson", "sse"):
+            return fmt
+        accept = request.headers.get("Accept", "")
+        if "application/x-ndjson" in accept:
+            return "ndjson"
+        if "text/event-stream" in accept:
+            return "sse"
+        return None
 
-        print("[CHAT] Routing to main (English) chatbot")
-        user_msg_for_bot = user_msg_raw
-        input_replaced = []
-        if lang == "arrernte":
-            user_msg_for_bot, input_replaced = translate_arr_to_english_simple(user_msg_raw)
-
-        bot_reply_english = route_message(user_msg_for_bot)
-        state_copy = _copy_state()
-
-        replaced_out = []
-        final_reply = bot_reply_english
-        if lang == "arrernte":
-            final_reply, replaced_out = _apply_arrernte_glossary_to_reply(bot_reply_english)
-
-        is_final_message = False
-        disease_prediction = None
-        summary_text = None
-        ml1_json = None
-        ml2_json = None
-        fused_json = None
-        fusion_resp = None
-        
-        print(f"[DEBUG] Checking final message conditions for text input:")
-        print(f"   Bot reply: '{bot_reply_english}'")
-        print(f"   Contains 'Summary': {'Summary' in bot_reply_english}")
-        print(f"   Contains 'summary:': {'summary:' in bot_reply_english.lower()}")
-        print(f"   Contains 'summary nhenhe': {'summary nhenhe' in bot_reply_english.lower()}")
-        
-        if "Thanks—please tell me a bit more so I can assess this carefully" in bot_reply_english:
-            print(f"[DEBUG] Skipping - asking for more info")
-            pass
-        elif (("Summary" in bot_reply_english)
-              or ("summary:" in bot_reply_english.lower())
-              or ("summary nhenhe" in bot_reply_english.lower())):
-            is_final_message = True
-            print(f"[DEBUG] Final message detected for text input!")
-            # Use the summary text from the bot reply for prediction, not the initial user message
-            summary_text_for_prediction = bot_reply_english
-            print(f"[DEBUG] Using summary text for prediction (text input): {summary_text_for_prediction}")
-            disease_prediction = predict_disease_from_conversation(summary_text_for_prediction, state_copy, conversation_history)
-            
-            # ---------- Call ML models only for final messages ----------
-            print(f"[DEBUG] Final message detected - calling ML models (text input):")
-            print(f"   Dialog state: {state_copy}")
-            print(f"   Summary text for prediction: {summary_text_for_prediction}")
-            
-            summary_text = self._build_summary_for_models(state_copy, summary_text_for_prediction)
-            print(f"   Generated summary: {summary_text}")
-            
-            fusion_resp = self._call_fusion_compare(summary_text, topk=3)
-            fused_json = fusion_resp.get("json") if fusion_resp.get("ok") else {
-                "error": fusion_resp.get("error"),
-                "body": fusion_resp.get("body")
-            }
-            ml1_json = (fused_json or {}).get("ml1")
-            ml2_json = (fused_json or {}).get("ml2")
+    def _stream_job(self, job, fmt: str):
+        """Stream a turn's stage events: reply first, then audio_url / predictions as they finish, then done."""
+        if fmt == "sse":
+            body, mimetype = voice_jobs.sse_stream(job), "text/event-stream"
         else:
-            print(f"[DEBUG] Not a final message - skipping ML model calls (text input)")
-
-        # Save prediction for logged-in users (text input)
-        if is_final_message and disease_prediction:
-            save_prediction_if_logged_in(
-                disease_prediction, 
-                summary_text_for_prediction, 
-                lang, 
-                mode, 
-                request.headers
-            )
-
-        return {
-            "reply": final_reply,
-            "transcribed_text": None,
-            "normalized_text": None,
-            "context": {"language": lang, "mode": mode},
-            "replaced_words": replaced_out,
-            "state": state_copy,
-            "bot": bot_name,
-            "is_final_message": is_final_message,
-            "disease_prediction": disease_prediction,
-
-            # --- Model fusion outputs ---
-            "summary_for_models": summary_text,
-            "ml1_result": ml1_json,
-            "ml2_result": ml2_json,
-            "fused_result": fused_json,
-            "model_calls": {
-                "fusion_compare": {
-                    "url": FUSION_URL,
-                    "ok": fusion_resp.get("ok") if fusion_resp else False,
-                    "status": fusion_resp.get("status") if fusion_resp else None
-                }
-            },
-            "audio_url": None
-        }
+            body, mimetype = voice_jobs.ndjson_stream(job), "application/x-ndjson"
+        return Response(body, mimetype=mimetype,
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Job-Id": job.id})
 
 
 # Create a model for transcribe response
@@ -1812,12 +1703,612 @@ class Transcribe(Resource):
         try:
             # Use the shared transcription function
             transcribed_text = transcribe_audio_file(f)
-            print(f"[DEBUG] Transcribe endpoint returning: '{transcribed_text}'")
+            log.debug("Transcribe endpoint returning: '%s'", transcribed_text)
             return {"text": transcribed_text}
+        except asr_service.ASRBusyError:
+            raise
         except Exception as e:
-            print(f"[ERROR] Transcription endpoint failed: {str(e)}")
+            log.error("Transcription endpoint failed: %s", e)
             api.abort(500, f"Transcription failed: {str(e)}")
 
+# ---------------- Chat turn pipelines ----------------
+# Every chat mode is a declarative stage list (see pipeline.py). Stages read and
+# write named values; the pipeline runs each one as soon as its inputs exist, on
+# the executor it names, with its own cache/timeout, and records a trace.
+# Request parameters: audio | message, data, reset, history; lang, mode, headers;
+# asr_retries and emit (async jobs only).
+TTS_STAGE_TIMEOUT_S = 30
+TURN_CACHE_SIZE = 512  # per-stage entries for the deterministic glossary stages
+
+def _transcribe_turn(audio, asr_retries=None, emit=None):
+    for attempt in range((asr_retries or 0) + 1):
+        try:
+            text = transcribe_audio_file(audio)
+            break
+        except asr_service.ASRBusyError as e:
+            # async callers can wait instead of getting a 503
+            if attempt == (asr_retries or 0):
+                raise
+            if emit:
+                emit("asr_queued", {"retry_after": e.retry_after})
+            time.sleep(e.retry_after)
+    log.debug("Transcribed text: %s", text)
+    return text
+
+def _normalize_transcript(transcribed_text):
+    normalized_text = normalize_numbers_in_text(transcribed_text)
+    log.debug("Normalized text for chatbot: %s", normalized_text)
+    return normalized_text
+
+def _translate_to_english(text):
+    translated, _repl = translate_arr_to_english_simple(text)
+    log.debug("ARR->EN: %s", translated)
+    return translated
+
+def _bot_input_from_keywords(translated_text, detected_keywords):
+    # For Arrernte, use only the detected medical keywords as the chatbot message
+    if detected_keywords:
+        log.debug("Detected keywords (after Arrernte translation lookup): %s", detected_keywords)
+        return f"I have {', '.join(detected_keywords)}"
+    # If no keywords detected, use the translated text
+    log.debug("No keywords detected, using translated text: %s", translated_text)
+    return translated_text
+
+def _route_english(bot_input):
+    # Route message through English chat logic
+    with metrics.timed("route_message"):
+        bot_reply_english = route_message(bot_input)
+    return {"bot_reply_english": bot_reply_english, "state": _copy_state(), "bot": bot_name}
+
+def _localize_reply(bot_reply_english, lang):
+    # For Arrernte, convert English reply to Arrernte via glossary
+    if lang == "arrernte":
+        reply, replaced = _apply_arrernte_glossary_to_reply(bot_reply_english)
+        return {"reply": reply, "replaced_words": replaced}
+    return {"reply": bot_reply_english, "replaced_words": []}
+
+def _route_arrernte_text(message, reset=False):
+    # Route Arrernte text directly to Arrernte chatbot (same process)
+    log.debug("Routing to Arrernte chatbot (same process)")
+    if reset and arr_reset_state:
+        arr_reset_state()
+    with metrics.timed("arr_route_message"):
+        arr_reply = arr_route_message(message)
+    log.debug("Arrernte reply: '%s'", arr_reply)
+    return {
+        "reply": arr_reply,
+        "replaced_words": [],
+        "state": {
+            "active_domain": arr_dialog_state.get("active_domain"),
+            "stage": arr_dialog_state.get("stage"),
+            "slots": dict(arr_dialog_state.get("slots", {})),
+        },
+        "bot": arr_bot_name,
+        # Detect final summary message from Arrernte bot
+        "is_final_message": isinstance(arr_reply, str) and ("summary" in arr_reply.lower()),
+    }
+
+def _images_turn(data):
+    """Images mode (English): the body-map selections become the model summary."""
+    log.debug("Images mode detected (English) - building summary and calling ML models")
+    selections = data.get("selections") or []
+    notes = (data.get("message") or "").strip()
+    is_final = bool(data.get("final"))
+
+    parts_txt = ", ".join(selections) if selections else "unspecified locations"
+    summary_en = f"Patient reports discomfort at: {parts_txt}."
+    if notes:
+        summary_en += f" Additional notes: {notes}"
+
+    return {
+        "reply": ("Thanks. I’ve generated an assessment from your selections." if is_final
+                  else "Noted your selections. You can add more areas or confirm when done."),
+        "context_language": "english",
+        "replaced_words": [],
+        "state": _copy_state(),
+        "bot": bot_name,
+        "is_final_message": is_final,
+        "prediction_text": summary_en,
+    }
+
+def _is_final_text_reply(bot_reply_english: str) -> bool:
+    if "Thanks—please tell me a bit more so I can assess this carefully" in bot_reply_english:
+        log.debug("Skipping - asking for more info")
+        return False
+    if (("Summary" in bot_reply_english)
+            or ("summary:" in bot_reply_english.lower())
+            or ("summary nhenhe" in bot_reply_english.lower())):
+        log.debug("Final message detected for text input!")
+        return True
+    log.debug("Not a final message - skipping ML model calls (text input)")
+    return False
+
+def _is_final_voice_reply(bot_reply_english: str) -> bool:
+    # Check for final message indicators - be more specific to avoid false positives
+    final_message_indicators = [
+        "Thanks for the details",  # Specific phrase
+        "arrule",  # Arrernte thanks
+        "arnterre"  # Arrernte medical terms that might indicate summary
+    ]
+    
+    # Only check for exact phrase matches, not partial word matches
+    is_final_detected = any(indicator.lower() in bot_reply_english.lower() for indicator in final_message_indicators)
+    
+    # Also check if the reply contains medical assessment keywords - be more specific
+    medical_assessment_keywords = [
+        "diagnosis", "recommendation", "doctor", "hospital",
+        "urgent", "emergency", "treatment", "medication", "follow-up"
+    ]
+    
+    # Only trigger if these keywords appear in a summary context, not in questions
+    has_medical_assessment = any(keyword in bot_reply_english.lower() for keyword in medical_assessment_keywords) and not bot_reply_english.strip().endswith('?')
+    
+    # Only trigger final message if we have a definitive final summary from the chatbot
+    # Look for the word "Summary" (with capital S) which indicates the final summary message
+    has_meaningful_summary = (
+        # Look for "Summary" with capital S (most specific indicator)
+        ("Summary" in bot_reply_english) or
+        # Look for "summary:" with colon (backup for lowercase)
+        ("summary:" in bot_reply_english.lower()) or
+        # Look for Arrernte final patterns with "Summary"
+        ("arrule" in bot_reply_english.lower() and "Summary" in bot_reply_english) or
+        ("arrule" in bot_reply_english.lower() and "summary" in bot_reply_english.lower())
+    )
+    
+    # Trigger final message if any of these conditions are met
+    if is_final_detected or has_medical_assessment or has_meaningful_summary:
+        log.debug("Final message triggered: final_detected=%s medical_assessment=%s meaningful_summary=%s",
+                  is_final_detected, has_medical_assessment, has_meaningful_summary)
+        return True
+    return False
+
+def _reply_audio(bot_reply_english, reply, lang):
+    if lang == "arrernte":
+        # Try to serve pre-recorded Arrernte clip for follow-up prompts
+        # Use the English reply for matching, not the Arrernte translation
+        audio_url = find_arrernte_clip_for_prompt(bot_reply_english)
+        if audio_url:
+            log.debug("Found pre-recorded audio: %s", audio_url)
+            return audio_url
+        log.debug("No pre-recorded audio found, using TTS fallback")
+    # Fallback to TTS if no clip
+    audio_url = text_to_speech(reply, "en")
+    if audio_url is None and HEAVY_DEPS_AVAILABLE and reply:
+        # fail the stage rather than cache a missing reply audio for this prompt
+        raise RuntimeError("TTS produced no audio")
+    return audio_url
+
+def _reply_audio_exists(audio_url):
+    """Cache check for the audio stage: a generated TTS file may have been removed since."""
+    if audio_url and audio_url.startswith("/static/audio/tts_"):
+        return os.path.isfile(os.path.join(BASE_DIR, "static", "audio", os.path.basename(audio_url)))
+    return True
+
+def _summary_for_models(state, bot_reply_english):
+    summary_text = Chat()._build_summary_for_models(state, bot_reply_english)
+    log.debug("Generated summary: %s", summary_text)
+    return summary_text
+
+def _save_turn_prediction(disease_prediction, bot_reply_english, lang, mode, headers):
+    # Save prediction for logged-in users (runs on a pool thread, so push an app context for the DB)
+    if not disease_prediction:
+        return False
+    with app.app_context():
+        return save_prediction_if_logged_in(disease_prediction, bot_reply_english, lang, mode, headers)
+
+def _fusion_call_info(fusion_resp=None) -> dict:
+    return {
+        "fusion_compare": {
+            "url": FUSION_URL,
+            "ok": fusion_resp.get("ok") if fusion_resp else False,
+            "status": fusion_resp.get("status") if fusion_resp else None
+        }
+    }
+
+def _fusion_models(summary_for_models, fusion_compare=None):
+    """Model fields from /api/fusion/compare (English chatbot turns)."""
+    fusion_resp = fusion_compare or {"ok": False, "error": "fusion stage failed", "body": None}
+    fused_json = fusion_resp.get("json") if fusion_resp.get("ok") else {
+        "error": fusion_resp.get("error"),
+        "body": fusion_resp.get("body")
+    }
+    return {
+        "summary_for_models": summary_for_models,
+        # Extract ml1/ml2 blocks if present (for convenience in your UI)
+        "ml1_result": (fused_json or {}).get("ml1"),
+        "ml2_result": (fused_json or {}).get("ml2"),
+        "fused_result": fused_json,
+        "model_calls": _fusion_call_info(fusion_resp),
+    }
+
+def _prediction_models(disease_prediction):
+    """Model fields taken from the disease prediction itself (images / Arrernte text turns)."""
+    usable = bool(disease_prediction) and not disease_prediction.get("error")
+    return {
+        "summary_for_models": disease_prediction.get("input") if usable else None,
+        "ml1_result": disease_prediction.get("ml1") if usable else None,
+        "ml2_result": disease_prediction.get("ml2") if usable else None,
+        "fused_result": disease_prediction.get("final") if usable else None,
+        "model_calls": {},
+    }
+
+def _reply_event(reply, replaced_words, state, bot, is_final_message, lang, mode, context_language=None):
+    """What a streamed response sends as soon as the bot has answered."""
+    return {
+        "reply": reply,
+        "context": {"language": context_language or lang, "mode": mode},
+        "replaced_words": replaced_words,
+        "state": state,
+        "bot": bot,
+        "is_final_message": is_final_message,
+    }
+
+def _chat_response(kind, reply_event, disease_prediction=None, models=None, audio_url=None,
+                   transcribed_text=None, normalized_text=None, detected_keywords=None, prediction_text=None):
+    if models is None:
+        if kind == "images":
+            models = {"summary_for_models": prediction_text, "model_calls": {}}
+        elif kind == "arrernte_text":
+            models = {"model_calls": {}}
+        else:
+            models = {"model_calls": _fusion_call_info()}
+    response = dict(reply_event)
+    response.update({
+        "transcribed_text": transcribed_text,
+        "normalized_text": normalized_text,
+        "disease_prediction": disease_prediction,
+        "audio_url": audio_url,
+
+        # --- Model fusion outputs ---
+        "summary_for_models": models.get("summary_for_models"),
+        "ml1_result": models.get("ml1_result"),
+        "ml2_result": models.get("ml2_result"),
+        "fused_result": models.get("fused_result"),
+        "model_calls": models.get("model_calls"),
+    })
+    if kind == "arrernte_voice":
+        # For Arrernte, don't expose transcribed text to frontend
+        response["transcribed_text"] = response["normalized_text"] = None
+        response["detected_keywords"] = detected_keywords or []
+        response["keyword_string"] = ", ".join(detected_keywords) if detected_keywords else ""
+    return response
+
+def _response_stage(kind, voice=False):
+    optional = ["disease_prediction", "models", "prediction_text"]
+    if voice:
+        optional += ["audio_url", "transcribed_text", "normalized_text", "detected_keywords"]
+    return Stage("response", lambda reply_event, **kw: _chat_response(kind, reply_event, **kw),
+                 ["reply_event"], optional=optional)
+
+REPLY_EVENT_STAGE = Stage("reply_event", _reply_event,
+                          ["reply", "replaced_words", "state", "bot", "is_final_message", "lang", "mode"],
+                          optional=["context_language"])
+ROUTE_ENGLISH_STAGE = Stage("route", _route_english, ["bot_input"],
+                            outputs=["bot_reply_english", "state", "bot"], executor="route")
+LOCALIZE_STAGE = Stage("localize", _localize_reply, ["bot_reply_english", "lang"],
+                       outputs=["reply", "replaced_words"], cache=TURN_CACHE_SIZE)
+
+# Final English-chatbot turn, on top of DISEASE_PREDICTION_STAGES:
+#   disease_prediction -> save_prediction;  summary_for_models -> fusion_compare -> models
+ENGLISH_FINAL_STAGES = [
+    Stage("prediction_text", lambda bot_reply_english: bot_reply_english, ["bot_reply_english"]),
+    *DISEASE_PREDICTION_STAGES,
+    Stage("summary_for_models", _summary_for_models, ["state", "bot_reply_english"], when="is_final_message"),
+    Stage("fusion_compare", lambda summary_for_models: Chat()._call_fusion_compare(summary_for_models, topk=3),
+          ["summary_for_models"], executor="thread", timeout=ML_STAGE_TIMEOUT_S),
+    Stage("models", _fusion_models, ["summary_for_models"], optional=["fusion_compare"]),
+    Stage("save_prediction", _save_turn_prediction,
+          ["disease_prediction", "bot_reply_english", "lang", "mode", "headers"], executor="thread"),
+]
+
+def _voice_stages(lang, kind):
+    """Voice turn after transcription: normalize, (translate, keywords), route, localize, TTS, predict."""
+    if lang == "arrernte":
+        bot_input = [
+            Stage("translate", lambda normalized_text: _translate_to_english(normalized_text), ["normalized_text"], outputs=["translated_text"],
+                  cache=TURN_CACHE_SIZE),
+            Stage("keywords", lambda translated_text: detect_medical_keywords_in_text(translated_text), ["translated_text"], outputs=["detected_keywords"],
+                  cache=TURN_CACHE_SIZE),
+            Stage("bot_input", _bot_input_from_keywords, ["translated_text", "detected_keywords"]),
+        ]
+    else:
+        bot_input = [Stage("bot_input", lambda normalized_text: normalized_text, ["normalized_text"])]
+    return [
+        Stage("normalize", _normalize_transcript, ["transcribed_text"], outputs=["normalized_text"]),
+        *bot_input,
+        ROUTE_ENGLISH_STAGE,
+        Stage("is_final_message", _is_final_voice_reply, ["bot_reply_english"]),
+        LOCALIZE_STAGE,
+        REPLY_EVENT_STAGE,
+        # TTS of the reply doesn't depend on the prediction, so it runs alongside the final-turn stages
+        Stage("audio_url", _reply_audio, ["bot_reply_english", "reply", "lang"], executor="audio",
+              cache=TURN_CACHE_SIZE, cache_valid=_reply_audio_exists, timeout=TTS_STAGE_TIMEOUT_S),
+        *ENGLISH_FINAL_STAGES,
+        _response_stage(kind, voice=True),
+    ]
+
+TRANSCRIBE_STAGE = Stage("transcribe", _transcribe_turn, ["audio"], optional=["asr_retries", "emit"],
+                         outputs=["transcribed_text"], executor="asr")
+VOICE_PARAMS = ["lang", "mode", "headers", "asr_retries", "emit"]
+TEXT_PARAMS = ["message", "data", "reset", "lang", "mode", "history", "headers", "emit"]
+
+CHAT_PIPELINES = {p.name: p for p in [
+    Pipeline("english_text", [
+        # Arrernte input for the English chatbot (non-"text" Arrernte modes) is glossary-translated first
+        Stage("bot_input", lambda message, lang: _translate_to_english(message) if lang == "arrernte" else message,
+              ["message", "lang"], cache=TURN_CACHE_SIZE),
+        ROUTE_ENGLISH_STAGE,
+        Stage("is_final_message", _is_final_text_reply, ["bot_reply_english"]),
+        LOCALIZE_STAGE,
+        REPLY_EVENT_STAGE,
+        *ENGLISH_FINAL_STAGES,
+        _response_stage("english_text"),
+    ], params=TEXT_PARAMS),
+    Pipeline("arrernte_text", [
+        Stage("route", _route_arrernte_text, ["message"], optional=["reset"],
+              outputs=["reply", "replaced_words", "state", "bot", "is_final_message"], executor="route"),
+        REPLY_EVENT_STAGE,
+        # Translate latest user input to English for the model summary
+        Stage("prediction_text", lambda message: _translate_to_english(message), ["message"], when="is_final_message", cache=TURN_CACHE_SIZE),
+        *DISEASE_PREDICTION_STAGES,
+        Stage("models", _prediction_models, ["disease_prediction"]),
+        _response_stage("arrernte_text"),
+    ], params=TEXT_PARAMS),
+    Pipeline("images", [
+        Stage("images_turn", _images_turn, ["data"],
+              outputs=["reply", "context_language", "replaced_words", "state", "bot", "is_final_message",
+                       "prediction_text"]),
+        REPLY_EVENT_STAGE,
+        *DISEASE_PREDICTION_STAGES,
+        Stage("models", _prediction_models, ["disease_prediction"]),
+        _response_stage("images"),
+    ], params=TEXT_PARAMS),
+    Pipeline("english_voice", [TRANSCRIBE_STAGE, *_voice_stages("english", "english_voice")],
+             params=["audio"] + VOICE_PARAMS),
+    Pipeline("arrernte_voice", [TRANSCRIBE_STAGE, *_voice_stages("arrernte", "arrernte_voice")],
+             params=["audio"] + VOICE_PARAMS),
+    # Already-transcribed voice turns (streaming WebSocket)
+    Pipeline("english_voice_transcript", _voice_stages("english", "english_voice"),
+             params=["transcribed_text"] + VOICE_PARAMS),
+    Pipeline("arrernte_voice_transcript", _voice_stages("arrernte", "arrernte_voice"),
+             params=["transcribed_text"] + VOICE_PARAMS),
+]}
+
+# ---------------- Memory accounting (see memstats.py) ----------------
+def _chatbot_footprint(route_fn):
+    bot = _chatbot(route_fn)
+    if bot is None:
+        return {"loaded": False}
+    # profiles with the same checkpoint share one classifier (see Chatbot/chat.py)
+    return {"loaded": bot.model is not None, "entries": len(bot.all_words), "tags": len(bot.tags),
+            "checkpoint": str(bot.intent_model.path) if bot.intent_model is not None else None,
+            "objects": [bot.model, bot.all_words, bot.tags, bot.intents_list]}
+
+def _registry_footprint(name, state=lambda value: value):
+    """A registry model's current version plus any retired ones still draining."""
+    managed = model_registry.registry.model(name)
+    held = [v for v in (managed.current, *managed.retiring) if v is not None]
+    return {"loaded": managed.current is not None, "version": managed.version, "versions_held": len(held),
+            "objects": [state(v.value) for v in held]}
+
+def _register_stage_caches(pipelines):
+    # Stages shared by several pipelines share one cache; count it once, under the first pipeline
+    seen = set()
+    for p in pipelines:
+        for st in p.stages:
+            if st.cache is not None and id(st.cache) not in seen:
+                seen.add(id(st.cache))
+                memstats.register(f"cache.stage.{p.name}.{st.name}", "cache", st.cache.footprint)
+
+memstats.register("chatbot.english", "model", lambda: _chatbot_footprint(route_message))
+if arr_route_message:
+    memstats.register("chatbot.arrernte", "model", lambda: _chatbot_footprint(arr_route_message))
+memstats.register("model.ml1", "model", lambda: _registry_footprint("ml1", memstats.module_state))
+memstats.register("model.ml2", "model", lambda: _registry_footprint("ml2"))
+memstats.register("glossary", "data", lambda: {"entries": len(ARR2ENG), "en2arr": len(EN2ARR),
+                                               "objects": (EN2ARR, ARR2ENG, AUDIO_MAPPING, _glossary_obj)})
+# Every TTS reply leaves a file behind; nothing deletes them
+memstats.register("clip_index", "data", lambda: {"entries": len(_clip_index or ()), "objects": _clip_index})
+memstats.register("disk.tts", "disk", lambda: memstats.directory_usage(os.path.join(BASE_DIR, "static", "audio"),
+                                                                      ("tts_", ".wav")))
+_register_stage_caches([PREDICTION_PIPELINE, *CHAT_PIPELINES.values()])
+
+def text_pipeline_name(lang: str, mode: str) -> str:
+    if mode == "images" and lang in ["en", "english"]:
+        return "images"
+    if lang == "arrernte" and mode == "text" and arr_route_message:
+        return "arrernte_text"
+    log.debug("Routing to main (English) chatbot")
+    return "english_text"
+
+def _turn_response(run) -> dict:
+    """The response body of a finished chat pipeline; re-raises the failure if there is none."""
+    if not run.available("response"):
+        raise run.first_error() or RuntimeError(f"{run.pipeline.name}: no response produced")
+    response = dict(run.values["response"])
+    response["stage_timings"] = run.timings
+    return response
+
+def run_chat_turn(name: str, params: dict) -> dict:
+    """Run one chat turn synchronously and return the response dict."""
+    return _turn_response(CHAT_PIPELINES[name].run(params))
+
+# finished stage -> streamed event
+_STAGE_EVENTS = {
+    "transcribe": "transcript",
+    "reply_event": "reply",
+    "audio_url": "audio",
+    "disease_prediction": "prediction",
+    "models": "models",
+}
+
+def start_chat_job(job, name: str, params: dict):
+    """Run a chat turn in the background; each finished stage becomes a job event."""
+    lang = params.get("lang")
+
+    def _on_done(stage, run):
+        event = _STAGE_EVENTS.get(stage)
+        if event == "transcript":
+            # Arrernte transcripts are not exposed to the frontend (same as the sync response)
+            job.emit(event, {"text": run.values["transcribed_text"]} if lang == "english" else {"language": lang})
+        elif event == "audio":
+            job.emit(event, {"audio_url": run.values["audio_url"]})
+        elif event == "prediction":
+            job.emit(event, {"disease_prediction": run.values["disease_prediction"]})
+        elif event:
+            job.emit(event, run.values[stage])
+
+    def _finished(run):
+        try:
+            job.finish(marshal(_turn_response(run), chat_response_model))
+        except Exception as e:
+            log.error("Chat job %s failed: %s", job.id, e)
+            job.fail(e, getattr(e, "status_code", 500))
+
+    CHAT_PIPELINES[name].start(dict(params, emit=job.emit), on_done=_on_done).add_done_callback(_finished)
+
+# ---------------- Async voice turns (job API) ----------------
+VOICE_JOB_ASR_RETRIES = int(os.environ.get("VOICE_JOB_ASR_RETRIES", "5"))
+
+voice_job_parser = api.parser()
+voice_job_parser.add_argument('audio', type=FileStorage, location='files', required=True,
+                              help='Recorded voice turn (WebM, MP4, WAV, etc.)')
+voice_job_parser.add_argument('language', location='form', required=False, help="'english' or 'arrernte'")
+
+voice_job_model = api.model('VoiceJob', {
+    'job_id': fields.String(description='Job id'),
+    'status': fields.String(description='queued | running | done | error'),
+    'status_url': fields.String(description='Poll here (?since=<seq> for new events only)'),
+    'events_url': fields.String(description='Server-Sent Events stream of stage results'),
+})
+
+@chat_ns.route("/jobs")
+class VoiceJobs(Resource):
+    @chat_ns.doc('submit_voice_job', parser=voice_job_parser)
+    @chat_ns.marshal_with(voice_job_model, code=202)
+    def post(self):
+        """
+        Submit a voice turn for asynchronous processing
+
+        Returns a job id immediately. Stage results (transcript, reply, audio, prediction)
+        arrive as events on `events_url` (SSE) or by polling `status_url`; the final
+        `done` event carries the same body as a synchronous voice POST to /api/chat/.
+        """
+        if "audio" not in request.files:
+            api.abort(400, "No audio file provided")
+        audio_content = request.files["audio"].read()
+        if not audio_content:
+            api.abort(400, "Audio file is empty")
+        lang = _normalize_voice_language(request.headers.get("X-Language") or request.form.get("language"))
+        mode = (request.headers.get("X-Mode") or request.form.get("mode") or "voice").lower()
+        if lang not in ("english", "arrernte") or mode != "voice":
+            api.abort(400, f"Voice jobs support language 'english' or 'arrernte' and mode 'voice'. Received: lang={lang}, mode={mode}")
+        if wait_for_asr() is None:
+            api.abort(503, "Speech recognition not available")
+
+        job = voice_jobs.jobs.create("voice")
+        start_chat_job(job, f"{lang}_voice", {"audio": audio_content, "lang": lang, "mode": mode,
+                                              "headers": {"Authorization": request.headers.get("Authorization")},
+                                              "asr_retries": VOICE_JOB_ASR_RETRIES})
+        log.debug("Voice job %s submitted (lang=%s, %s bytes)", job.id, lang, len(audio_content))
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/chat/jobs/{job.id}",
+            "events_url": f"/api/chat/jobs/{job.id}/events",
+        }, 202
+
+@chat_ns.route("/jobs/<string:job_id>")
+class VoiceJobStatus(Resource):
+    @chat_ns.doc('get_voice_job', params={'since': 'Only return events with seq greater than this'})
+    def get(self, job_id):
+        """Poll a voice job: status, stage events and (once done) the full chat response"""
+        job = voice_jobs.jobs.get(job_id)
+        if job is None:
+            api.abort(404, "Unknown or expired job id")
+        return job.to_dict(since=request.args.get("since", 0, type=int))
+
+@chat_ns.route("/jobs/<string:job_id>/events")
+class VoiceJobEvents(Resource):
+    @chat_ns.doc('stream_voice_job')
+    def get(self, job_id):
+        """Server-Sent Events: one event per finished stage, ending with 'done' or 'error'"""
+        job = voice_jobs.jobs.get(job_id)
+        if job is None:
+            api.abort(404, "Unknown or expired job id")
+        # Last-Event-ID lets a reconnecting EventSource resume where it left off
+        since = request.headers.get("Last-Event-ID", type=int) or request.args.get("since", 0, type=int)
+        return Response(voice_jobs.sse_stream(job, since), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ---------------- Streaming voice (WebSocket) ----------------
+def _normalize_voice_language(lang_raw: str) -> str:
+    lang_raw = (lang_raw or "english").lower()
+    if lang_raw in ["en", "english"]:
+        return "english"
+    if lang_raw in ["arr", "arrernte"]:
+        return "arrernte"
+    return lang_raw
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/ws/chat/stream')
+    def chat_stream(ws):
+        """
+        Streaming voice chat.
+
+        Query params: language=english|arrernte, sample_rate=<Hz of the PCM sent> (default 16000).
+        Client -> server: binary frames of PCM16LE mono audio; text frames with JSON
+        control messages {"type": "stop"} (flush the current utterance) or {"type": "reset"}.
+        Server -> client: {"type": "partial", "text"} while the patient speaks, then
+        {"type": "final", "text", "duration", "chat": <same body as POST /api/chat/ voice>}
+        as soon as they stop; {"type": "error", "message", "retry_after"?} on failure.
+        """
+        if wait_for_asr() is None or not asr_service.is_available():
+            ws.send(json.dumps({"type": "error", "message": "Speech recognition not available"}))
+            return
+        lang = _normalize_voice_language(request.args.get("language") or request.headers.get("X-Language"))
+        if lang not in ("english", "arrernte"):
+            ws.send(json.dumps({"type": "error", "message": f"Unsupported language: {lang}"}))
+            return
+        try:
+            sample_rate = int(request.args.get("sample_rate", voice_stream.SAMPLE_RATE))
+        except ValueError:
+            sample_rate = voice_stream.SAMPLE_RATE
+        stream = voice_stream.StreamingTranscriber(sample_rate=sample_rate)
+        log.debug("Voice stream opened lang=%s sample_rate=%s", lang, sample_rate)
+
+        while True:
+            msg = ws.receive()
+            if msg is None:
+                break
+            try:
+                if isinstance(msg, str):
+                    ctrl = json.loads(msg or "{}")
+                    if ctrl.get("type") == "reset":
+                        reset_state()
+                        events = []
+                    elif ctrl.get("type") == "stop":
+                        final = stream.finish()
+                        events = [final] if final else []
+                    else:
+                        events = []
+                else:
+                    events = stream.feed(msg)
+
+                for ev in events:
+                    if ev["type"] == "final" and ev["text"]:
+                        ev["chat"] = run_chat_turn(f"{lang}_voice_transcript", {
+                            "transcribed_text": ev["text"], "lang": lang, "mode": "voice",
+                            "headers": {"Authorization": request.headers.get("Authorization")}})
+                    ws.send(json.dumps(ev, default=str))
+            except asr_service.ASRBusyError as e:
+                ws.send(json.dumps({"type": "error", "message": str(e), "retry_after": e.retry_after}))
+            except Exception as e:
+                log.error("Voice stream failed: %s", e)
+                ws.send(json.dumps({"type": "error", "message": str(e)}))
+
 @translate_ns.route("/to_arrernte")
 class TranslateToArrernte(Resource):
     @translate_ns.expect(translate_request_model)
@@ -1830,7 +2321,7 @@ class TranslateToArrernte(Resource):
             api.abort(400, "Provide JSON with 'text'")
         
         try:
-            g = _Glossary.load_csv(os.path.join(os.path.dirname(__file__), 'Glossary', 'arrernte_audio.csv'))
+            g = _glossary()
             # Whitelist of safe medical terms/directions/units to translate EN -> ARR
             EN_WHITELIST = {
                 'headache','fever','cough','stomach','rash','fatigue','pain','temperature','chills','sweating',
@@ -1855,7 +2346,7 @@ class TranslateToArrernte(Resource):
             out_text = re.sub(r"\s+([.,;:!?])", r"\\1", out_text)
             return {"original_text": text, "translated_text": out_text, "replaced_words": filtered}
         except Exception as e:
-            print(f"[ERROR] EN->ARR translation failed: {e}")
+            log.error("EN->ARR translation failed: %s", e)
             return {"original_text": text, "translated_text": text, "replaced_words": []}
 
 @translate_ns.route("/to_english")
@@ -1870,7 +2361,7 @@ class TranslateToEnglish(Resource):
             api.abort(400, "Provide JSON with 'text'")
         
         try:
-            g = _Glossary.load_csv(os.path.join(os.path.dirname(__file__), 'Glossary', 'arrernte_audio.csv'))
+            g = _glossary()
             raw_out, decisions = _gloss_translate(g, text, direction='arr2en')
             out_tokens = []
             filtered = []
@@ -1886,7 +2377,7 @@ class TranslateToEnglish(Resource):
             out_text = re.sub(r"\s+([.,;:!?])", r"\\1", out_text)
             return {"original_text": text, "translated_text": out_text, "replaced_words": filtered}
         except Exception as e:
-            print(f"[ERROR] ARR->EN translation failed: {e}")
+            log.error("ARR->EN translation failed: %s", e)
             return {"original_text": text, "translated_text": text, "replaced_words": []}
 
 @arrernte_ns.route('/analyze')
@@ -1936,13 +2427,14 @@ class ArrernteAnalyze(Resource):
                 "concatenated_string": concatenated
             }
         except Exception as e:
-            print(f"[ERROR] Arrernte analyze failed: {e}")
+            log.error("Arrernte analyze failed: %s", e)
             api.abort(500, f"Analyze failed: {e}")
 
 # Simple translation function for Arrernte to English
+@metrics.timed_fn("glossary_translate")
 def translate_arr_to_english_simple(text: str):
     try:
-        g = _Glossary.load_csv(os.path.join(os.path.dirname(__file__), 'Glossary', 'arrernte_audio.csv'))
+        g = _glossary()
         raw_out, decisions = _gloss_translate(g, text, direction='arr2en')
         out_tokens = []
         filtered = []
@@ -1971,11 +2463,11 @@ def translate_arr_to_english_simple(text: str):
                 if word not in translated_words:
                     # Insert the missing word back into the translated text
                     out_text = out_text + ' ' + word
-                    print(f"[DEBUG] Preserved missing word: '{word}'")
+                    log.debug("Preserved missing word: '%s'", word)
         
         return out_text, filtered
     except Exception as e:
-        print(f"[ERROR] translate_arr_to_english_simple failed: {e}")
+        log.error("translate_arr_to_english_simple failed: %s", e)
         return text, []
 
 # Medical keywords for detection in translated Arrernte text
@@ -2023,6 +2515,7 @@ MEDICAL_KEYWORDS_FOR_CHAT = {
     "emergency": ["emergency", "urgent", "critical", "help"]
 }
 
+@metrics.timed_fn("keyword_detection")
 def detect_medical_keywords_in_text(text: str) -> list:
     """
     Detect medical keywords in translated text and return a list of specific words found.
@@ -2055,7 +2548,7 @@ def detect_medical_keywords_in_text(text: str) -> list:
         time_part = match.group(3)  # days, hours, etc.
         combined = f"{number_part} {time_part}"
         number_time_combinations.append(combined)
-        print(f"[DEBUG] Found number+time combination: '{combined}'")
+        log.debug("Found number+time combination: '%s'", combined)
     
     # Add the combined keywords
     detected_keywords.extend(number_time_combinations)
@@ -2092,7 +2585,7 @@ def detect_medical_keywords_in_text(text: str) -> list:
                         for combination in number_time_combinations:
                             if keyword.lower() in combination:
                                 skip_keyword = True
-                                print(f"[DEBUG] Skipping '{keyword}' as it's part of combination '{combination}'")
+                                log.debug("Skipping '%s' as it's part of combination '%s'", keyword, combination)
                                 break
                     
                     if not skip_keyword:
@@ -2117,23 +2610,23 @@ def detect_medical_keywords_in_text(text: str) -> list:
             unique_keywords.append(keyword)
     
     # Check for Arrernte translations in the glossary
-    print(f"[DEBUG] Checking for Arrernte translations for keywords: {unique_keywords}")
+    log.debug("Checking for Arrernte translations for keywords: %s", unique_keywords)
     try:
         # Fix the path to the glossary file
         glossary_path = os.path.join(os.path.dirname(__file__), 'Glossary', 'arrernte_audio.csv')
-        print(f"[DEBUG] Loading glossary from: {glossary_path}")
+        log.debug("Loading glossary from: %s", glossary_path)
         
         # Check if file exists
         if not os.path.exists(glossary_path):
-            print(f"[ERROR] Glossary file not found at: {glossary_path}")
+            log.error("Glossary file not found at: %s", glossary_path)
             return unique_keywords
         
-        g = _Glossary.load_csv(glossary_path)
-        print(f"[DEBUG] Successfully loaded glossary with {len(g.rows)} entries")
+        g = _glossary()
+        log.debug("Successfully loaded glossary with %s entries", len(g.rows))
         arrernte_translations = []
         
         for keyword in unique_keywords:
-            print(f"[DEBUG] Looking for Arrernte translation for keyword: '{keyword}'")
+            log.debug("Looking for Arrernte translation for keyword: '%s'", keyword)
             # Look for Arrernte translations of the keyword
             for row in g.rows:
                 english_meaning = row.get('english_meaning', '')
@@ -2141,9 +2634,9 @@ def detect_medical_keywords_in_text(text: str) -> list:
                 if english_meaning and keyword.lower() in english_meaning.lower():
                     if arrernte_word:
                         arrernte_translations.append(arrernte_word)
-                        print(f"[DEBUG] Found Arrernte translation for '{keyword}': '{arrernte_word}' (from '{english_meaning}')")
+                        log.debug("Found Arrernte translation for '%s': '%s' (from '%s')", keyword, arrernte_word, english_meaning)
         
-        print(f"[DEBUG] Found {len(arrernte_translations)} Arrernte translations: {arrernte_translations}")
+        log.debug("Found %s Arrernte translations: %s", len(arrernte_translations), arrernte_translations)
         
         # Track which Arrernte translations belong to location, symptom, and duration keywords
         location_keywords = ["lower", "upper", "right", "left", "front", "back", "side", "sides", "top", "bottom", "middle", "center", "inner", "outer"]
@@ -2165,18 +2658,18 @@ def detect_medical_keywords_in_text(text: str) -> list:
         
         # If duration keywords are present, also consider numbers as priority
         if has_duration_keywords and has_number_keywords:
-            print(f"[DEBUG] Duration keywords with numbers detected - treating numbers as priority")
+            log.debug("Duration keywords with numbers detected - treating numbers as priority")
         
         has_priority_keywords = has_location_keywords or has_symptom_keywords or has_duration_keywords
         
         if has_priority_keywords:
             if has_location_keywords:
-                print(f"[DEBUG] Location keywords detected")
+                log.debug("Location keywords detected")
             if has_symptom_keywords:
-                print(f"[DEBUG] Symptom keywords detected")
+                log.debug("Symptom keywords detected")
             if has_duration_keywords:
-                print(f"[DEBUG] Duration keywords detected")
-            print(f"[DEBUG] Filtering to keep only priority keywords and their translations")
+                log.debug("Duration keywords detected")
+            log.debug("Filtering to keep only priority keywords and their translations")
             
             # Find Arrernte translations specifically for location keywords
             for keyword in unique_keywords:
@@ -2188,7 +2681,7 @@ def detect_medical_keywords_in_text(text: str) -> list:
                         if english_meaning and keyword.lower() in english_meaning.lower():
                             if arrernte_word:
                                 location_arrernte_translations.append(arrernte_word)
-                                print(f"[DEBUG] Found location Arrernte translation for '{keyword}': '{arrernte_word}'")
+                                log.debug("Found location Arrernte translation for '%s': '%s'", keyword, arrernte_word)
             
             # Find Arrernte translations specifically for symptom keywords
             for keyword in unique_keywords:
@@ -2200,7 +2693,7 @@ def detect_medical_keywords_in_text(text: str) -> list:
                         if english_meaning and keyword.lower() in english_meaning.lower():
                             if arrernte_word:
                                 symptom_arrernte_translations.append(arrernte_word)
-                                print(f"[DEBUG] Found symptom Arrernte translation for '{keyword}': '{arrernte_word}'")
+                                log.debug("Found symptom Arrernte translation for '%s': '%s'", keyword, arrernte_word)
             
             # Find Arrernte translations specifically for duration keywords
             for keyword in unique_keywords:
@@ -2212,7 +2705,7 @@ def detect_medical_keywords_in_text(text: str) -> list:
                         if english_meaning and keyword.lower() in english_meaning.lower():
                             if arrernte_word:
                                 duration_arrernte_translations.append(arrernte_word)
-                                print(f"[DEBUG] Found duration Arrernte translation for '{keyword}': '{arrernte_word}'")
+                                log.debug("Found duration Arrernte translation for '%s': '%s'", keyword, arrernte_word)
             
             # Filter to keep only priority keywords and their specific Arrernte translations
             filtered_keywords = []
@@ -2221,61 +2714,61 @@ def detect_medical_keywords_in_text(text: str) -> list:
             # If duration keywords are present, also include numbers as priority
             if has_duration_keywords and has_number_keywords:
                 priority_keywords.extend(number_keywords)
-                print(f"[DEBUG] Including numbers as priority keywords due to duration context")
+                log.debug("Including numbers as priority keywords due to duration context")
             
             # Keep priority keywords (location, symptom, and duration)
             for keyword in unique_keywords:
                 if keyword.lower() in priority_keywords:
                     filtered_keywords.append(keyword)
                     if keyword.lower() in location_keywords:
-                        print(f"[DEBUG] Keeping location keyword: '{keyword}'")
+                        log.debug("Keeping location keyword: '%s'", keyword)
                     elif keyword.lower() in symptom_keywords:
-                        print(f"[DEBUG] Keeping symptom keyword: '{keyword}'")
+                        log.debug("Keeping symptom keyword: '%s'", keyword)
                     elif keyword.lower() in duration_keywords:
-                        print(f"[DEBUG] Keeping duration keyword: '{keyword}'")
+                        log.debug("Keeping duration keyword: '%s'", keyword)
                     elif keyword.lower() in number_keywords and has_duration_keywords:
-                        print(f"[DEBUG] Keeping number keyword (duration context): '{keyword}'")
+                        log.debug("Keeping number keyword (duration context): '%s'", keyword)
             
             # Keep only Arrernte translations of priority keywords
             for keyword in unique_keywords:
                 if keyword not in priority_keywords and keyword in location_arrernte_translations:
                     filtered_keywords.append(keyword)
-                    print(f"[DEBUG] Keeping location Arrernte translation: '{keyword}'")
+                    log.debug("Keeping location Arrernte translation: '%s'", keyword)
                 elif keyword not in priority_keywords and keyword in symptom_arrernte_translations:
                     filtered_keywords.append(keyword)
-                    print(f"[DEBUG] Keeping symptom Arrernte translation: '{keyword}'")
+                    log.debug("Keeping symptom Arrernte translation: '%s'", keyword)
                 elif keyword not in priority_keywords and keyword in duration_arrernte_translations:
                     filtered_keywords.append(keyword)
-                    print(f"[DEBUG] Keeping duration Arrernte translation: '{keyword}'")
+                    log.debug("Keeping duration Arrernte translation: '%s'", keyword)
                 elif keyword not in priority_keywords and keyword not in location_arrernte_translations and keyword not in symptom_arrernte_translations and keyword not in duration_arrernte_translations:
-                    print(f"[DEBUG] Removing non-priority keyword: '{keyword}'")
+                    log.debug("Removing non-priority keyword: '%s'", keyword)
             
             # Also add any Arrernte translations that were found for priority keywords
             for arrernte_word in location_arrernte_translations:
                 if arrernte_word not in filtered_keywords:
                     filtered_keywords.append(arrernte_word)
-                    print(f"[DEBUG] Adding location Arrernte translation: '{arrernte_word}'")
+                    log.debug("Adding location Arrernte translation: '%s'", arrernte_word)
             
             for arrernte_word in symptom_arrernte_translations:
                 if arrernte_word not in filtered_keywords:
                     filtered_keywords.append(arrernte_word)
-                    print(f"[DEBUG] Adding symptom Arrernte translation: '{arrernte_word}'")
+                    log.debug("Adding symptom Arrernte translation: '%s'", arrernte_word)
             
             for arrernte_word in duration_arrernte_translations:
                 if arrernte_word not in filtered_keywords:
                     filtered_keywords.append(arrernte_word)
-                    print(f"[DEBUG] Adding duration Arrernte translation: '{arrernte_word}'")
+                    log.debug("Adding duration Arrernte translation: '%s'", arrernte_word)
             
             unique_keywords = filtered_keywords
-            print(f"[DEBUG] Filtered keywords (priority + Arrernte translations): {unique_keywords}")
+            log.debug("Filtered keywords (priority + Arrernte translations): %s", unique_keywords)
         else:
-            print(f"[DEBUG] No priority keywords (location/symptom/duration) detected, keeping all keywords")
+            log.debug("No priority keywords (location/symptom/duration) detected, keeping all keywords")
             # Add all Arrernte translations
             unique_keywords.extend(arrernte_translations)
-            print(f"[DEBUG] Keywords with all Arrernte translations: {unique_keywords}")
+            log.debug("Keywords with all Arrernte translations: %s", unique_keywords)
         
     except Exception as e:
-        print(f"[ERROR] Failed to load glossary for Arrernte translations: {e}")
+        log.error("Failed to load glossary for Arrernte translations: %s", e)
     
     return unique_keywords
 
@@ -2288,10 +2781,18 @@ def home():
         'endpoints': {
             'swagger': '/api/swagger/',
             'health': '/health',
+            'ready': '/ready (models loaded and warmed)',
+            'asr_status': '/asr/status',
+            'metrics': '/metrics (Prometheus)',
+            'profiles': '/debug/profiles (on-demand request profiles)',
+            'memory': '/debug/memory (per-component memory footprint, tracemalloc)',
+            'models': '/admin/models (loaded model versions; POST /admin/models/<name>/swap to hot-swap)',
             'cors_test': '/cors-test',
             'auth': '/api/auth/',
             'chat': '/api/chat/ (supports both text and voice)',
             'transcribe': '/api/chat/transcribe (standalone transcription)',
+            'voice_jobs': '/api/chat/jobs (async voice turns; poll or SSE for stage results)',
+            'voice_stream': '/ws/chat/stream (WebSocket, streaming voice with partial transcripts)',
             'translate_arrernte': '/api/translate/to_arrernte',
             'translate_english': '/api/translate/to_english'
         },
@@ -2317,13 +2818,13 @@ def serve_audio(filepath):
             else:
                 mimetype = 'audio/mpeg'  # Default to MP3
             
-            print(f"[DEBUG] Serving audio file: {audio_path} (MIME: {mimetype})")
+            log.debug("Serving audio file: %s (MIME: %s)", audio_path, mimetype)
             return send_file(audio_path, mimetype=mimetype)
         else:
-            print(f"[ERROR] Audio file not found: {audio_path}")
+            log.error("Audio file not found: %s", audio_path)
             return jsonify({"error": "Audio file not found"}), 404
     except Exception as e:
-        print(f"[ERROR] Error serving audio file {filepath}: {str(e)}")
+        log.error("Error serving audio file %s: %s", filepath, e)
         return jsonify({"error": "Error serving audio file"}), 500
 
 # Serve Arrernte clips (static files under clips/)
@@ -2335,7 +2836,7 @@ def serve_clips(subpath):
             return send_file(abs_path)
         return jsonify({"error": "Clip not found"}), 404
     except Exception as e:
-        print(f"[ERROR] Error serving clip {subpath}: {str(e)}")
+        log.error("Error serving clip %s: %s", subpath, e)
         return jsonify({"error": "Error serving clip"}), 500
 
 # ==================== NEW API: Arrernte Audio Analysis ====================
@@ -2525,36 +3026,32 @@ class ArrernteAudioAnalysis(Resource):
             processing_notes = []
             
             # Step 1: Transcribe audio
-            if not HEAVY_DEPS_AVAILABLE or whisper_model is None:
-                print("[WARNING] Audio transcription dependencies not available, using fallback")
+            if not HEAVY_DEPS_AVAILABLE or wait_for_asr() is None:
+                log.warning("Audio transcription dependencies not available, using fallback")
                 transcribed_text = "I have a headache and feel dizzy"  # Fallback text for testing
                 lang = "en"
                 lang_prob = 0.8
                 processing_notes.append("Audio transcription not available - using fallback text for testing")
             else:
                 try:
-                    # Save uploaded file temporarily
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                        audio_file.save(tmp_file.name)
-                        tmp_path = tmp_file.name
-                    
-                    # Transcribe using Whisper
-                    if force_language == "en":
-                        segments, info = whisper_model.transcribe(tmp_path, language="en")
-                        lang = "en"
-                        lang_prob = 1.0
-                    else:
-                        segments, info = whisper_model.transcribe(tmp_path)
-                        lang = getattr(info, "language", "auto")
-                        lang_prob = getattr(info, "language_probability", 0.0)
-                    
-                    transcribed_text = " ".join(s.text.strip() for s in segments).strip()
-                    
-                    # Clean up temp file
-                    os.unlink(tmp_path)
+                    # Decode in memory and transcribe using Whisper
+                    with metrics.timed("transcribe"):
+                        result = asr_service.transcribe(
+                            audio_file,
+                            language="en" if force_language == "en" else None,
+                        )
+                    transcribed_text = result["text"]
+                    lang = result["language"]
+                    lang_prob = result["language_probability"]
                     
+                    if result.get("cached"):
+                        processing_notes.append("Identical audio was transcribed before; reused cached transcript.")
+                    if result.get("preprocess"):
+                        processing_notes.append(asr_service.describe_preprocess(result["preprocess"]))
                     processing_notes.append(f"Audio transcribed successfully. Language detected: {lang} (confidence: {lang_prob:.2f})")
                     
+                except asr_service.ASRBusyError:
+                    raise
                 except Exception as e:
                     api.abort(500, f"Audio transcription failed: {str(e)}")
             
@@ -2563,8 +3060,9 @@ class ArrernteAudioAnalysis(Resource):
             
             # Step 2: Translate using glossary
             try:
-                g = _Glossary.load_csv(os.path.join(os.path.dirname(__file__), 'Glossary', 'arrernte_audio.csv'))
-                raw_out, decisions = _gloss_translate(g, transcribed_text, direction='arr2en')
+                with metrics.timed("glossary_translate"):
+                    g = _glossary()
+                    raw_out, decisions = _gloss_translate(g, transcribed_text, direction='arr2en')
                 
                 # Process translation results
                 out_tokens = []
@@ -2594,10 +3092,12 @@ class ArrernteAudioAnalysis(Resource):
                 replaced_words = []
             
             # Step 3: Detect medical keywords
-            detected_symptoms = detect_medical_keywords(translated_text)
+            with metrics.timed("symptom_detection"):
+                detected_symptoms = detect_medical_keywords(translated_text)
             
             # Step 4: Generate follow-up questions
-            followup_questions = generate_followup_questions(detected_symptoms)
+            with tracing.span("followup_questions"):
+                followup_questions = generate_followup_questions(detected_symptoms)
             
             # Step 5: Calculate confidence score
             confidence_score = 0.0
@@ -2625,8 +3125,10 @@ class ArrernteAudioAnalysis(Resource):
                 "processing_notes": processing_notes
             }
             
+        except asr_service.ASRBusyError:
+            raise
         except Exception as e:
-            print(f"[ERROR] Arrernte audio analysis failed: {e}")
+            log.error("Arrernte audio analysis failed: %s", e)
             api.abort(500, f"Analysis failed: {str(e)}")
 
 # Simple test endpoint for Swagger UI file upload testing
@@ -2661,12 +3163,49 @@ class TestUpload(Resource):
             return file_info
             
         except Exception as e:
-            print(f"[ERROR] Test upload failed: {e}")
+            log.error("Test upload failed: %s", e)
             api.abort(500, f"Test upload failed: {str(e)}")
 
 # Create tables
 with app.app_context():
     db.create_all()
 
+def _dispose_db_after_fork():
+    """A forked worker must not reuse the parent's pooled DB connections; it opens its own."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=_dispose_db_after_fork)
+
+# ---------------- Warm-up components ----------------
+# Each loads once (the warm-up pool, or the first request that needs it); the
+# warm step is one dummy inference so the first patient doesn't pay for it.
+# Models load through the registry and warm with the hook a swap uses.
+def _register_model_warmup(component, name):
+    if name not in model_registry.registry:
+        return
+    managed = model_registry.registry.model(name)
+    warmup.manager.register(component, lambda: managed.get().value, managed.warm)
+
+_register_model_warmup("whisper", "whisper")
+_register_model_warmup("chatbot.english", "intent.english")
+_register_model_warmup("chatbot.arrernte", "intent.arrernte")
+_register_model_warmup("ml1", "ml1")
+_register_model_warmup("ml2", "ml2")
+warmup.manager.register("glossary", _glossary, lambda g: _gloss_translate(g, WARMUP_TEXT, direction="en2arr"))
+warmup.manager.register("clip_index", _load_clip_index)
+
+if serving.prefork and MODEL_PRELOAD != "lazy":
+    # gunicorn master (serving.py): load before the workers fork so they share the
+    # models; PREFORK_DEFER components load in each worker after the fork
+    warmup.manager.start(defer=serving.PREFORK_DEFER)
+    warmup.manager.wait_all()
+elif MODEL_PRELOAD == "eager":
+    warmup.manager.start()
+    warmup.manager.wait_all()
+elif MODEL_PRELOAD == "background":
+    warmup.manager.start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,903 @@
+"""
+Speech-to-text service for the SwinSACA backend.
+
+Uploads are decoded in memory to 16 kHz mono float32 PCM and passed straight to
+faster-whisper, so transcription needs neither a temp file nor a Flask request.
+Callers can hand in raw bytes, a file-like object or a werkzeug FileStorage.
+
+With ASR_WORKERS > 0 transcription runs in a pool of worker processes, each with
+its own WhisperModel replica (cpu_threads=ASR_CPU_THREADS). Admission is bounded:
+at most ASR_WORKERS + ASR_QUEUE_SIZE jobs are accepted at once and anything beyond
+that raises ASRBusyError, which the API turns into 503 + Retry-After.
+With ASR_WORKERS = 0 (default) the model runs in-process under the same bound.
+
+Long recordings (> ASR_CHUNK_S) are split at quiet frames into slightly
+overlapping chunks that are decoded in parallel across the pool and stitched
+back into one segment list, so latency tracks the longest chunk.
+
+Results are cached by sha256 of the uploaded bytes plus model and decode options
+(ASR_CACHE_SIZE entries, LRU), so a retried upload never reaches Whisper again.
+
+Model size and beam width form a "tier". With ASR_AUTO_TIER=1, start() times the
+bundled reference clip on each tier in ASR_TIERS (most accurate first) and keeps
+the first one whose real-time factor is within ASR_TARGET_RTF. While jobs are
+queueing behind busy workers, new jobs drop to the fallback tier (greedy decode,
+and the smallest configured model when probing). tier_status() reports all of this.
+
+Worker processes are started with ASR_START_METHOD (default "fork"). With "spawn"
+or "forkserver" Python re-imports the main module in every worker, so only use
+those when the entry point is cheap to import.
+"""
+
+import copy
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import cpu_budget
+import log_config
+import memstats
+import metrics
+import tracing
+
+# faster-whisper (ctranslate2, PyAV) is imported on first use, not with this module
+ASR_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+_fw = None
+
+try:
+    from pydub import AudioSegment
+except (ImportError, OSError):
+    AudioSegment = None
+
+log = log_config.get_logger("asr")
+
+SAMPLE_RATE = 16000
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base.en")
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+
+ASR_WORKERS = int(os.environ.get("ASR_WORKERS", "0"))
+ASR_CPU_THREADS = int(os.environ.get("ASR_CPU_THREADS", "0"))  # 0 = split the Whisper budget (cpu_budget.py) across workers
+ASR_QUEUE_SIZE = int(os.environ.get("ASR_QUEUE_SIZE", "4"))
+ASR_RETRY_AFTER = int(os.environ.get("ASR_RETRY_AFTER", "2"))
+ASR_START_METHOD = os.environ.get("ASR_START_METHOD", "fork")
+
+
+class ASRBusyError(Exception):
+    """Raised when the ASR queue is full; carries the Retry-After hint (seconds)."""
+
+    status_code = 503
+
+    def __init__(self, message="Speech recognition is busy, please retry shortly", retry_after=ASR_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _default_cpu_threads(workers: int) -> int:
+    if ASR_CPU_THREADS > 0:
+        return ASR_CPU_THREADS
+    return cpu_budget.whisper_threads(workers)
+
+
+def _faster_whisper():
+    """The faster_whisper module, or None (then ASR_AVAILABLE is cleared)."""
+    global _fw, ASR_AVAILABLE
+    if _fw is None and ASR_AVAILABLE:
+        try:
+            import faster_whisper.audio
+            _fw = faster_whisper
+        except (ImportError, OSError) as e:
+            log.error("faster-whisper is installed but failed to import: %s", e)
+            ASR_AVAILABLE = False
+    return _fw
+
+
+def _load_whisper(model_name=WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE, cpu_threads=0):
+    return _faster_whisper().WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+# ---------------- Tiers (model size x beam width) ----------------
+class Tier(namedtuple("Tier", "model beam_size")):
+    @property
+    def name(self):
+        return f"{self.model}/beam{self.beam_size}"
+
+
+def parse_tiers(spec: str):
+    """"small.en:5,base.en:1" -> [Tier("small.en", 5), Tier("base.en", 1)] (beam defaults to 5)."""
+    tiers = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        model, _, beam = part.partition(":")
+        tiers.append(Tier(model.strip(), int(beam or 5)))
+    return tiers
+
+
+ASR_AUTO_TIER = os.environ.get("ASR_AUTO_TIER", "0").lower() in ("1", "true", "yes")
+ASR_TIERS = parse_tiers(os.environ.get("ASR_TIERS", "small.en:5,base.en:5,base.en:1,tiny.en:1"))
+ASR_TARGET_RTF = float(os.environ.get("ASR_TARGET_RTF", "0.5"))  # seconds of compute per second of audio
+ASR_PROBE_CLIP = os.environ.get(
+    "ASR_PROBE_CLIP", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "asr_reference.wav"))
+ASR_DEGRADE_QUEUE = int(os.environ.get("ASR_DEGRADE_QUEUE", "1"))  # queued jobs that trigger the fallback tier
+
+_active_tier = Tier(WHISPER_MODEL, 5)
+_fallback_tier = Tier(WHISPER_MODEL, 1)
+_probe_results = []
+
+
+def tier_models():
+    """Model names every backend replica must hold (active first)."""
+    names = [_active_tier.model]
+    if _fallback_tier is not None and _fallback_tier.model not in names:
+        names.append(_fallback_tier.model)
+    return names
+
+
+_models = {}
+_model_lock = threading.Lock()
+
+
+def get_model(model_name=None):
+    """Load an in-process Whisper model once (thread-safe). Returns None if faster-whisper is missing."""
+    name = model_name or _active_tier.model
+    model = _models.get(name)
+    if model is not None or not ASR_AVAILABLE:
+        return model
+    with _model_lock:
+        if name not in _models:
+            _models[name] = _load_whisper(name, cpu_threads=_default_cpu_threads(1))
+    return _models[name]
+
+
+# ---------------- Worker-process side ----------------
+def _worker_init(model_names, compute_type, cpu_threads):
+    for name in model_names:
+        _models[name] = _load_whisper(name, compute_type, cpu_threads)
+
+
+def _worker_transcribe(samples, language, beam_size, model_name):
+    return _run_whisper(_models[model_name], samples, language, beam_size)
+
+
+class ASRPool:
+    """Worker processes with one WhisperModel replica each, fed through a bounded admission gate."""
+
+    def __init__(self, workers, cpu_threads=None, queue_size=ASR_QUEUE_SIZE,
+                 model_names=None, compute_type=WHISPER_COMPUTE_TYPE, start_method=ASR_START_METHOD, tiers=None):
+        self.workers = max(1, int(workers))
+        self.tiers = tiers or (_active_tier, _fallback_tier)
+        self.cpu_threads = cpu_threads or _default_cpu_threads(self.workers)
+        self.queue_size = max(0, int(queue_size))
+        self.capacity = self.workers + self.queue_size
+        self.model_names = list(model_names or [WHISPER_MODEL])
+        self.compute_type = compute_type
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.degraded = 0  # jobs current_tier() sent to the fallback tier
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context(self.start_method if self.start_method in methods else None)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=ctx,
+                    initializer=_worker_init,
+                    initargs=(self.model_names, self.compute_type, self.cpu_threads),
+                )
+            return self._executor
+
+    def start(self):
+        """Spin the workers up now (each loads its model replica) instead of on first use."""
+        ex = self._get_executor()
+        for f in [ex.submit(int, 0) for _ in range(self.workers)]:
+            f.result()
+        return self
+
+    def _release(self, _fut=None):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, samples, language=None, beam_size=5, block=False, model_name=None):
+        """Queue a job; raises ASRBusyError instead of waiting when the queue is full (unless block)."""
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self.rejected += 1
+            raise ASRBusyError()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            fut = self._get_executor().submit(_worker_transcribe, samples, language, beam_size,
+                                              model_name or self.model_names[0])
+        except Exception:
+            self._release()
+            raise
+        fut.add_done_callback(self._release)
+        return fut
+
+    def transcribe_pcm(self, samples, language=None, beam_size=5, timeout=None, model_name=None):
+        try:
+            return self.submit(samples, language, beam_size, model_name=model_name).result(timeout=timeout)
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM); rebuild the pool on the next request
+            with self._lock:
+                self._executor = None
+            raise ASRBusyError("Speech recognition workers restarting, please retry")
+
+    def transcribe_many(self, chunks, language=None, beam_size=5, timeout=None, model_name=None):
+        """
+        Fan chunks out across the workers and return their results in order.
+        Only the first chunk goes through admission (ASRBusyError if full); the rest
+        wait for a slot, which this call's own finished chunks are guaranteed to free.
+        """
+        futures = []
+        try:
+            futures.append(self.submit(chunks[0], language, beam_size, model_name=model_name))
+            for chunk in chunks[1:]:
+                futures.append(self.submit(chunk, language, beam_size, block=True, model_name=model_name))
+            return [f.result(timeout=timeout) for f in futures]
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise ASRBusyError("Speech recognition workers restarting, please retry")
+        finally:
+            for f in futures:
+                f.cancel()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "process_pool",
+                "workers": self.workers,
+                "cpu_threads": self.cpu_threads,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "degraded": self.degraded,
+            }
+
+    def shutdown(self, drain=False):
+        """Stop the workers; with drain, jobs already admitted finish first (this call then blocks)."""
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=drain, cancel_futures=not drain)
+
+    def _after_fork(self):
+        """In a forked child the parent's worker processes aren't ours; start our own on first use."""
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor = None
+        self.in_flight = 0
+
+
+class _InlineGate:
+    """Same admission bound for the in-process model, so Flask threads can't pile up unbounded."""
+
+    workers = 1
+
+    def __init__(self, capacity, tiers=None, models=None):
+        self.capacity = capacity
+        self.tiers = tiers or (_active_tier, _fallback_tier)
+        self.models = models  # its own loaded models (a swapped-in backend), else the shared ones
+        self._slots = threading.BoundedSemaphore(capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.degraded = 0  # jobs current_tier() sent to the fallback tier
+
+    def transcribe_pcm(self, samples, language=None, beam_size=5, timeout=None, model_name=None):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ASRBusyError()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            model = self.models[model_name] if self.models else get_model(model_name)
+            return _run_whisper(model, samples, language, beam_size)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "in_process",
+                "workers": 1,
+                "cpu_threads": _default_cpu_threads(1),
+                "queue_size": self.capacity - 1,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "degraded": self.degraded,
+            }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process pool when ASR_WORKERS > 0, otherwise the bounded in-process runner."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if ASR_WORKERS > 0:
+                    _backend = ASRPool(ASR_WORKERS, model_names=tier_models())
+                else:
+                    _backend = _InlineGate(1 + ASR_QUEUE_SIZE)
+    return _backend
+
+
+def start():
+    """
+    Bring ASR up at startup: pick the tier (ASR_AUTO_TIER), then load the
+    in-process models or start the worker replicas.
+    """
+    if _faster_whisper() is None:
+        return None
+    if ASR_AUTO_TIER and _backend is None:
+        select_tier_by_probe()
+    backend = get_backend()
+    if isinstance(backend, ASRPool):
+        backend.start()
+    else:
+        for name in tier_models():
+            get_model(name)
+    return backend
+
+
+def warm_up(clip_path=None, backend=None):
+    """One short greedy decode per replica (the first second of the reference clip), so lazy init isn't paid by a patient."""
+    path = clip_path or ASR_PROBE_CLIP
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            samples = decode_audio(f.read())[:SAMPLE_RATE]
+    else:
+        samples = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    backend = backend or get_backend()
+    tier, _ = current_tier(backend)
+    if isinstance(backend, ASRPool):
+        return backend.transcribe_many([samples] * backend.workers, language="en", beam_size=1, model_name=tier.model)
+    return backend.transcribe_pcm(samples, language="en", beam_size=1, model_name=tier.model)
+
+
+def build_backend(model_name):
+    """
+    A started backend (not yet live) whose replicas hold model_name, for a hot
+    swap: the active tier keeps its beam size, the fallback is the same model greedy.
+    """
+    if _faster_whisper() is None:
+        raise RuntimeError("faster-whisper is not installed")
+    tiers = (Tier(model_name, _active_tier.beam_size), Tier(model_name, 1))
+    if ASR_WORKERS > 0:
+        return ASRPool(ASR_WORKERS, model_names=[model_name], tiers=tiers).start()
+    return _InlineGate(1 + ASR_QUEUE_SIZE, tiers=tiers,
+                       models={model_name: _load_whisper(model_name, cpu_threads=_default_cpu_threads(1))})
+
+
+def install_backend(backend):
+    """Make backend (a build_backend() result, on a swap) the live one. Jobs already admitted finish on the old one."""
+    global _backend
+    with _backend_lock:
+        for name, model in (getattr(backend, "models", None) or {}).items():
+            _models[name] = model
+        set_tiers(*backend.tiers)
+        _backend = backend
+
+
+def retire_backend(backend):
+    """Release a backend that is no longer live: drain a pool's workers, drop unused in-process models."""
+    def _retire():
+        if isinstance(backend, ASRPool):
+            backend.shutdown(drain=True)
+            return
+        while backend.in_flight:
+            time.sleep(0.1)
+        with _backend_lock:
+            for name in [n for n in _models if n not in tier_models()]:
+                del _models[name]
+    threading.Thread(target=_retire, name="asr-retire", daemon=True).start()
+
+
+def _after_fork():
+    global _model_lock, _backend_lock
+    _model_lock = threading.Lock()
+    _backend_lock = threading.Lock()
+    if isinstance(_backend, ASRPool):
+        _backend._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def is_available() -> bool:
+    return ASR_AVAILABLE and (ASR_WORKERS > 0 or _active_tier.model in _models)
+
+
+# ---------------- Tier probe / adaptive selection ----------------
+def probe_tiers(tiers=None, clip_path=None, target_rtf=None):
+    """
+    Time the reference clip on each tier, most accurate first, with the thread
+    count a real replica would get. Stops at the first tier within target_rtf.
+    Returns (chosen_tier_or_None, [per-tier result dicts]).
+    """
+    tiers = list(tiers or ASR_TIERS)
+    clip_path = clip_path or ASR_PROBE_CLIP
+    target_rtf = ASR_TARGET_RTF if target_rtf is None else target_rtf
+    with open(clip_path, "rb") as f:
+        samples = decode_audio(f.read())
+    duration = len(samples) / float(SAMPLE_RATE)
+    if duration <= 0:
+        raise ValueError(f"Reference clip {clip_path} is empty")
+    cpu_threads = _default_cpu_threads(max(1, ASR_WORKERS))
+    loaded = {}
+    results = []
+    for tier in tiers:
+        try:
+            if tier.model not in loaded:
+                loaded[tier.model] = _load_whisper(tier.model, cpu_threads=cpu_threads)
+                _run_whisper(loaded[tier.model], samples[:SAMPLE_RATE], "en", 1)  # warm-up
+            t0 = time.perf_counter()
+            _run_whisper(loaded[tier.model], samples, None, tier.beam_size)
+            rtf = (time.perf_counter() - t0) / duration
+        except Exception as e:
+            results.append({"tier": tier.name, "error": str(e)})
+            continue
+        ok = rtf <= target_rtf
+        results.append({"tier": tier.name, "rtf": round(rtf, 3), "meets_target": ok})
+        log.info("ASR probe %s: RTF %.2f (target %s)", tier.name, rtf, target_rtf)
+        if ok:
+            return tier, results
+    return None, results
+
+
+def set_tiers(active, fallback=None):
+    """Switch tiers; only valid before the backend is built (workers preload the tier models) or by install_backend()."""
+    global _active_tier, _fallback_tier
+    _active_tier = active
+    _fallback_tier = fallback if fallback is not None and fallback != active else None
+
+
+def select_tier_by_probe():
+    """Probe ASR_TIERS and adopt the winner; the last configured tier becomes the fallback."""
+    global _probe_results
+    chosen, _probe_results = probe_tiers()
+    if chosen is None:
+        # nothing meets the target: run the fastest tier that worked at all
+        timed = [r for r in _probe_results if "rtf" in r]
+        if not timed:
+            log.warning("ASR tier probe failed for every tier, keeping WHISPER_MODEL")
+            return _active_tier
+        fastest = min(timed, key=lambda r: r["rtf"])["tier"]
+        chosen = next(t for t in ASR_TIERS if t.name == fastest)
+    fallback = ASR_TIERS[-1] if ASR_TIERS else Tier(chosen.model, 1)
+    if fallback.model != chosen.model and not any(
+            r["tier"] == fallback.name and "rtf" in r for r in _probe_results) and fallback.model not in _models:
+        # fallback model was never probed (we stopped early); make sure it at least loads
+        try:
+            _load_whisper(fallback.model, cpu_threads=1)
+        except Exception as e:
+            log.warning("ASR fallback tier %s unavailable: %s", fallback.name, e)
+            fallback = Tier(chosen.model, 1)
+    set_tiers(chosen, fallback)
+    log.info("ASR tier selected: %s (fallback %s)", chosen.name, _fallback_tier.name if _fallback_tier else 'none')
+    return chosen
+
+
+def current_tier(backend):
+    """The tier for the next job on backend: its fallback while jobs are waiting behind busy workers."""
+    active, fallback = backend.tiers
+    if fallback is not None:
+        with backend._lock:
+            if backend.in_flight - backend.workers >= ASR_DEGRADE_QUEUE:
+                backend.degraded += 1
+                return fallback, True
+    return active, False
+
+
+def tier_status() -> dict:
+    return {
+        "auto": ASR_AUTO_TIER,
+        "active": _active_tier.name,
+        "fallback": _fallback_tier.name if _fallback_tier else None,
+        "target_rtf": ASR_TARGET_RTF,
+        "degrade_queue": ASR_DEGRADE_QUEUE,
+        "degraded_jobs": _backend.degraded if _backend is not None else 0,
+        "probe": list(_probe_results),
+    }
+
+
+def stats() -> dict:
+    out = dict(get_backend().stats())
+    out["tier"] = _active_tier.name
+    out["cache"] = transcript_cache.stats()
+    return out
+
+
+# ---------------- Transcript cache ----------------
+ASR_CACHE_SIZE = int(os.environ.get("ASR_CACHE_SIZE", "256"))
+
+
+class TranscriptCache:
+    """Thread-safe LRU of transcription results keyed by audio hash + decode options."""
+
+    def __init__(self, maxsize=ASR_CACHE_SIZE):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data: bytes, language, beam_size):
+        digest = hashlib.sha256(data).hexdigest()
+        return (digest, _active_tier.name, WHISPER_COMPUTE_TYPE, language, int(beam_size), ASR_PREPROCESS)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                metrics.cache_lookup("transcript", True)
+                return copy.deepcopy(self._data[key])
+            self.misses += 1
+            metrics.cache_lookup("transcript", False)
+            return None
+
+    def put(self, key, result):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = copy.deepcopy(result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def footprint(self):
+        """stats() plus the cached results, for memstats."""
+        stats = self.stats()
+        with self._lock:
+            return dict(stats, objects=list(self._data.items()))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+transcript_cache = TranscriptCache()
+memstats.register("cache.transcript", "cache", lambda: transcript_cache.footprint())
+# CTranslate2 weights are native memory; only the replicas held in this process are listed
+memstats.register("model.whisper", "model", lambda: {"entries": len(_models), "models": sorted(_models),
+                                                     "native": True})
+
+
+def read_audio_bytes(source) -> bytes:
+    """Return the raw bytes of an upload without consuming it for later readers."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    stream = getattr(source, "stream", source)  # werkzeug FileStorage wraps a stream
+    if not hasattr(stream, "read"):
+        raise TypeError(f"Unsupported audio source: {type(source).__name__}")
+    try:
+        stream.seek(0)
+    except Exception:
+        pass
+    data = stream.read()
+    try:
+        stream.seek(0)
+    except Exception:
+        pass
+    return data
+
+
+def decode_audio(source) -> np.ndarray:
+    """Decode any container Whisper understands (WebM, MP4, WAV, MP3...) to 16 kHz mono float32."""
+    data = read_audio_bytes(source)
+    if not data:
+        return np.zeros(0, dtype=np.float32)
+    fw = _faster_whisper()
+    if fw is not None:
+        return fw.audio.decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE)
+    if AudioSegment is None:
+        raise ImportError("Neither faster-whisper (PyAV) nor pydub is available to decode audio")
+    seg = AudioSegment.from_file(io.BytesIO(data))
+    seg = seg.set_frame_rate(SAMPLE_RATE).set_channels(1).set_sample_width(2)
+    return np.frombuffer(seg.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+# ---------------- Voice activity ----------------
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", "-45"))  # absolute floor (dBFS)
+VAD_MARGIN_DB = float(os.environ.get("VAD_MARGIN_DB", "12"))         # required lift over the noise floor
+
+
+def frame_db(samples: np.ndarray, frame_ms=VAD_FRAME_MS) -> np.ndarray:
+    """Per-frame RMS level in dBFS (a trailing partial frame is dropped)."""
+    n = int(SAMPLE_RATE * frame_ms / 1000)
+    count = len(samples) // n
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[: count * n].reshape(count, n)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def speech_mask(levels_db: np.ndarray, noise_floor_db=None) -> np.ndarray:
+    """Energy VAD: a frame is speech if it clears both the absolute floor and noise floor + margin."""
+    if len(levels_db) == 0:
+        return np.zeros(0, dtype=bool)
+    if noise_floor_db is None:
+        noise_floor_db = float(np.percentile(levels_db, 10))
+        if float(np.percentile(levels_db, 90)) - noise_floor_db < VAD_MARGIN_DB:
+            # no quiet stretch to estimate noise from (speech end to end): absolute floor only
+            return levels_db > VAD_THRESHOLD_DB
+    return levels_db > max(VAD_THRESHOLD_DB, noise_floor_db + VAD_MARGIN_DB)
+
+
+# ---------------- Pre-ASR stage: trim silence + normalize loudness ----------------
+ASR_PREPROCESS = os.environ.get("ASR_PREPROCESS", "1").lower() in ("1", "true", "yes")
+ASR_TARGET_DBFS = float(os.environ.get("ASR_TARGET_DBFS", "-20"))
+ASR_MAX_GAIN_DB = 30.0
+ASR_TRIM_PAD_MS = 200   # kept around speech so word onsets/offsets aren't clipped
+ASR_MAX_GAP_MS = 1000   # inner pauses longer than this are shortened to it
+
+
+def _keep_frames(mask: np.ndarray, pad: int, max_gap: int) -> np.ndarray:
+    """Frames to keep: speech dilated by pad, minus leading/trailing silence and all but max_gap frames of each inner pause."""
+    pos = np.arange(len(mask))
+    speech_before = np.concatenate(([0], np.cumsum(mask)))  # speech frames in [0, i)
+    keep = speech_before[np.minimum(pos + pad + 1, len(mask))] > speech_before[np.maximum(pos - pad, 0)]
+    kept = np.flatnonzero(keep)
+    last_kept = np.maximum.accumulate(np.where(keep, pos, -1))  # most recent kept frame at or before each frame
+    inner = (pos > kept[0]) & (pos < kept[-1])
+    return keep | (inner & (pos - last_kept <= max_gap))
+
+
+def preprocess(samples: np.ndarray):
+    """
+    Keep only the speech: trim leading/trailing silence, shorten long inner pauses,
+    then scale so speech sits at ASR_TARGET_DBFS. Returns (samples, info).
+
+    info["time_map"] lists [output_s, original_s] at the start of every kept
+    stretch, so to_original_time() can map a time in the output back onto the
+    recording.
+    """
+    original = len(samples) / float(SAMPLE_RATE)
+    info = {"original_duration": round(original, 2), "trimmed_duration": round(original, 2),
+            "removed_duration": 0.0, "gain_db": 0.0, "speech_detected": True, "time_map": [[0.0, 0.0]]}
+    levels = frame_db(samples)
+    if len(levels) == 0:
+        return samples, info
+    mask = speech_mask(levels)
+    if not mask.any():
+        info.update(trimmed_duration=0.0, removed_duration=round(original, 2), speech_detected=False)
+        return np.zeros(0, dtype=np.float32), info
+
+    frame = int(SAMPLE_RATE * VAD_FRAME_MS / 1000)
+    keep = _keep_frames(mask, int(ASR_TRIM_PAD_MS / VAD_FRAME_MS), int(ASR_MAX_GAP_MS / VAD_FRAME_MS))
+    idx = np.flatnonzero(keep)
+    out = samples[: len(keep) * frame].reshape(len(keep), frame)[idx].reshape(-1)
+    starts = np.flatnonzero(np.diff(idx, prepend=-2) != 1)  # positions in idx where a kept stretch begins
+    frame_s = VAD_FRAME_MS / 1000.0
+    info["time_map"] = [[round(float(k) * frame_s, 3), round(float(idx[k]) * frame_s, 3)] for k in starts]
+
+    speech = samples[: len(mask) * frame].reshape(len(mask), frame)[mask]
+    rms = float(np.sqrt(np.mean(speech.astype(np.float64) ** 2)))
+    gain_db = 0.0
+    if rms > 0:
+        gain_db = min(ASR_MAX_GAIN_DB, ASR_TARGET_DBFS - 20.0 * np.log10(rms))
+        out = out * (10.0 ** (gain_db / 20.0))
+        peak = float(np.max(np.abs(out))) if len(out) else 0.0
+        if peak > 0.99:
+            out = out * (0.99 / peak)
+    trimmed = len(out) / float(SAMPLE_RATE)
+    info.update(trimmed_duration=round(trimmed, 2), removed_duration=round(original - trimmed, 2),
+                gain_db=round(float(gain_db), 1))
+    return out.astype(np.float32), info
+
+
+def to_original_time(t: float, time_map) -> float:
+    """Map a time in preprocess() output back onto the original recording."""
+    out_s, orig_s = time_map[0]
+    for o, src in time_map[1:]:
+        if o > t:
+            break
+        out_s, orig_s = o, src
+    return orig_s + (t - out_s)
+
+
+def describe_preprocess(info: dict) -> str:
+    """One-line summary for processing_notes."""
+    if not info.get("speech_detected", True):
+        return f"No speech detected in {info['original_duration']:.1f}s of audio; transcription skipped."
+    return (f"Audio preprocessed: {info['original_duration']:.1f}s -> {info['trimmed_duration']:.1f}s of speech "
+            f"({info['removed_duration']:.1f}s silence trimmed), loudness gain {info['gain_db']:+.1f} dB.")
+
+
+def _run_whisper(model, samples, language, beam_size) -> dict:
+    """Run Whisper on already-decoded PCM and collect the (lazy) segment generator."""
+    if model is None:
+        raise RuntimeError("Whisper model not available")
+    kwargs = {"beam_size": beam_size}
+    if language:
+        kwargs["language"] = language
+    segments, info = model.transcribe(samples, **kwargs)
+    segs = [{"start": float(s.start), "end": float(s.end), "text": s.text} for s in segments]
+    if language:
+        lang, lang_prob = language, 1.0
+    else:
+        lang = getattr(info, "language", "auto")
+        lang_prob = float(getattr(info, "language_probability", 0.0) or 0.0)
+    return {
+        "text": " ".join(s["text"].strip() for s in segs).strip(),
+        "segments": segs,
+        "language": lang,
+        "language_probability": lang_prob,
+        "duration": len(samples) / float(SAMPLE_RATE),
+    }
+
+
+# ---------------- Chunked transcription for long recordings ----------------
+ASR_CHUNK_S = float(os.environ.get("ASR_CHUNK_S", "30"))  # Whisper's own window length
+ASR_CHUNK_OVERLAP_S = 1.0
+ASR_CHUNK_SEARCH_S = 5.0  # look this far back from each target boundary for a quiet cut
+
+
+def split_chunks(samples: np.ndarray, chunk_s=ASR_CHUNK_S, overlap_s=ASR_CHUNK_OVERLAP_S):
+    """
+    Cut points at the quietest frame before every chunk_s boundary.
+    Returns [(start, end, own_start, own_end)] in samples: each chunk decodes
+    [start, end) (own range plus overlap each side) but only owns [own_start, own_end).
+    """
+    n = len(samples)
+    target = int(chunk_s * SAMPLE_RATE)
+    frame = int(SAMPLE_RATE * VAD_FRAME_MS / 1000)
+    search = int(ASR_CHUNK_SEARCH_S * SAMPLE_RATE)
+    cuts = [0]
+    while n - cuts[-1] > target * 1.25:
+        hi = cuts[-1] + target
+        lo = max(cuts[-1] + frame, hi - search)
+        levels = frame_db(samples[lo:hi])
+        cuts.append(lo + int(np.argmin(levels)) * frame if len(levels) else hi)
+    cuts.append(n)
+    overlap = int(overlap_s * SAMPLE_RATE)
+    return [(max(0, a - overlap), min(n, b + overlap), a, b) for a, b in zip(cuts, cuts[1:])]
+
+
+def _dedupe_overlap(prev_text: str, text: str, max_words=6) -> str:
+    """Drop words at the start of text that repeat the end of prev_text (overlap echo)."""
+    prev = prev_text.lower().split()
+    words = text.split()
+    for k in range(min(max_words, len(prev), len(words)), 0, -1):
+        if prev[-k:] == [w.lower() for w in words[:k]]:
+            return " ".join(words[k:])
+    return text
+
+
+def stitch_chunks(spans, results, total_samples) -> dict:
+    """Merge per-chunk results into one, keeping each segment only in the chunk that owns its midpoint."""
+    segs = []
+    for (start, _end, own_start, own_end), res in zip(spans, results):
+        offset = start / float(SAMPLE_RATE)
+        lo, hi = own_start / float(SAMPLE_RATE), own_end / float(SAMPLE_RATE)
+        for seg in res["segments"]:
+            s0, s1 = seg["start"] + offset, seg["end"] + offset
+            if not lo <= (s0 + s1) / 2.0 < hi:
+                continue
+            text = seg["text"]
+            if segs:
+                text = _dedupe_overlap(segs[-1]["text"], text)
+                if not text.strip():
+                    continue
+            segs.append({"start": s0, "end": s1, "text": text})
+    best = max(results, key=lambda r: r["language_probability"])
+    return {
+        "text": " ".join(s["text"].strip() for s in segs).strip(),
+        "segments": segs,
+        "language": best["language"],
+        "language_probability": best["language_probability"],
+        "duration": total_samples / float(SAMPLE_RATE),
+        "chunks": len(results),
+    }
+
+
+def transcribe_pcm(samples: np.ndarray, language=None, beam_size=5, model=None) -> dict:
+    """
+    Transcribe decoded PCM through the admission-controlled backend (or an explicit model).
+    Recordings longer than ASR_CHUNK_S are split and decoded in parallel when there
+    is more than one worker to spread them over. The tier caps beam_size.
+    """
+    if model is not None:
+        return _run_whisper(model, samples, language, beam_size)
+    backend = get_backend()
+    tier, degraded = current_tier(backend)
+    beam_size = min(beam_size, tier.beam_size)
+    if isinstance(backend, ASRPool) and backend.workers > 1 and len(samples) > ASR_CHUNK_S * 1.25 * SAMPLE_RATE:
+        spans = split_chunks(samples)
+        results = backend.transcribe_many([samples[a:b] for a, b, _, _ in spans], language=language,
+                                          beam_size=beam_size, model_name=tier.model)
+        result = stitch_chunks(spans, results, len(samples))
+    else:
+        result = backend.transcribe_pcm(samples, language=language, beam_size=beam_size, model_name=tier.model)
+    result["tier"] = Tier(tier.model, beam_size).name
+    result["degraded"] = degraded
+    return result
+
+
+def transcribe(source, language=None, beam_size=5, model=None) -> dict:
+    """
+    Transcribe bytes / file-like audio entirely in memory.
+
+    Audio is decoded once, then (unless ASR_PREPROCESS=0) trimmed to speech and
+    loudness-normalized before Whisper sees it. Identical bytes with the same
+    options are answered from transcript_cache without decoding at all.
+
+    Returns {"text", "segments": [{"start", "end", "text"}], "language",
+             "language_probability", "duration", "preprocess": {...}, "cached": bool}.
+    Segment times are in seconds of the uploaded recording (mapped back through
+    the trim); "duration" is the length of the audio Whisper decoded.
+    """
+    data = read_audio_bytes(source)
+    key = None
+    if model is None and data:
+        key = TranscriptCache.key(data, language, beam_size)
+        hit = transcript_cache.get(key)
+        tracing.annotate(cache="hit" if hit is not None else "miss")
+        if hit is not None:
+            hit["cached"] = True
+            return hit
+
+    with tracing.span("asr.decode"):
+        samples = decode_audio(data)
+    prep = None
+    if ASR_PREPROCESS:
+        with tracing.span("asr.preprocess"):
+            samples, prep = preprocess(samples)
+    if prep is not None and not prep["speech_detected"]:
+        result = {"text": "", "segments": [], "language": language or "unknown",
+                  "language_probability": 0.0, "duration": 0.0}
+    else:
+        with tracing.span("asr.whisper") as span:
+            result = transcribe_pcm(samples, language=language, beam_size=beam_size, model=model)
+            if span is not None:
+                span.attrs.update(tier=result.get("tier"), chunks=result.get("chunks"))
+        if prep is not None:
+            for seg in result["segments"]:
+                seg["start"] = to_original_time(seg["start"], prep["time_map"])
+                seg["end"] = to_original_time(seg["end"], prep["time_map"])
+    result["preprocess"] = prep
+    result["cached"] = False
+    if key is not None and not result.get("degraded"):
+        transcript_cache.put(key, result)
+    return result
@@ -0,0 +1,16 @@
+"""
+Benchmarks for the chat backend.
+
+  python -m benchmarks run --out results.json      # all benchmarks
+  python -m benchmarks run --filter glossary       # names containing "glossary"
+  python -m benchmarks run --group micro --quick
+  python -m benchmarks compare base.json results.json
+  python -m benchmarks load --users 8 --duration 60  # concurrent conversations (load.py)
+  python -m benchmarks startup --budget-s 3          # cold start; exits 1 over budget (startup.py)
+
+Run from "Backend & NLP". micro.py times single functions (classifiers,
+glossary, keyword detection, ML1/ML2/fusion). macro.py times full scripted
+conversations through /api/chat/. Results are JSON, with the git commit and
+library versions, so runs from different commits can be compared. Random
+seeds are fixed before each benchmark.
+"""
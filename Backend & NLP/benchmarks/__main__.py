@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Benchmark the code, not the debug logging (set LOG_LEVEL to override)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from . import harness  # noqa: E402
+
+
+def _fmt_s(value):
+    if value is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e3), ("us", 1e6)):
+        if value * scale >= 1.0:
+            return f"{value * scale:.2f}{unit}"
+    return f"{value * 1e9:.0f}ns"
+
+
+def cmd_run(args):
+    from . import micro, macro  # noqa: F401  (registers benchmarks)
+
+    entries = [e for e in harness.registered(args.filter) if not args.group or e["group"] == args.group]
+    if not entries:
+        print("No benchmarks match", file=sys.stderr)
+        return 2
+    repeat = 5 if args.quick else args.repeat
+    config = {"repeat": repeat, "warmup": args.warmup, "min_sample_s": args.min_sample_s,
+              "filter": args.filter, "group": args.group, "seed": harness.SEED}
+    results = []
+    for entry in entries:
+        result = harness.run_one(entry, repeat, args.warmup, args.min_sample_s)
+        results.append(result)
+        if result["status"] == "ok":
+            print(f"{result['name']:<48} median {_fmt_s(result['median']):>9}  p95 {_fmt_s(result['p95']):>9}"
+                  f"  (n={result['n']}x{result['loops']})", file=sys.stderr)
+        else:
+            print(f"{result['name']:<48} {result['status']}: {result['reason']}", file=sys.stderr)
+    report = harness.report(results, config)
+    text = json.dumps(report, indent=1, sort_keys=True, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+def cmd_compare(args):
+    base, new = harness.load(args.base), harness.load(args.new)
+    rows = harness.compare(base, new, threshold=args.threshold, stat=args.stat)
+    print(f"base {base['git'].get('commit') or '?'}  ->  new {new['git'].get('commit') or '?'}  ({args.stat})")
+    regressions = 0
+    for name, b, n, ratio, verdict in rows:
+        ratio_s = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<48} {_fmt_s(b):>9} {_fmt_s(n):>9} {ratio_s:>7}  {verdict}")
+        regressions += verdict == "slower"
+    return 1 if regressions else 0
+
+
+def cmd_load(args):
+    from . import load
+
+    out = load.run(args)
+    load.print_summary(out["load"])
+    text = json.dumps(out, indent=1, sort_keys=True, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def cmd_startup(args):
+    from . import startup
+
+    out = startup.run(args)
+    startup.print_summary(out)
+    text = json.dumps(out, indent=1, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if out["within_budget"] else 1
+
+
+def cmd_threads(args):
+    from . import threads
+
+    out = threads.run(args)
+    threads.print_summary(out)
+    text = json.dumps(out, indent=1, sort_keys=True, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run benchmarks and emit JSON")
+    run.add_argument("--filter", help="only benchmarks whose name contains this")
+    run.add_argument("--group", choices=["micro", "macro"])
+    run.add_argument("--repeat", type=int, default=20, help="samples per benchmark (macro: 5)")
+    run.add_argument("--warmup", type=int, default=2)
+    run.add_argument("--min-sample-s", type=float, default=0.005,
+                     help="batch fast calls until one sample takes this long (micro only)")
+    run.add_argument("--quick", action="store_true", help="5 samples per benchmark")
+    run.add_argument("--out", help="write JSON here instead of stdout")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="compare two result files; exits 1 on regressions")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=0.10, help="relative change to flag (default 0.10)")
+    cmp_.add_argument("--stat", default="median", choices=["min", "median", "mean", "p95"])
+    cmp_.set_defaults(func=cmd_compare)
+
+    ld = sub.add_parser("load", help="concurrent synthetic conversations; latency percentiles")
+    ld.add_argument("--target", default="inprocess", help='"inprocess" (test client) or a base URL')
+    ld.add_argument("--users", type=int, default=4, help="closed loop: concurrent patients (default 4)")
+    ld.add_argument("--rate", type=float, help="open loop: new conversations per second (Poisson)")
+    ld.add_argument("--max-concurrency", type=int, default=32, help="open loop: cap on active conversations")
+    ld.add_argument("--duration", type=float, help="seconds to generate load (default 30)")
+    ld.add_argument("--conversations", type=int, help="stop after this many conversations")
+    ld.add_argument("--mix", default="english=0.5,arrernte=0.3,text_en=0.2",
+                    help="profile weights: english, arrernte, text_en")
+    ld.add_argument("--voice-fraction", type=float, default=0.0, help="share of English patients that speak")
+    ld.add_argument("--images-fraction", type=float, default=0.2,
+                    help="share of English text patients that finish with an images-mode turn")
+    ld.add_argument("--think", type=float, default=0.0, help="mean patient think time between turns (s)")
+    ld.add_argument("--seed", type=int, default=harness.SEED)
+    ld.add_argument("--save", help="write generated text conversations here (JSON lines)")
+    ld.add_argument("--replay", help="resend conversations from a --save file instead of generating")
+    ld.add_argument("--loops", type=int, default=1, help="times to replay the file")
+    ld.add_argument("--out", help="write the JSON report here instead of stdout")
+    ld.set_defaults(func=cmd_load)
+
+    st = sub.add_parser("startup", help="cold-start time of app.py and per-package import cost; "
+                                       "exits 1 over budget")
+    st.add_argument("--repeat", type=int, default=3, help="fresh processes to time (median is checked)")
+    st.add_argument("--budget-s", type=float, help="max seconds until /health answers (default STARTUP_BUDGET_S or 3.0)")
+    st.add_argument("--top", type=int, default=20, help="packages / imports to list")
+    st.add_argument("--out", help="write the JSON report here instead of stdout")
+    st.set_defaults(func=cmd_startup)
+
+    th = sub.add_parser("threads", help="search the per-subsystem CPU thread budget (CPU_THREADS) for this machine")
+    th.add_argument("--only", help="comma-separated subsystems (torch, whisper, xgboost, blas; default all)")
+    th.add_argument("--cores", type=int, help="largest thread count to try (default: the cores this process may use)")
+    th.add_argument("--seconds", type=float, default=2.0, help="time per measurement (default 2)")
+    th.add_argument("--min-gain", type=float, default=0.03,
+                    help="relative slowdown improvement needed to change a subsystem's count (default 0.03)")
+    th.add_argument("--out", help="write the JSON report here instead of stdout")
+    th.set_defaults(func=cmd_threads)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Timing, registry and result format shared by the micro and macro benchmarks.
+
+A benchmark is a function registered with @benchmark(name, group). It is
+called once to set up and returns the zero-argument callable to time (plus
+optional metadata). It can raise Skip when an artifact or service it needs is
+missing. Fast callables are run in batches so that each sample lasts at least
+`min_sample_s`; results are reported per call.
+"""
+
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+SCHEMA = 1
+SEED = 1234
+
+_REGISTRY = []
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it cannot run in this environment."""
+
+
+def benchmark(name, group="micro", **meta):
+    def register(fn):
+        _REGISTRY.append({"name": f"{group}.{name}", "group": group, "setup": fn, "meta": meta})
+        return fn
+    return register
+
+
+def registered(pattern=None):
+    return [b for b in _REGISTRY if not pattern or pattern in b["name"]]
+
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    try:
+        import numpy as np
+        np.random.seed(seed)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except (ImportError, OSError):
+        pass
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def summarize(samples) -> dict:
+    """Stats over per-call durations in seconds."""
+    values = sorted(samples)
+    mean = statistics.fmean(values)
+    return {
+        "n": len(values),
+        "min": values[0],
+        "median": statistics.median(values),
+        "mean": mean,
+        "p95": percentile(values, 0.95),
+        "max": values[-1],
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "ops_per_s": (1.0 / mean) if mean > 0 else None,
+    }
+
+
+def _calibrate(fn, min_sample_s):
+    """Calls per sample so that one sample takes at least min_sample_s."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample_s or loops >= 1_000_000:
+            return loops
+        loops *= 10 if elapsed < min_sample_s / 10 else 2
+
+
+def measure(fn, repeat=20, warmup=2, min_sample_s=0.005, batch=True) -> dict:
+    for _ in range(warmup):
+        fn()
+    loops = _calibrate(fn, min_sample_s) if batch else 1
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    out = summarize(samples)
+    out["loops"] = loops
+    return out
+
+
+def run_one(entry, repeat, warmup, min_sample_s) -> dict:
+    result = {"name": entry["name"], "group": entry["group"], "unit": "s"}
+    seed_everything()
+    try:
+        setup = entry["setup"]()
+    except Skip as e:
+        return dict(result, status="skipped", reason=str(e))
+    except Exception as e:
+        return dict(result, status="error", reason=f"setup failed: {e}")
+    fn, extra = setup if isinstance(setup, tuple) else (setup, None)
+    batch = entry["meta"].get("batch", entry["group"] == "micro")
+    try:
+        stats = measure(fn, repeat=entry["meta"].get("repeat", repeat), warmup=warmup,
+                        min_sample_s=min_sample_s, batch=batch)
+    except Skip as e:
+        return dict(result, status="skipped", reason=str(e))
+    except Exception as e:
+        return dict(result, status="error", reason=str(e))
+    result.update(status="ok", **stats)
+    if extra:
+        result["extra"] = extra() if callable(extra) else extra
+    return result
+
+
+def _git(*args):
+    try:
+        out = subprocess.run(["git", *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() if out.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _versions():
+    versions = {}
+    for mod in ("numpy", "torch", "sklearn", "xgboost", "faster_whisper", "flask"):
+        m = sys.modules.get(mod)
+        if m is not None:
+            versions[mod] = getattr(m, "__version__", None)
+    return versions
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "versions": _versions(),
+    }
+
+
+def report(results, config) -> dict:
+    return {
+        "schema": SCHEMA,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": {"commit": _git("rev-parse", "HEAD"), "dirty": bool(_git("status", "--porcelain", "--", "."))},
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+
+
+def load(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("schema") != SCHEMA:
+        raise ValueError(f"{path}: unsupported benchmark schema {data.get('schema')}")
+    return data
+
+
+def compare(base, new, threshold=0.10, stat="median"):
+    """
+    Rows of (name, base, new, ratio, verdict) for benchmarks present in both
+    reports. verdict is "slower"/"faster" when the change exceeds threshold.
+    """
+    base_by_name = {r["name"]: r for r in base["results"] if r.get("status") == "ok"}
+    rows = []
+    for r in new["results"]:
+        b = base_by_name.get(r["name"])
+        if r.get("status") != "ok" or b is None:
+            rows.append((r["name"], b.get(stat) if b else None, r.get(stat), None, r.get("status") if b else "new"))
+            continue
+        ratio = r[stat] / b[stat] if b[stat] else None
+        verdict = ""
+        if ratio is not None and ratio > 1 + threshold:
+            verdict = "slower"
+        elif ratio is not None and ratio < 1 - threshold:
+            verdict = "faster"
+        rows.append((r["name"], b[stat], r[stat], ratio, verdict))
+    return rows
@@ -0,0 +1,446 @@
+"""
+Load generator: concurrent synthetic patient conversations against /api/chat/.
+
+  python -m benchmarks load --users 8 --duration 60                  # closed loop, in process
+  python -m benchmarks load --rate 0.5 --duration 120 --target http://localhost:5000
+  python -m benchmarks load --conversations 20 --save convos.jsonl   # record what was sent
+  python -m benchmarks load --replay convos.jsonl --users 4          # resend it exactly
+
+Patients are generated, not scripted. Each one opens with a symptom pattern
+from Chatbot/intents.json and then answers whatever the bot asks. Severity,
+duration, location and yes/no questions are recognised from the flow prompts,
+and the answer is one of the options the prompt offers. Arrernte patients
+send their answers through the glossary (en2arr) in "text" mode; "text_en"
+patients write English with the Arrernte context. With --voice-fraction,
+some English patients speak each turn instead, using the ASR reference
+clip. Generated conversations can be saved and replayed turn for turn.
+
+Arrivals are closed loop (--users patients, each starting a new
+conversation when the last one ends) or open loop (--rate new
+conversations per second, Poisson, capped at --max-concurrency). The report
+gives throughput and p50/p95/p99 latency per endpoint and per turn type.
+
+The chatbots keep one process-global dialog state, so concurrent
+conversations against one worker interleave their flows. The latencies are
+representative, but individual transcripts are not.
+"""
+
+import io
+import json
+import os
+import queue
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+
+from .harness import percentile, report as _report
+from .macro import VOICE_CLIP, _padded_clip
+from .micro import BASE_DIR, GLOSSARY_CSV, app_module
+
+MAX_TURNS = 12
+
+TURN_TYPES = ("opener", "answer", "images", "voice")
+
+_SEVERITY_RE = re.compile(r"scale of 1 to 10|severity 1", re.I)
+_DURATION_RE = re.compile(r"how long|when did|for how long", re.I)
+_TEMPERATURE_RE = re.compile(r"temperature", re.I)
+_OPTIONS_EG_RE = re.compile(r"\(e\.g\.,?\s*([^)]*)\)")
+_OPTIONS_DASH_RE = re.compile(r"[—:]\s*([^?]*)\?")
+
+DURATIONS = ["since yesterday", "2 days", "3 days", "a week", "since this morning", "6 hours"]
+LOCATIONS = ["front", "back", "left side", "lower", "upper", "chest", "arms"]
+
+
+def _options(prompt):
+    m = _OPTIONS_EG_RE.search(prompt) or _OPTIONS_DASH_RE.search(prompt)
+    if not m:
+        return []
+    parts = re.split(r",\s*|\s+or\s+|/", m.group(1))
+    return [p.strip(" .") for p in parts if p.strip(" .") and len(p.strip()) < 30]
+
+
+class PatientGenerator:
+    """English patient utterances: symptom openers plus answers to the bot's prompts."""
+
+    _openers = None
+
+    def __init__(self, rng):
+        self.rng = rng
+        if PatientGenerator._openers is None:
+            with open(os.path.join(BASE_DIR, "Chatbot", "intents.json"), "r", encoding="utf-8") as f:
+                doc = json.load(f)
+            PatientGenerator._openers = [
+                p for it in doc["intents"] if str(it.get("intent", it.get("tag", ""))).startswith("Symptom_")
+                for p in it.get("text", it.get("patterns", []))]
+
+    def opener(self):
+        return self.rng.choice(self._openers)
+
+    def answer(self, prompt):
+        rng = self.rng
+        if _SEVERITY_RE.search(prompt):
+            return str(rng.randint(2, 9))
+        if _TEMPERATURE_RE.search(prompt):
+            return rng.choice(["38.5 C", "39 C", "101 F", "not sure"])
+        if _DURATION_RE.search(prompt):
+            return rng.choice(DURATIONS)
+        options = _options(prompt)
+        if "where" in prompt.lower():
+            return rng.choice(options or LOCATIONS)
+        if options:
+            return rng.choice(options + ["no"])
+        return rng.choice(["no", "yes", "not really", "I don't know"])
+
+
+class Glossary:
+    """en2arr translation of patient answers for Arrernte text mode."""
+
+    def __init__(self):
+        from Glossary.glossary_translator import Glossary as G, translate
+        self._g = G.load_csv(GLOSSARY_CSV)
+        self._translate = translate
+
+    def __call__(self, text):
+        out, _decisions = self._translate(self._g, text, direction="en2arr")
+        return out or text
+
+
+# ---------------- Targets ----------------
+class InProcessTarget:
+    """Flask test client, one per worker thread."""
+
+    def __init__(self):
+        self.app = app_module()
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.app.test_client()
+        return self._local.client
+
+    def post_json(self, path, body):
+        resp = self._client().post(path, json=body)
+        return resp.status_code, resp.get_json(silent=True)
+
+    def post_voice(self, path, audio, lang):
+        resp = self._client().post(path, data={"audio": (io.BytesIO(audio), "turn.wav"), "language": lang,
+                                               "mode": "voice"}, content_type="multipart/form-data")
+        return resp.status_code, resp.get_json(silent=True)
+
+
+class HttpTarget:
+    def __init__(self, base_url, timeout=120):
+        import requests
+        self.base = base_url.rstrip("/")
+        self.timeout = timeout
+        self._requests = requests
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = self._requests.Session()
+        return self._local.session
+
+    def _call(self, fn):
+        try:
+            resp = fn()
+        except self._requests.RequestException:
+            return None, None
+        try:
+            return resp.status_code, resp.json()
+        except ValueError:
+            return resp.status_code, None
+
+    def post_json(self, path, body):
+        return self._call(lambda: self._session().post(self.base + path, json=body, timeout=self.timeout))
+
+    def post_voice(self, path, audio, lang):
+        return self._call(lambda: self._session().post(
+            self.base + path, files={"audio": ("turn.wav", audio, "audio/wav")},
+            data={"language": lang, "mode": "voice"}, timeout=self.timeout))
+
+
+# ---------------- Conversations ----------------
+PROFILES = {
+    "english": {"language": "english", "mode": "text"},
+    "arrernte": {"language": "arrernte", "mode": "text"},
+    "text_en": {"language": "arrernte", "mode": "text_en"},
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []  # (endpoint, turn_type, status, seconds)
+        self.conversations = 0
+        self.transcripts = []
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, turn_type, status, seconds):
+        with self._lock:
+            self.samples.append((endpoint, turn_type, status, seconds))
+
+    def finished(self, transcript):
+        with self._lock:
+            self.conversations += 1
+            self.transcripts.append(transcript)
+
+
+class ConversationRunner:
+    def __init__(self, target, recorder, seed, mix, voice_fraction, think_s, images_fraction):
+        self.target = target
+        self.recorder = recorder
+        self.seed = seed
+        self.mix = mix
+        self.voice_fraction = voice_fraction
+        self.think_s = think_s
+        self.images_fraction = images_fraction
+        self._translate = None
+        self._clip = None
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def _next_rng(self):
+        with self._lock:
+            self._count += 1
+            return random.Random(self.seed * 100003 + self._count)
+
+    def _translator(self):
+        with self._lock:
+            if self._translate is None:
+                self._translate = Glossary()
+            return self._translate
+
+    def _voice_clip(self, n):
+        with self._lock:
+            if self._clip is None:
+                with open(VOICE_CLIP, "rb") as f:
+                    self._clip = f.read()
+            return _padded_clip(self._clip, 160 * n)
+
+    def _send(self, turn_type, body=None, voice_lang=None, counter=0):
+        start = time.perf_counter()
+        if voice_lang:
+            status, data = self.target.post_voice("/api/chat/", self._voice_clip(counter), voice_lang)
+        else:
+            status, data = self.target.post_json("/api/chat/", body)
+        elapsed = time.perf_counter() - start
+        self.recorder.add("POST /api/chat/", turn_type, status, elapsed)
+        return status, data or {}
+
+    def _think(self, rng):
+        if self.think_s > 0:
+            time.sleep(rng.expovariate(1.0 / self.think_s))
+
+    def generated(self):
+        rng = self._next_rng()
+        profile = rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        context = PROFILES[profile]
+        voice = profile == "english" and rng.random() < self.voice_fraction
+        patient = PatientGenerator(rng)
+        transcript = {"profile": profile, "voice": voice, "turns": []}
+
+        message = patient.opener()
+        for turn in range(MAX_TURNS):
+            turn_type = "opener" if turn == 0 else "answer"
+            if voice:
+                status, data = self._send("voice", voice_lang="english", counter=rng.randrange(1, 4000))
+            else:
+                text = self._translator()(message) if profile == "arrernte" else message
+                body = {"message": text, "_context": context}
+                if turn == 0:
+                    body["reset"] = True
+                transcript["turns"].append(body)
+                status, data = self._send(turn_type, body)
+            if status != 200 or data.get("is_final_message"):
+                break
+            self._think(rng)
+            message = patient.answer(data.get("reply") or "")
+
+        if profile == "english" and not voice and rng.random() < self.images_fraction:
+            body = {"message": "", "selections": [rng.choice(LOCATIONS)], "final": True,
+                    "_context": {"language": "english", "mode": "images"}}
+            transcript["turns"].append(body)
+            self._send("images", body)
+        self.recorder.finished(transcript)
+
+    def replay(self, transcript):
+        rng = self._next_rng()
+        for i, body in enumerate(transcript["turns"]):
+            mode = (body.get("_context") or {}).get("mode")
+            turn_type = "images" if mode == "images" else ("opener" if i == 0 else "answer")
+            self._send(turn_type, body)
+            self._think(rng)
+        self.recorder.finished(transcript)
+
+
+# ---------------- Arrival processes ----------------
+def run_closed(runner, users, duration_s, limit, next_job):
+    deadline = time.perf_counter() + duration_s if duration_s else None
+    started = {"n": 0}
+    lock = threading.Lock()
+
+    def user():
+        while True:
+            with lock:
+                if (limit and started["n"] >= limit) or (deadline and time.perf_counter() >= deadline):
+                    return
+                started["n"] += 1
+                job = next_job()
+            if job is None:
+                return
+            job()
+
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_open(runner, rate, duration_s, limit, max_concurrency, next_job, rng):
+    """Poisson arrivals; arrivals that find max_concurrency conversations active are dropped."""
+    jobs = queue.Queue()
+    dropped = 0
+    active = threading.Semaphore(max_concurrency)
+
+    def worker():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            try:
+                job()
+            finally:
+                active.release()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_concurrency)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    started = 0
+    while (not duration_s or time.perf_counter() - start < duration_s) and (not limit or started < limit):
+        time.sleep(rng.expovariate(rate))
+        job = next_job()
+        if job is None:
+            break
+        if active.acquire(blocking=False):
+            jobs.put(job)
+            started += 1
+        else:
+            dropped += 1
+    for _ in threads:
+        jobs.put(None)
+    for t in threads:
+        t.join()
+    return dropped
+
+
+# ---------------- Report ----------------
+def _latency(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000.0, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000.0, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000.0, 2),
+        "max_ms": round(values[-1] * 1000.0, 2),
+        "mean_ms": round(statistics.fmean(values) * 1000.0, 2),
+    }
+
+
+def summarize(recorder, wall_s) -> dict:
+    by_endpoint, by_turn, errors = {}, {}, {}
+    for endpoint, turn_type, status, seconds in recorder.samples:
+        by_endpoint.setdefault(endpoint, []).append(seconds)
+        by_turn.setdefault(turn_type, []).append(seconds)
+        if status != 200:
+            key = f"{endpoint} {status if status is not None else 'connection-error'}"
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        "wall_s": round(wall_s, 2),
+        "requests": len(recorder.samples),
+        "conversations": recorder.conversations,
+        "throughput_rps": round(len(recorder.samples) / wall_s, 3) if wall_s else None,
+        "conversations_per_s": round(recorder.conversations / wall_s, 3) if wall_s else None,
+        "errors": errors,
+        "endpoints": {k: _latency(v) for k, v in sorted(by_endpoint.items())},
+        "turn_types": {k: _latency(v) for k, v in sorted(by_turn.items(), key=lambda kv: TURN_TYPES.index(kv[0]))},
+    }
+
+
+def _parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in PROFILES:
+            raise ValueError(f"unknown profile {name!r} (choose from {', '.join(PROFILES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    target = InProcessTarget() if args.target == "inprocess" else HttpTarget(args.target)
+    recorder = Recorder()
+    runner = ConversationRunner(target, recorder, args.seed, _parse_mix(args.mix), args.voice_fraction,
+                                args.think, args.images_fraction)
+    if args.voice_fraction and not os.path.exists(VOICE_CLIP):
+        raise SystemExit(f"voice clip not found at {VOICE_CLIP}")
+
+    if args.replay:
+        with open(args.replay, "r", encoding="utf-8") as f:
+            scripts = [json.loads(line) for line in f if line.strip()]
+        pending = iter(scripts * max(1, args.loops))
+
+        def next_job():
+            script = next(pending, None)
+            return (lambda: runner.replay(script)) if script is not None else None
+    else:
+        def next_job():
+            return runner.generated
+
+    limit = args.conversations
+    duration = args.duration if args.duration is not None else (None if (limit or args.replay) else 30.0)
+    dropped = 0
+    start = time.perf_counter()
+    if args.rate:
+        dropped = run_open(runner, args.rate, duration, limit, args.max_concurrency, next_job, rng)
+    else:
+        run_closed(runner, args.users, duration, limit, next_job)
+    wall = time.perf_counter() - start
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            for transcript in recorder.transcripts:
+                if not transcript.get("voice"):
+                    f.write(json.dumps(transcript) + "\n")
+
+    summary = summarize(recorder, wall)
+    summary["dropped_arrivals"] = dropped
+    config = {"target": args.target, "users": None if args.rate else args.users, "rate": args.rate,
+              "max_concurrency": args.max_concurrency if args.rate else None, "duration_s": duration,
+              "conversations": limit, "mix": args.mix, "voice_fraction": args.voice_fraction,
+              "images_fraction": args.images_fraction, "think_s": args.think, "seed": args.seed,
+              "replay": args.replay}
+    out = _report([], config)
+    out.pop("results")
+    out["load"] = summary
+    return out
+
+
+def print_summary(summary, stream=sys.stderr):
+    print(f"{summary['requests']} requests, {summary['conversations']} conversations in {summary['wall_s']}s "
+          f"({summary['throughput_rps']} req/s, {summary['conversations_per_s']} conv/s)", file=stream)
+    for title, rows in (("endpoint", summary["endpoints"]), ("turn type", summary["turn_types"])):
+        print(f"{title:<22} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}", file=stream)
+        for name, s in rows.items():
+            print(f"{name:<22} {s['count']:>6} {s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms "
+                  f"{s['max_ms']:>7.1f}ms", file=stream)
+    if summary["errors"]:
+        print(f"errors: {summary['errors']}", file=stream)
+    if summary.get("dropped_arrivals"):
+        print(f"dropped arrivals (max concurrency reached): {summary['dropped_arrivals']}", file=stream)
@@ -0,0 +1,134 @@
+"""
+Macrobenchmarks: scripted multi-turn conversations through POST /api/chat/
+(Flask test client, in process), one per language and mode.
+
+One sample is a whole conversation, started from a reset dialog state.
+`extra.turns_ms` has the median wall time of each turn.
+
+Final turns call ML1/ML2/fusion over HTTP at ML1_URL/ML2_URL/FUSION_URL
+(localhost:5000). Run `python app.py` in another shell to include real model
+latency. Otherwise those calls fail fast with connection refused;
+`extra.ml_api_reachable` records which case a result is.
+
+Voice conversations post static/asr_reference.wav. Each turn pads it with a
+different amount of trailing silence, so the transcript cache does not hide
+the ASR cost.
+"""
+
+import io
+import os
+import socket
+import statistics
+import time
+import wave
+from urllib.parse import urlparse
+
+from .harness import Skip, benchmark
+from .micro import BASE_DIR, app_module
+
+VOICE_CLIP = os.path.join(BASE_DIR, "static", "asr_reference.wav")
+
+CONVERSATIONS = {
+    "english_text": {
+        "context": {"language": "english", "mode": "text"},
+        "turns": ["I have a headache", "since yesterday", "7", "front", "no", "nausea", "none"],
+    },
+    "english_images": {
+        "context": {"language": "english", "mode": "text"},
+        "turns": ["I have a headache", "since yesterday", "7"],
+        "final": {"message": "", "selections": ["head"], "final": True,
+                  "_context": {"language": "english", "mode": "images"}},
+    },
+    "arrernte_text": {
+        "context": {"language": "arrernte", "mode": "text"},
+        "turns": ["werte", "arnterre atnyeneme", "kwatye", "ayenge atnerte atnyeneme"],
+    },
+    "arrernte_text_en": {
+        "context": {"language": "arrernte", "mode": "text_en"},
+        "turns": ["I have a fever", "two days", "8", "chills", "no"],
+    },
+    "english_voice": {"voice": "english", "turns": 3},
+    "arrernte_voice": {"voice": "arrernte", "turns": 3},
+}
+
+
+def _reachable(url, timeout=0.2):
+    parsed = urlparse(url)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _padded_clip(raw, pad_frames):
+    """The WAV with pad_frames of trailing silence (distinct bytes per turn)."""
+    with wave.open(io.BytesIO(raw), "rb") as src:
+        params = src.getparams()
+        frames = src.readframes(src.getnframes())
+    out = io.BytesIO()
+    with wave.open(out, "wb") as dst:
+        dst.setparams(params)
+        dst.writeframes(frames + b"\x00" * (pad_frames * params.sampwidth * params.nchannels))
+    return out.getvalue()
+
+
+def _conversation(name, script):
+    app = app_module()
+    client = app.app.test_client()
+    turn_times = []
+
+    if "voice" in script:
+        if app.wait_for_asr() is None:
+            raise Skip("Whisper model not loaded")
+        if not os.path.exists(VOICE_CLIP):
+            raise Skip(f"voice clip not found at {VOICE_CLIP}")
+        with open(VOICE_CLIP, "rb") as f:
+            raw = f.read()
+        counter = {"n": 0}
+
+        def requests():
+            for _ in range(script["turns"]):
+                counter["n"] += 1
+                clip = _padded_clip(raw, 160 * counter["n"])
+                yield {"data": {"audio": (io.BytesIO(clip), "turn.wav"), "language": script["voice"], "mode": "voice"},
+                       "content_type": "multipart/form-data"}
+    else:
+        def requests():
+            for message in script["turns"]:
+                yield {"json": {"message": message, "_context": script["context"]}}
+            if script.get("final"):
+                yield {"json": script["final"]}
+
+    def run():
+        app.reset_state()
+        if app.arr_reset_state:
+            app.arr_reset_state()
+        times = []
+        for kwargs in requests():
+            start = time.perf_counter()
+            resp = client.post("/api/chat/", **kwargs)
+            times.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                raise RuntimeError(f"{name}: turn {len(times)} returned {resp.status_code}")
+        turn_times.append(times)
+
+    def extra():
+        per_turn = list(zip(*turn_times))
+        return {
+            "turns": len(per_turn),
+            "turns_ms": [round(statistics.median(t) * 1000.0, 2) for t in per_turn],
+            "ml_api_reachable": _reachable(app.FUSION_URL),
+        }
+    return run, extra
+
+
+def _register(name, script):
+    @benchmark(f"conversation.{name}", group="macro", repeat=5)
+    def setup():
+        return _conversation(name, script)
+    return setup
+
+
+for _name, _script in CONVERSATIONS.items():
+    _register(_name, _script)
@@ -0,0 +1,198 @@
+"""
+Microbenchmarks: one function on a fixed input set per benchmark.
+
+Each setup imports what it needs, so `--filter glossary` does not import
+app.py (and load Whisper). Benchmarks that need app.py share one import.
+"""
+
+import os
+import sys
+
+from .harness import Skip, benchmark
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GLOSSARY_CSV = os.path.join(BASE_DIR, "Glossary", "arrernte_audio.csv")
+
+ENGLISH_MESSAGES = [
+    "I have a headache",
+    "I have had a fever since yesterday and I feel very hot",
+    "my stomach hurts and I feel nauseous",
+    "dry cough for three days",
+    "who are you",
+    "hello",
+]
+ARRERNTE_MESSAGES = [
+    "werte",
+    "arnterre atnyeneme",
+    "ayenge atnerte atnyeneme",
+    "kwatye",
+    "arrkwethe tyerre-irreme",
+]
+SYMPTOM_SUMMARIES = [
+    "Patient reporting headache symptoms. Headache duration: yesterday Pain severity: 7 Pain location: front "
+    "Associated symptoms: nausea",
+    "Fever for two days with chills and sweating, temperature around 39 degrees",
+    "Dry cough for a week with shortness of breath at night",
+]
+
+
+def _cycle(items, fn):
+    """Callable that applies fn to the next item on each call (round-robin)."""
+    state = {"i": 0}
+
+    def call():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return fn(item)
+    return call
+
+
+_app = None
+
+
+def app_module():
+    global _app
+    if _app is None:
+        if BASE_DIR not in sys.path:
+            sys.path.insert(0, BASE_DIR)
+        import app
+        app.warmup.manager.wait_all()  # measure steady state, not the background warm-up
+        _app = app
+    return _app
+
+
+# ---------------- Chatbots ----------------
+@benchmark("predict_tag.english")
+def predict_tag_english():
+    from Chatbot.chat import predict_tag
+    return _cycle(ENGLISH_MESSAGES, predict_tag)
+
+
+@benchmark("predict_tag.arrernte")
+def predict_tag_arrernte():
+    from Chatbot_arr.chat import predict_tag
+    return _cycle(ARRERNTE_MESSAGES + ENGLISH_MESSAGES, predict_tag)
+
+
+@benchmark("bag_of_words")
+def bag_of_words():
+    from Chatbot import chat
+    chat.load_model()
+    if not chat.all_words:
+        raise Skip("English chatbot has no vocabulary (data.pth not loaded)")
+    from Chatbot.nltk_utils import bag_of_words as bow, tokenize
+    token_lists = [tokenize(m) for m in ENGLISH_MESSAGES]
+    return _cycle(token_lists, lambda tokens: bow(tokens, chat.all_words)), {"vocabulary": len(chat.all_words)}
+
+
+# ---------------- Glossary ----------------
+def _glossary():
+    from Glossary.glossary_translator import Glossary
+    if not os.path.exists(GLOSSARY_CSV):
+        raise Skip(f"glossary not found at {GLOSSARY_CSV}")
+    return Glossary.load_csv(GLOSSARY_CSV)
+
+
+@benchmark("glossary.load_csv")
+def glossary_load():
+    from Glossary.glossary_translator import Glossary
+    if not os.path.exists(GLOSSARY_CSV):
+        raise Skip(f"glossary not found at {GLOSSARY_CSV}")
+    return lambda: Glossary.load_csv(GLOSSARY_CSV)
+
+
+@benchmark("glossary.translate.en2arr")
+def glossary_en2arr():
+    from Glossary.glossary_translator import translate
+    g = _glossary()
+    return _cycle(ENGLISH_MESSAGES, lambda text: translate(g, text, direction="en2arr")), {"entries": len(g.rows)}
+
+
+@benchmark("glossary.translate.arr2en")
+def glossary_arr2en():
+    from Glossary.glossary_translator import translate
+    g = _glossary()
+    return _cycle(ARRERNTE_MESSAGES, lambda text: translate(g, text, direction="arr2en")), {"entries": len(g.rows)}
+
+
+# ---------------- Arrernte classifier ----------------
+@benchmark("arrernte_classifier.fuzzy_match_phrase")
+def classifier_phrase():
+    import arrernte_classifier
+    return _cycle(ARRERNTE_MESSAGES + ENGLISH_MESSAGES, arrernte_classifier.fuzzy_match_phrase)
+
+
+@benchmark("arrernte_classifier.word_level")
+def classifier_words():
+    import arrernte_classifier
+    return _cycle(ARRERNTE_MESSAGES + ENGLISH_MESSAGES, arrernte_classifier.word_level)
+
+
+# ---------------- Request-path helpers in app.py ----------------
+@benchmark("detect_medical_keywords_in_text")
+def keyword_detection():
+    app = app_module()
+    return _cycle(["i have a headache for 2 days", "pain in lower back", "fever and cough"],
+                  app.detect_medical_keywords_in_text)
+
+
+@benchmark("translate_arr_to_english_simple")
+def arr_to_english_simple():
+    app = app_module()
+    return _cycle(ARRERNTE_MESSAGES, app.translate_arr_to_english_simple)
+
+
+# ---------------- Disease models ----------------
+def _ml1():
+    app = app_module()
+    try:
+        mod = app.model_registry.registry.get("ml1")
+        mod.triage_predict(SYMPTOM_SUMMARIES[0])
+    except Exception as e:
+        raise Skip(f"ML1 unavailable: {e}")
+    return mod
+
+
+def _ml2():
+    app = app_module()
+    try:
+        app._ml2_predict_from_text_freeform(SYMPTOM_SUMMARIES[0])
+    except Exception as e:
+        raise Skip(f"ML2 unavailable: {e}")
+    return app._ml2_predict_from_text_freeform
+
+
+@benchmark("ml1.triage_predict")
+def ml1_predict():
+    mod = _ml1()
+    return _cycle(SYMPTOM_SUMMARIES, mod.triage_predict)
+
+
+@benchmark("ml2.predict")
+def ml2_predict():
+    return _cycle(SYMPTOM_SUMMARIES, _ml2())
+
+
+@benchmark("fusion.policy")
+def fusion_policy():
+    """Decision step only, on canned ML1/ML2 outputs."""
+    app = app_module()
+    ml1 = {"severity": "moderate", "confidence": 0.61, "disease_topk": [{"disease": "Migraine", "p": 0.42}]}
+    ml2 = {"predicted_label": "Tension headache", "probability": 0.55,
+           "top": [{"label": "Tension headache", "probability": 0.55}]}
+    return lambda: app._fuse_predictions(ml1, ml2)
+
+
+@benchmark("fusion.compare")
+def fusion_compare():
+    """ML1 + ML2 + fusion, as served by /api/fusion/compare (in process)."""
+    app = app_module()
+    _ml1()
+    _ml2()
+    client = app.app.test_client()
+
+    def call(text):
+        resp = client.post("/api/fusion/compare", json={"input": text, "topk": 3})
+        if resp.status_code != 200:
+            raise RuntimeError(f"/api/fusion/compare returned {resp.status_code}")
+    return _cycle(SYMPTOM_SUMMARIES, call)
@@ -0,0 +1,128 @@
+"""
+Cold-start cost of app.py, measured in fresh interpreters.
+
+Each run starts a new Python process, imports app and sends GET /health
+through the test client:
+  import_s   time to import app.py
+  health_s   import plus the first /health answer; this is what a restarted
+             worker makes patients wait for
+  ready_s    until /ready answers 200 (models loaded and warmed; reported, not budgeted)
+Runs use the configured MODEL_PRELOAD, so background model loads compete for
+the CPU as they do in production.
+
+One extra run under `python -X importtime` with MODEL_PRELOAD=lazy attributes
+the import. It reports self time summed per top-level package, and the
+cumulative time of each of app.py's direct imports. The median health_s is
+checked against the budget (--budget-s, or STARTUP_BUDGET_S).
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .micro import BASE_DIR
+
+STARTUP_BUDGET_S = float(os.environ.get("STARTUP_BUDGET_S", "3.0"))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+client = app.app.test_client()
+status = client.get("/health").status_code
+t2 = time.perf_counter()
+while client.get("/ready").status_code != 200 and time.perf_counter() - t0 < 600:
+    time.sleep(0.05)
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "health_s": t2 - t0, "ready_s": t3 - t0, "status": status}))
+"""
+
+
+def _child(extra_args=(), env=None, timeout=600):
+    env = dict(os.environ, **(env or {}))
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, *extra_args, "-c", PROBE], cwd=BASE_DIR, env=env,
+                         capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - start
+    lines = [ln for ln in out.stdout.splitlines() if ln.startswith("{")]
+    if out.returncode != 0 or not lines:
+        tail = "\n".join(out.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"importing app failed (exit {out.returncode}):\n{tail}")
+    result = json.loads(lines[-1])
+    result["process_s"] = wall
+    return result, out.stderr
+
+
+def parse_importtime(text):
+    """(name, self_us, cumulative_us, depth) for each `-X importtime` line, in output order."""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cum_us, name = line.split("|", 2)
+            self_us = head.split(":", 1)[1]
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cum_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def attribute(rows, top=20):
+    """Self time per top-level package, and app.py's direct imports by cumulative time."""
+    packages = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    direct = []
+    for i, (name, _, cum_us, depth) in enumerate(rows):
+        if name == "app" and depth == 0:
+            j = i - 1
+            while j >= 0 and rows[j][3] > 0:
+                if rows[j][3] == 1:
+                    direct.append((rows[j][0], rows[j][2]))
+                j -= 1
+            break
+    by_package = sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "packages": [{"package": p, "self_s": round(us / 1e6, 4)} for p, us in by_package],
+        "app_imports": [{"module": m, "cumulative_s": round(us / 1e6, 4)}
+                        for m, us in sorted(direct, key=lambda kv: -kv[1])[:top]],
+    }
+
+
+def run(args) -> dict:
+    runs = []
+    for _ in range(args.repeat):
+        result, _ = _child()
+        runs.append(result)
+    _, stderr = _child(["-X", "importtime"], env={"MODEL_PRELOAD": "lazy"})
+    health = statistics.median(r["health_s"] for r in runs)
+    budget = args.budget_s if args.budget_s is not None else STARTUP_BUDGET_S
+    return {
+        "model_preload": os.environ.get("MODEL_PRELOAD", "background"),
+        "runs": runs,
+        "import_s": round(statistics.median(r["import_s"] for r in runs), 4),
+        "health_s": round(health, 4),
+        "ready_s": round(statistics.median(r["ready_s"] for r in runs), 4),
+        "budget_s": budget,
+        "within_budget": health <= budget,
+        "importtime": attribute(parse_importtime(stderr), top=args.top),
+    }
+
+
+def print_summary(out):
+    print(f"cold start (median of {len(out['runs'])}): import {out['import_s']:.2f}s, "
+          f"first /health {out['health_s']:.2f}s, ready {out['ready_s']:.2f}s, budget {out['budget_s']:.2f}s "
+          f"({'ok' if out['within_budget'] else 'OVER BUDGET'})", file=sys.stderr)
+    print("self time by package:", file=sys.stderr)
+    for row in out["importtime"]["packages"]:
+        print(f"  {row['package']:<32} {row['self_s']:>8.3f}s", file=sys.stderr)
+    print("app.py imports (cumulative):", file=sys.stderr)
+    for row in out["importtime"]["app_imports"]:
+        print(f"  {row['module']:<32} {row['cumulative_s']:>8.3f}s", file=sys.stderr)
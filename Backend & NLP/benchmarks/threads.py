@@ -0,0 +1,240 @@
+"""
+Search for the CPU thread budget (CPU_THREADS, see cpu_budget.py) that suits this machine.
+
+  python -m benchmarks threads                     # all subsystems whose models load
+  python -m benchmarks threads --only torch,blas --seconds 2 --out threads.json
+
+Each subsystem runs its real request-path work: the English intent classifier
+(torch), a greedy decode of the first seconds of the ASR reference clip
+(whisper), ML1 triage (xgboost) and ML2 (blas). Subsystems whose models or
+artifacts are missing are skipped.
+
+First every subsystem is timed alone at each candidate thread count (1, 2, 4,
+... up to the cores this process may use). Then all of them run at once, one
+thread looping on each, as concurrent requests do in a worker, and a split is
+scored by its slowdown: the geometric mean over subsystems of the median
+latency under the mixed load divided by that subsystem's best time alone (1.0
+means no interference). Starting from the configured budget, each subsystem's
+count is changed in turn while the others stay fixed, keeping any change that
+lowers the score by more than --min-gain, until a full round changes nothing.
+
+Run it on the machine (and with the WEB_WORKERS) you deploy; a split tuned for
+one core count does not carry over to another.
+"""
+
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+
+import cpu_budget
+
+from .harness import Skip, report as _report
+from .micro import ENGLISH_MESSAGES, SYMPTOM_SUMMARIES, _cycle, _ml1, _ml2, app_module
+
+WHISPER_CLIP_S = 5
+
+
+def candidates(cores):
+    out, n = [], 1
+    while n < cores:
+        out.append(n)
+        n *= 2
+    return out + [cores]
+
+
+class Subsystem:
+    """Work for one subsystem, and how to give it `threads` threads."""
+
+    def __init__(self, name, call, configure):
+        self.name = name
+        self.call = call
+        self.configure = configure
+
+
+def _torch():
+    app = app_module()
+    import torch
+    bot = app._chatbot(app.route_message)
+    if bot is None or bot.intent_model is None:
+        raise Skip("the English intent classifier is not loaded")
+    return Subsystem("torch", _cycle(ENGLISH_MESSAGES, bot.predict_tag), torch.set_num_threads)
+
+
+def _whisper():
+    app = app_module()
+    asr = app.asr_service
+    if asr._faster_whisper() is None:
+        raise Skip("faster-whisper is not installed")
+    if os.path.exists(asr.ASR_PROBE_CLIP):
+        with open(asr.ASR_PROBE_CLIP, "rb") as f:
+            samples = asr.decode_audio(f.read())[:asr.SAMPLE_RATE * WHISPER_CLIP_S]
+    else:
+        raise Skip(f"ASR reference clip not found at {asr.ASR_PROBE_CLIP}")
+    models = {}  # cpu_threads is fixed when a WhisperModel is built
+    try:
+        models[1] = asr._load_whisper(asr.WHISPER_MODEL, cpu_threads=1)
+    except Exception as e:
+        raise Skip(f"Whisper model {asr.WHISPER_MODEL} unavailable: {e}")
+    current = {"threads": 1}
+
+    def configure(threads):
+        if threads not in models:
+            models[threads] = asr._load_whisper(asr.WHISPER_MODEL, cpu_threads=threads)
+        current["threads"] = threads
+    return Subsystem("whisper", lambda: asr._run_whisper(models[current["threads"]], samples, "en", 1), configure)
+
+
+def _xgboost():
+    mod = _ml1()
+    xgb = mod._model.xgb
+    if not hasattr(xgb, "get_booster"):
+        raise Skip("ML1 has no XGBoost model")
+    return Subsystem("xgboost", _cycle(SYMPTOM_SUMMARIES, mod.triage_predict),
+                     lambda threads: xgb.set_params(n_jobs=threads))
+
+
+def _blas():
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        raise Skip("threadpoolctl is not installed")
+    return Subsystem("blas", _cycle(SYMPTOM_SUMMARIES, _ml2()),
+                     lambda threads: threadpool_limits(threads, user_api="blas"))
+
+
+SETUPS = {"torch": _torch, "whisper": _whisper, "xgboost": _xgboost, "blas": _blas}
+
+
+def _loop(subsystem, seconds, min_calls=3):
+    """Latencies of back-to-back calls for `seconds` (at least min_calls)."""
+    out = []
+    deadline = time.perf_counter() + seconds
+    while len(out) < min_calls or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        subsystem.call()
+        out.append(time.perf_counter() - start)
+    return out
+
+
+def solo(subsystem, counts, seconds) -> dict:
+    out = {}
+    for n in counts:
+        subsystem.configure(n)
+        subsystem.call()  # first call after a change pays for spinning the pool up
+        out[n] = statistics.median(_loop(subsystem, seconds))
+    return out
+
+
+def mixed(subsystems, split, seconds) -> dict:
+    """Median latency per subsystem while all of them run at once with `split` threads."""
+    for s in subsystems:
+        s.configure(split[s.name])
+        s.call()
+    latencies, errors = {}, []
+
+    def run(s):
+        try:
+            latencies[s.name] = _loop(s, seconds)
+        except Exception as e:
+            errors.append(f"{s.name}: {type(e).__name__}: {e}")
+    threads = [threading.Thread(target=run, args=(s,), name=f"bench-{s.name}") for s in subsystems]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return {name: statistics.median(values) for name, values in latencies.items()}
+
+
+def score(medians, best_solo) -> float:
+    return math.exp(statistics.fmean(math.log(medians[name] / best_solo[name]) for name in medians))
+
+
+def search(subsystems, start, counts, seconds, min_gain, max_rounds=3):
+    """Coordinate descent from `start`; returns (best split, its score, solo timings, every trial)."""
+    best_solo = {}
+    trials = {}
+
+    def evaluate(split):
+        key = tuple(split[s.name] for s in subsystems)
+        if key not in trials:
+            medians = mixed(subsystems, split, seconds)
+            trials[key] = {"budget": dict(split), "score": score(medians, best_solo), "median_s": medians}
+            print(f"  {cpu_budget.spec(split):<44} slowdown {trials[key]['score']:.2f}x", file=sys.stderr)
+        return trials[key]["score"]
+
+    solos = {}
+    for s in subsystems:
+        solos[s.name] = solo(s, counts, seconds)
+        best_solo[s.name] = min(solos[s.name].values())
+        print(f"{s.name:<8} alone: " + "  ".join(f"{n}t {v * 1e3:.1f}ms" for n, v in solos[s.name].items()),
+              file=sys.stderr)
+
+    best = dict(start)
+    best_score = evaluate(best)
+    for _ in range(max_rounds):
+        changed = False
+        for s in subsystems:
+            for n in counts:
+                if n == best[s.name]:
+                    continue
+                trial = dict(best, **{s.name: n})
+                trial_score = evaluate(trial)
+                if trial_score < best_score * (1.0 - min_gain):
+                    best, best_score, changed = trial, trial_score, True
+        if not changed:
+            break
+    return best, best_score, solos, list(trials.values())
+
+
+def run(args) -> dict:
+    app_module()
+    cores = args.cores or cpu_budget.cores()
+    counts = candidates(cores)
+    wanted = [n.strip() for n in (args.only or ",".join(SETUPS)).split(",") if n.strip()]
+    unknown = [n for n in wanted if n not in SETUPS]
+    if unknown:
+        raise SystemExit(f"unknown subsystem(s): {', '.join(unknown)} (expected {', '.join(SETUPS)})")
+
+    subsystems, skipped = [], {}
+    for name in wanted:
+        try:
+            subsystems.append(SETUPS[name]())
+        except Skip as e:
+            skipped[name] = str(e)
+            print(f"{name:<8} skipped: {e}", file=sys.stderr)
+    if not subsystems:
+        raise SystemExit("no subsystem could be benchmarked")
+
+    configured = cpu_budget.budget()
+    start = {s.name: min(counts, key=lambda n: abs(n - configured[s.name])) for s in subsystems}
+    best, best_score, solos, trials = search(subsystems, start, counts, args.seconds, args.min_gain)
+    recommended = cpu_budget.spec(dict(configured, **best))
+
+    config = {"cores": cores, "candidates": counts, "seconds": args.seconds, "min_gain": args.min_gain,
+              "subsystems": [s.name for s in subsystems]}
+    out = _report([], config)
+    out.pop("results")
+    out["threads"] = {
+        "skipped": skipped,
+        "solo_median_s": {name: {str(n): v for n, v in values.items()} for name, values in solos.items()},
+        "configured": cpu_budget.spec(configured),
+        "configured_score": next(t["score"] for t in trials if t["budget"] == start),
+        "best": best,
+        "best_score": best_score,
+        "recommended": recommended,
+        "trials": trials,
+    }
+    return out
+
+
+def print_summary(out, stream=sys.stderr):
+    t = out["threads"]
+    print(f"configured  CPU_THREADS={t['configured']}  slowdown {t['configured_score']:.2f}x", file=stream)
+    print(f"recommended CPU_THREADS={t['recommended']}  slowdown {t['best_score']:.2f}x", file=stream)
+    if t["skipped"]:
+        print(f"not measured (configured value kept): {', '.join(t['skipped'])}", file=stream)
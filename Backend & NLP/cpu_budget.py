@@ -0,0 +1,130 @@
+"""
+One CPU thread budget for the native thread pools in the backend.
+
+torch (the intent classifiers), CTranslate2 (Whisper), XGBoost (ML1) and the
+BLAS libraries behind numpy and scikit-learn each size their pool to every
+core by default. Under the threaded server they run at the same time (one
+request decoding speech while another is classified), and four pools of N
+threads on N cores thrash. CPU_THREADS gives each its share:
+
+    CPU_THREADS=whisper=4,torch=1,xgboost=1,blas=1
+
+A subsystem left out gets its default: Whisper all of this process's cores
+(split across ASR_WORKERS replicas), the others one thread each, since they
+score one short text per request and gain nothing from more. "Cores" are the
+process's share: the CPU affinity and cgroup quota (serving.cpu_count()), or
+a preforked worker's cores_per_worker.
+
+apply() runs once at startup (app.py, or serving.after_fork() in each
+preforked worker; the prefork master stays single-threaded). It sets torch and
+BLAS (through threadpoolctl, if installed) and any XGBoost model loaded so far.
+Models loaded later take their share as they load: configure_torch() after
+torch is imported, configure_xgboost(model), and whisper_threads(replicas) for
+WhisperModel(cpu_threads=...). ASR_CPU_THREADS, if set, still fixes Whisper's
+threads per replica.
+
+`python -m benchmarks threads` times each subsystem alone and under a mixed
+load on this machine and prints the CPU_THREADS that worked best.
+"""
+
+import os
+import sys
+import weakref
+
+import log_config
+import serving
+
+log = log_config.get_logger("cpu")
+
+SUBSYSTEMS = ("torch", "whisper", "xgboost", "blas")
+
+
+def parse(spec: str) -> dict:
+    """"whisper=4, torch=1" -> {"whisper": 4, "torch": 1}. 0 or "auto" means the default."""
+    out = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, value = (s.strip() for s in part.split("=", 1))
+        if name not in SUBSYSTEMS:
+            log.warning("CPU_THREADS: unknown subsystem %r (expected one of %s)", name, ", ".join(SUBSYSTEMS))
+            continue
+        if value.lower() in ("", "0", "auto"):
+            continue
+        try:
+            out[name] = max(1, int(value))
+        except ValueError:
+            log.warning("CPU_THREADS: %s=%r is not a number", name, value)
+    return out
+
+
+CPU_THREADS = parse(os.environ.get("CPU_THREADS", ""))
+
+_cores = None
+_applied = False
+_xgb_models = weakref.WeakSet()
+
+
+def cores() -> int:
+    return _cores or serving.cpu_count()
+
+
+def budget(overrides=None) -> dict:
+    """Threads per subsystem for this process: the defaults, then CPU_THREADS, then overrides."""
+    out = {"torch": 1, "whisper": cores(), "xgboost": 1, "blas": 1}
+    out.update(CPU_THREADS)
+    out.update(overrides or {})
+    return out
+
+
+def spec(b) -> str:
+    """The CPU_THREADS line for a budget dict."""
+    return ",".join(f"{name}={b[name]}" for name in SUBSYSTEMS if name in b)
+
+
+def whisper_threads(replicas=1) -> int:
+    """cpu_threads for each of `replicas` WhisperModel replicas."""
+    return max(1, budget()["whisper"] // max(1, replicas))
+
+
+def configure_torch():
+    if _applied and "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(budget()["torch"])
+
+
+def configure_xgboost(model):
+    """Give an XGBoost model (sklearn wrapper or Booster) its share; others are left alone."""
+    if hasattr(model, "get_booster"):
+        _xgb_models.add(model)
+        if _applied:
+            model.set_params(n_jobs=budget()["xgboost"])
+    elif type(model).__module__.startswith("xgboost"):
+        _xgb_models.add(model)
+        if _applied:
+            model.set_param({"nthread": budget()["xgboost"]})
+
+
+def configure_blas():
+    """Limit the BLAS libraries loaded so far (numpy's, and scipy's once scikit-learn is imported)."""
+    if not _applied:
+        return
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(budget()["blas"], user_api="blas")
+
+
+def apply(cores_available=None) -> dict:
+    """Apply the budget to everything loaded so far; later loads use it as they happen."""
+    global _cores, _applied
+    if cores_available:
+        _cores = cores_available
+    _applied = True
+    configure_torch()
+    configure_blas()
+    for model in list(_xgb_models):
+        configure_xgboost(model)
+    b = budget()
+    log.info("CPU thread budget (%d cores): %s", cores(), spec(b))
+    return b
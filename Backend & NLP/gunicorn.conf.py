@@ -0,0 +1,50 @@
+"""
+gunicorn settings for production:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+The master imports app.py once and loads the models (preload_app), then forks
+the workers, which share that memory copy-on-write. Worker and thread counts
+come from the cores and memory available (serving.plan()); see serving.py.
+
+Environment: BIND (default 0.0.0.0:5000), WEB_TIMEOUT (seconds a request may
+take before its worker is restarted, default 120), and the WEB_* / PREFORK_DEFER
+settings read by serving.py.
+"""
+
+import gc
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import serving  # noqa: E402  (reads the env just loaded)
+
+serving.prefork_master()
+
+_plan = serving.plan()
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+preload_app = True
+worker_class = "gthread"
+workers = _plan["workers"]
+threads = _plan["threads"]
+timeout = int(os.environ.get("WEB_TIMEOUT", "120"))
+
+
+def when_ready(server):
+    """The models are loaded: size the pool against the memory left, and freeze the loaded objects."""
+    global _plan
+    _plan = serving.plan()
+    server.num_workers = _plan["workers"]
+    server.cfg.set("threads", _plan["threads"])
+    server.log.info("Serving with %d workers x %d threads (%d cpus, %d cores per worker, %s MiB available)",
+                    _plan["workers"], _plan["threads"], _plan["cpus"], _plan["cores_per_worker"],
+                    _plan["memory_available"] // (1024 * 1024) if _plan["memory_available"] else "?")
+    # keep the workers' garbage collector off the master's objects, so it doesn't copy their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    serving.after_fork(_plan["cores_per_worker"])
@@ -0,0 +1,165 @@
+"""
+Leveled, queue-backed logging for the backend.
+
+Modules log through `log_config.get_logger("asr")` (logger "saca.asr").
+app.py calls setup_logging() once after loading .env; until then saca.*
+records fall through to Python's last-resort handler (WARNING and above).
+Records are put on an in-memory queue on the request thread and written to
+stderr by a single listener thread, so a slow terminal or log collector never
+blocks a request. If the queue is full the record is dropped and counted
+(dropped(), exported as saca_log_dropped) instead of waiting. A process forked
+after setup (a preforked gunicorn worker) starts its own writer thread.
+
+Environment:
+  LOG_LEVEL         default level for all saca.* loggers (default INFO)
+  LOG_LEVELS        per-module overrides, e.g. "asr=DEBUG,chat=WARNING"
+                    (names are relative to "saca.")
+  LOG_FORMAT        text | json (json adds any `extra=` fields to each line)
+  LOG_DEBUG_SAMPLE  fraction of DEBUG records kept, 0..1 (default 1). Lets a
+                    production box run one module at DEBUG without logging
+                    every request.
+  LOG_QUEUE_SIZE    max records waiting for the writer thread (default 10000)
+
+Use %-style arguments (log.debug("x=%s", x)) on hot paths: the message is only
+formatted if the record passes the level check and sampling.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+ROOT = "saca"
+
+# LogRecord attributes; anything else on a record came from extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener = None
+_handler = None
+_dropped = 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep only `rate` of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _lock:
+                _dropped += 1
+
+
+def _level(name, default=logging.INFO):
+    value = logging.getLevelName(name.strip().upper())
+    return value if isinstance(value, int) else default
+
+
+def parse_levels(spec: str) -> dict:
+    """"asr=DEBUG, chat=WARNING" -> {"saca.asr": 10, "saca.chat": 30}."""
+    levels = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, level = part.split("=", 1)
+        name = name.strip()
+        if not name:
+            continue
+        if name != ROOT and not name.startswith(ROOT + "."):
+            name = f"{ROOT}.{name}"
+        levels[name] = _level(level)
+    return levels
+
+
+def setup_logging():
+    """Attach the queue handler to the saca logger (idempotent). Reads the LOG_* env vars."""
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stderr)
+        if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+
+        handler = _DroppingQueueHandler(queue.Queue(int(os.environ.get("LOG_QUEUE_SIZE", "10000"))))
+        handler.addFilter(DebugSampler(float(os.environ.get("LOG_DEBUG_SAMPLE", "1"))))
+
+        root = logging.getLogger(ROOT)
+        root.handlers[:] = [handler]
+        root.setLevel(_level(os.environ.get("LOG_LEVEL", "INFO")))
+        root.propagate = False
+        for name, level in parse_levels(os.environ.get("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level)
+
+        _handler = handler
+        _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+    atexit.register(shutdown)
+
+
+def _after_fork():
+    """A forked worker has no writer thread and may inherit a locked queue; give it fresh ones."""
+    global _lock, _listener
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _handler.queue = queue.Queue(_handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def dropped() -> int:
+    return _dropped
@@ -0,0 +1,409 @@
+"""
+Memory accounting for a running worker: GET /debug/memory and this module's CLI.
+
+Modules register what holds memory with register(name, kind, fn):
+models, vocabularies, glossary maps, caches, job tables and output directories.
+fn returns a dict of figures ("entries", "maxsize", ...). An "objects" entry in
+it is measured with deep_size() and replaced by "bytes". report() collects
+every component together with process RSS. When tracemalloc is running, report()
+also lists the top allocating source lines, plus their growth since the last
+baseline.
+
+Sizes are approximate:
+  - deep_size() follows containers, instance __dict__/__slots__, and numpy
+    arrays and torch tensors by their buffers.
+  - An object shared by two components is counted in both.
+  - Memory owned by native libraries (the CTranslate2 Whisper weights) is not
+    visible. Those components report what they can, and the rest shows up
+    only in RSS.
+Components of kind "disk" (e.g. generated TTS audio) are files, not RSS. They
+are reported because they grow the same way.
+
+MEMORY_TRACEMALLOC=N starts tracemalloc at import, keeping N frames per
+allocation. Python allocations then cost noticeably more, so use it only when
+hunting a leak. /debug/memory?tracemalloc=start|stop toggles it at runtime
+(&frames=N, at most MEMORY_MAX_FRAMES), ?baseline=1 records the tracemalloc
+baseline that later reports diff against, and ?top=N sets how many allocators
+are listed.
+
+/debug/memory is off unless MEMORY_TOKEN is set: a report walks every
+component's objects while holding the GIL, and tracemalloc slows the whole
+process. Requests then send the token in X-Memory-Token.
+
+CLI (run from this directory):
+  python memstats.py snapshot [--url http://localhost:5000] [-o FILE]
+  python memstats.py snapshot --local        # import app.py and report in process
+  python memstats.py show FILE
+  python memstats.py diff OLD.json NEW.json  # what grew between two snapshots
+"""
+
+import argparse
+import gc
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import log_config
+
+log = log_config.get_logger("memstats")
+
+MEMORY_TOKEN = os.environ.get("MEMORY_TOKEN", "")
+MEMORY_TRACEMALLOC = int(os.environ.get("MEMORY_TRACEMALLOC", "0"))
+MEMORY_DIR = os.environ.get("MEMORY_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "instance", "memory")
+MEMORY_TOP = 25
+MEMORY_MAX_TOP = 500
+MEMORY_MAX_FRAMES = 25
+DEEP_SIZE_LIMIT = 2_000_000  # objects visited per component before giving up
+
+SCHEMA = 1
+
+if MEMORY_TRACEMALLOC > 0 and not tracemalloc.is_tracing():
+    tracemalloc.start(MEMORY_TRACEMALLOC)
+
+_components = {}
+_lock = threading.Lock()
+_baseline = None
+
+# Not data: walking into these would measure the interpreter, not the component
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+           types.CodeType, types.FrameType, types.GeneratorType, type(threading.Lock()))
+
+
+def authorized(header_value) -> bool:
+    """/debug/memory needs X-Memory-Token matching MEMORY_TOKEN; it is off without one."""
+    if not MEMORY_TOKEN:
+        return False
+    return hmac.compare_digest(header_value or "", MEMORY_TOKEN)
+
+
+def register(name, kind, fn):
+    """Report fn()'s figures as component `name` (kind: model, data, cache, jobs, disk)."""
+    with _lock:
+        _components[name] = (kind, fn)
+
+
+def registered() -> list:
+    with _lock:
+        return sorted(_components)
+
+
+# ---------------- Sizing ----------------
+def _buffer_size(obj):
+    """Bytes held by an array-like outside its Python object, or None."""
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.base is None else 0
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        if isinstance(obj, torch.Tensor):
+            return obj.element_size() * obj.nelement()
+        if isinstance(obj, torch.nn.Module):
+            return sum(t.element_size() * t.nelement() for t in obj.state_dict().values())
+    return None
+
+
+def deep_size(obj, limit=DEEP_SIZE_LIMIT):
+    """(bytes, complete) for obj and everything reachable from it, each object counted once."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        if len(seen) >= limit:
+            return total, False
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _OPAQUE):
+            continue
+        seen.add(id(o))
+        try:
+            total += sys.getsizeof(o)
+        except TypeError:
+            continue
+        extra = _buffer_size(o)
+        if extra is not None:
+            total += extra
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif isinstance(o, (str, bytes, bytearray, int, float, bool, type(None))):
+            pass
+        else:
+            d = getattr(o, "__dict__", None)
+            if d is not None:
+                stack.append(d)
+            for slot in getattr(type(o), "__slots__", ()):
+                value = getattr(o, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total, True
+
+
+def module_state(mod) -> list:
+    """A module's data globals (skipping imports, functions and classes), for deep_size()."""
+    if mod is None:
+        return []
+    return [v for k, v in vars(mod).items() if not k.startswith("__") and not isinstance(v, _OPAQUE)]
+
+
+def directory_usage(path, pattern=None) -> dict:
+    """File count and bytes under path (top level only); pattern is a (prefix, suffix) filter."""
+    files = 0
+    size = 0
+    oldest = None
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return {"files": 0, "bytes": 0, "path": path}
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        if pattern and not (entry.name.startswith(pattern[0]) and entry.name.endswith(pattern[1])):
+            continue
+        st = entry.stat()
+        files += 1
+        size += st.st_size
+        oldest = st.st_mtime if oldest is None else min(oldest, st.st_mtime)
+    out = {"files": files, "bytes": size, "path": path}
+    if oldest is not None:
+        out["oldest"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(oldest))
+    return out
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), or None where unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ---------------- Report ----------------
+def _measure(name, kind, fn) -> dict:
+    start = time.perf_counter()
+    try:
+        figures = dict(fn() or {})
+    except Exception as e:
+        return {"kind": kind, "error": str(e)}
+    objects = figures.pop("objects", None)
+    if objects is not None:
+        size, complete = deep_size(objects)
+        figures["bytes"] = size
+        if not complete:
+            figures["truncated"] = True
+    figures["kind"] = kind
+    figures["measure_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+    return figures
+
+
+def _where(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _tracemalloc_report(top) -> dict:
+    if not tracemalloc.is_tracing():
+        return {"enabled": False}
+    current, peak = tracemalloc.get_traced_memory()
+    snap = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    out = {
+        "enabled": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [{"where": _where(s), "bytes": s.size, "count": s.count}
+                for s in snap.statistics("lineno")[:top]],
+    }
+    if _baseline is not None:
+        diff = snap.compare_to(_baseline[1], "lineno")
+        out["baseline"] = _baseline[0]
+        out["growth"] = [{"where": _where(s), "bytes": s.size_diff, "count": s.count_diff}
+                         for s in diff[:top] if s.size_diff > 0]
+    return out
+
+
+def set_baseline():
+    """Later reports list tracemalloc growth relative to now."""
+    global _baseline
+    if tracemalloc.is_tracing():
+        _baseline = (time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), tracemalloc.take_snapshot())
+
+
+def start_tracemalloc(frames=1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(min(max(1, int(frames)), MEMORY_MAX_FRAMES))
+        log.info("tracemalloc started (%d frames)", tracemalloc.get_traceback_limit())
+
+
+def stop_tracemalloc():
+    global _baseline
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        _baseline = None
+        log.info("tracemalloc stopped")
+
+
+def report(top=MEMORY_TOP) -> dict:
+    """Snapshot of every registered component, process RSS and tracemalloc's top allocators."""
+    with _lock:
+        components = dict(_components)
+    measured = {name: _measure(name, kind, fn) for name, (kind, fn) in sorted(components.items())}
+    return {
+        "schema": SCHEMA,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "tracked_bytes": sum(c.get("bytes", 0) for c in measured.values() if c["kind"] != "disk"),
+        "components": measured,
+        "tracemalloc": _tracemalloc_report(top),
+    }
+
+
+# ---------------- CLI ----------------
+def _mb(n) -> str:
+    return "-" if n is None else f"{n / 1048576:,.2f} MB"
+
+
+def _signed_mb(n) -> str:
+    return "-" if n is None else f"{n / 1048576:+,.2f} MB"
+
+
+def _entries(c) -> str:
+    for key in ("entries", "size", "files", "stored"):
+        if c.get(key) is not None:
+            return f"{c[key]} {key}"
+    return ""
+
+
+def diff(old, new, top=MEMORY_TOP) -> dict:
+    """Per-component and per-allocator deltas between two report() snapshots."""
+    rows = []
+    for name in sorted(set(old["components"]) | set(new["components"])):
+        a = old["components"].get(name, {})
+        b = new["components"].get(name, {})
+        delta = (b.get("bytes") or 0) - (a.get("bytes") or 0)
+        rows.append({"name": name, "kind": b.get("kind") or a.get("kind"), "old": a.get("bytes"),
+                     "new": b.get("bytes"), "delta": delta, "old_entries": _entries(a), "new_entries": _entries(b)})
+    rows.sort(key=lambda r: -abs(r["delta"]))
+    old_top = {t["where"]: t["bytes"] for t in old.get("tracemalloc", {}).get("top", [])}
+    new_top = {t["where"]: t["bytes"] for t in new.get("tracemalloc", {}).get("top", [])}
+    allocators = sorted(((w, new_top.get(w, 0) - old_top.get(w, 0)) for w in set(old_top) | set(new_top)),
+                        key=lambda x: -x[1])
+    rss = None
+    if old.get("rss_bytes") is not None and new.get("rss_bytes") is not None:
+        rss = new["rss_bytes"] - old["rss_bytes"]
+    return {"rss_delta": rss, "same_process": old.get("pid") == new.get("pid"),
+            "components": rows, "allocators": [{"where": w, "delta": d} for w, d in allocators[:top] if d]}
+
+
+def print_report(data):
+    print(f"pid {data['pid']} at {data['created']}: RSS {_mb(data['rss_bytes'])} (peak {_mb(data['peak_rss_bytes'])}), "
+          f"tracked {_mb(data['tracked_bytes'])}, {data['gc_objects']:,} gc objects")
+    for name, c in sorted(data["components"].items(), key=lambda kv: -(kv[1].get("bytes") or 0)):
+        note = c.get("error") or ("truncated" if c.get("truncated") else "")
+        print(f"  {name:<48} {c['kind']:<6} {_mb(c.get('bytes')):>14}  {_entries(c):<18} {note}")
+    tm = data.get("tracemalloc", {})
+    if tm.get("enabled"):
+        print(f"tracemalloc: {_mb(tm['traced_bytes'])} traced (peak {_mb(tm['peak_bytes'])})")
+        for t in tm["top"]:
+            print(f"  {_mb(t['bytes']):>14}  {t['count']:>8}  {t['where']}")
+        if tm.get("growth"):
+            print(f"growth since {tm['baseline']}:")
+            for t in tm["growth"]:
+                print(f"  {_signed_mb(t['bytes']):>14}  {t['count']:>+8}  {t['where']}")
+
+
+def print_diff(d):
+    note = "" if d["same_process"] else " (different processes)"
+    print(f"RSS {_signed_mb(d['rss_delta'])}{note}")
+    for r in d["components"]:
+        if r["delta"] or r["old_entries"] != r["new_entries"]:
+            print(f"  {r['name']:<48} {_signed_mb(r['delta']):>14}  {r['old_entries']} -> {r['new_entries']}")
+    if d["allocators"]:
+        print("tracemalloc top allocators:")
+        for a in d["allocators"]:
+            print(f"  {_signed_mb(a['delta']):>14}  {a['where']}")
+
+
+def _load(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("schema") != SCHEMA:
+        raise SystemExit(f"{path}: unsupported memory snapshot schema {data.get('schema')}")
+    return data
+
+
+def _fetch(url, token, top, baseline) -> dict:
+    from urllib.parse import urlencode
+    from urllib.request import Request, urlopen
+    query = urlencode({"top": top, **({"baseline": 1} if baseline else {})})
+    req = Request(f"{url.rstrip('/')}/debug/memory?{query}", headers={"X-Memory-Token": token} if token else {})
+    with urlopen(req, timeout=120) as resp:
+        return json.load(resp)
+
+
+def cmd_snapshot(args):
+    if args.local:
+        import app  # noqa: F401  (registers the app's components)
+        import memstats  # the registry app.py filled, not this __main__ copy
+        data = memstats.report(args.top)
+    else:
+        data = _fetch(args.url, args.token, args.top, args.baseline)
+    out = args.out or os.path.join(MEMORY_DIR, time.strftime("%Y%m%dT%H%M%S") + f"-{data['pid']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print_report(data)
+    print(f"saved {out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="memstats", description="Memory snapshots of a SwinSACA worker")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("snapshot", help="save /debug/memory of a running server (or --local)")
+    p.add_argument("--url", default="http://localhost:5000")
+    p.add_argument("--token", default=MEMORY_TOKEN)
+    p.add_argument("--local", action="store_true", help="import app.py and measure this process instead")
+    p.add_argument("--baseline", action="store_true", help="make this the server's tracemalloc baseline")
+    p.add_argument("--top", type=int, default=MEMORY_TOP)
+    p.add_argument("-o", "--out")
+    p.set_defaults(fn=cmd_snapshot)
+    p = sub.add_parser("show", help="print a saved snapshot")
+    p.add_argument("file")
+    p.set_defaults(fn=lambda a: print_report(_load(a.file)))
+    p = sub.add_parser("diff", help="what grew between two snapshots")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=lambda a: (print(json.dumps(diff(_load(a.old), _load(a.new)), indent=2)) if a.json
+                                 else print_diff(diff(_load(a.old), _load(a.new)))))
+    args = parser.parse_args(argv)
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    log_config.setup_logging()
+    main()
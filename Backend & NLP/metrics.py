@@ -0,0 +1,255 @@
+"""
+In-process metrics exported in Prometheus text format on GET /metrics.
+
+Counters and histograms take label values as keyword arguments. Recording is a
+dict lookup plus a bisect under a per-metric lock, so it is cheap enough for
+the request path. Gauges are read through callbacks when /metrics is scraped.
+
+Shared metrics:
+  saca_operation_seconds{op}          transcribe, glossary_translate, keyword_detection,
+                                      route_message, predict_tag, ml1, ml2, fusion,
+                                      fusion_compare, tts, clip_lookup, db_commit, ...
+  saca_operation_errors_total{op}     failures of the same operations
+  saca_stage_seconds{pipeline,stage}  chat pipeline stage durations (see pipeline.py)
+  saca_stage_total{pipeline,stage,status}
+  saca_cache_requests_total{cache,result}   result = hit | miss
+
+Set METRICS_ENABLED=0 to turn recording into no-ops.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import log_config
+import tracing
+
+log = log_config.get_logger("metrics")
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers glossary lookups (ms) up to ML / TTS calls (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> dict:
+        """{"count", "sum", "buckets": {le: cumulative}} for one label set."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            counts, total, count = (list(state[0]), state[1], state[2]) if state else ([0] * (len(self.buckets) + 1), 0.0, 0)
+        cumulative, running = {}, 0
+        for le, c in zip(self.buckets + (float("inf"),), counts):
+            running += c
+            cumulative[le] = running
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            running = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                running += c
+                le_label = 'le="%s"' % _fmt(le)
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le_label)} {running}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {count}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Value(s) computed at scrape time: fn() returns a number or {label-tuple: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, fn, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def render(self) -> list:
+        try:
+            values = self.fn()
+        except Exception as e:
+            log.warning("Gauge %s failed: %s", self.name, e)
+            return []
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return self.header() + [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}"
+                                for k, v in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, fn, labelnames=()) -> CallbackGauge:
+        with self._lock:
+            self._metrics[name] = CallbackGauge(name, documentation, fn, labelnames)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+OPERATION_SECONDS = REGISTRY.histogram("saca_operation_seconds", "Duration of instrumented operations", ["op"])
+OPERATION_ERRORS = REGISTRY.counter("saca_operation_errors_total", "Failed instrumented operations", ["op"])
+STAGE_SECONDS = REGISTRY.histogram("saca_stage_seconds", "Chat pipeline stage duration", ["pipeline", "stage"])
+STAGE_TOTAL = REGISTRY.counter("saca_stage_total", "Chat pipeline stages by outcome", ["pipeline", "stage", "status"])
+CACHE_REQUESTS = REGISTRY.counter("saca_cache_requests_total", "Cache lookups", ["cache", "result"])
+
+
+@contextmanager
+def timed(op: str):
+    """
+    Observe the block's duration under saca_operation_seconds{op} (and as a
+    trace span); count it as an error if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        with tracing.span(op):
+            yield
+    except Exception:
+        OPERATION_ERRORS.inc(op=op)
+        raise
+    finally:
+        OPERATION_SECONDS.observe(time.perf_counter() - start, op=op)
+
+
+def timed_fn(op: str):
+    """Decorator form of timed()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(op):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def error(op: str):
+    """Count a failure that was handled without raising (e.g. an error dict from an HTTP call)."""
+    OPERATION_ERRORS.inc(op=op)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render() -> str:
+    return REGISTRY.render()
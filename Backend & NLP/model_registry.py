@@ -0,0 +1,215 @@
+"""
+The loaded models (intent classifiers, ML1, ML2, Whisper) and their hot swap.
+
+app.py registers each model with a loader that takes an artifact version (a
+checkpoint file, an artifact directory or a Whisper model name) and returns the
+loaded object.
+
+get(name) loads the configured version once. Concurrent first callers wait for
+that one load instead of each reading the artifacts; if it fails they all see
+the same error, and the next call tries again. use(name) is a context manager
+around get(): the caller counts as an in-flight user of the version it got
+until the block ends.
+
+swap(name, version) loads (and warms) the new version beside the old one, which
+keeps serving meanwhile, then publishes it in one assignment. Requests that
+began on the old version finish on it; once its last user has left it is
+retired and its unload hook runs (the Whisper pool drains its worker
+processes). A swap that fails to load leaves the current version serving.
+"""
+
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import log_config
+
+log = log_config.get_logger("models")
+
+MODEL_ADMIN_TOKEN = os.environ.get("MODEL_ADMIN_TOKEN", "")
+
+
+def authorized(header_value, swap=False) -> bool:
+    """/admin/models needs X-Admin-Token when MODEL_ADMIN_TOKEN is set; swaps are off without one."""
+    if not MODEL_ADMIN_TOKEN:
+        return not swap
+    return hmac.compare_digest(header_value or "", MODEL_ADMIN_TOKEN)
+
+
+class SwapInProgressError(Exception):
+    """A load or swap of this model is already running."""
+
+
+class Version:
+    """One loaded artifact version and the requests currently using it."""
+
+    def __init__(self, version, value, load_s):
+        self.version = version
+        self.value = value
+        self.load_s = load_s
+        self.loaded_at = time.time()
+        self.users = 0
+        self.retired = False
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "users": self.users,
+                "load_s": round(self.load_s, 3), "loaded_at": self.loaded_at}
+
+
+class ManagedModel:
+    def __init__(self, name, load, version, versions=None, warm=None, publish=None, unload=None, describe=None):
+        self.name = name
+        self.load = load          # version -> loaded object
+        self.version = version    # configured version; the current one once loaded
+        self.versions = versions  # () -> versions a swap may name, or None for any
+        self.warm = warm          # dummy inference: on a swapped-in version before it is published, and at warm-up
+        self.publish = publish    # called with the new object as it becomes current
+        self.unload = unload      # called with a retired object once its last user has left
+        self.describe = describe  # object -> extra status fields
+        self.current = None
+        self.retiring = []
+        self.swaps = 0
+        self.error = None
+        self._attempts = 0
+        self._lock = threading.Lock()       # current, retiring and user counts
+        self._load_lock = threading.Lock()  # one load or swap at a time
+
+    def _load(self, version) -> Version:
+        start = time.perf_counter()
+        value = self.load(version)
+        return Version(version, value, time.perf_counter() - start)
+
+    def get(self) -> Version:
+        """The current version, loading the configured one if nothing has loaded yet (single-flight)."""
+        current = self.current
+        if current is not None:
+            return current
+        attempt = self._attempts
+        with self._load_lock:
+            if self.current is not None:
+                return self.current
+            if self._attempts != attempt and self.error is not None:
+                # the load this caller waited on failed; share its error instead of repeating it
+                raise self.error
+            self._attempts += 1
+            try:
+                loaded = self._load(self.version)
+            except Exception as e:
+                self.error = e
+                raise
+            self.error = None
+            with self._lock:
+                self.current = loaded
+                if self.publish is not None:
+                    self.publish(loaded.value)
+            log.info("%s loaded version %s in %.2fs", self.name, loaded.version, loaded.load_s)
+            return loaded
+
+    @contextmanager
+    def use(self):
+        self.get()
+        with self._lock:
+            held = self.current
+            held.users += 1
+        try:
+            yield held.value
+        finally:
+            with self._lock:
+                held.users -= 1
+                drained = held.retired and held.users == 0
+                if drained:
+                    self.retiring.remove(held)
+            if drained:
+                self._retire(held)
+
+    def swap(self, version) -> Version:
+        if self.versions is not None and version not in self.versions():
+            raise ValueError(f"{self.name}: unknown version {version!r}")
+        if not self._load_lock.acquire(blocking=False):
+            raise SwapInProgressError(f"{self.name}: a load or swap is already in progress")
+        try:
+            try:
+                loaded = self._load(version)
+                if self.warm is not None:
+                    self.warm(loaded.value)
+            except Exception as e:
+                self.error = e
+                log.warning("%s: swap to version %s failed, keeping %s: %s", self.name, version,
+                            self.current.version if self.current is not None else "nothing", e)
+                raise
+            with self._lock:
+                old, self.current = self.current, loaded
+                self.version = version
+                self.swaps += 1
+                if self.publish is not None:
+                    self.publish(loaded.value)
+                retire_now = old is not None and not old.users
+                draining = old.users if old is not None else 0
+                if old is not None:
+                    old.retired = True
+                    if old.users:
+                        self.retiring.append(old)
+            self.error = None
+        finally:
+            self._load_lock.release()
+        log.info("%s swapped to version %s (load %.2fs)%s", self.name, version, loaded.load_s,
+                 f", {old.version} draining {draining} users" if draining else "")
+        if retire_now:
+            self._retire(old)  # otherwise the last use() to leave retires it
+        return loaded
+
+    def _retire(self, old):
+        log.info("%s version %s retired", self.name, old.version)
+        if self.unload is not None:
+            try:
+                self.unload(old.value)
+            except Exception as e:
+                log.warning("%s: unloading version %s failed: %s", self.name, old.version, e)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            current = self.current.to_dict() if self.current is not None else None
+            retiring = [v.to_dict() for v in self.retiring]
+        out = {"version": self.version, "loaded": current is not None, "current": current,
+               "retiring": retiring, "swaps": self.swaps}
+        if current is not None and self.describe is not None:
+            out.update(self.describe(self.current.value))
+        if self.error is not None:
+            out["error"] = f"{type(self.error).__name__}: {self.error}"
+        if self.versions is not None:
+            out["available"] = sorted(self.versions())
+        return out
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._models = {}
+
+    def register(self, name, load, version, **hooks) -> ManagedModel:
+        self._models[name] = ManagedModel(name, load, version, **hooks)
+        return self._models[name]
+
+    def __contains__(self, name):
+        return name in self._models
+
+    def model(self, name) -> ManagedModel:
+        return self._models[name]
+
+    def get(self, name):
+        """The current object for `name`, without counting the caller as a user."""
+        return self._models[name].get().value
+
+    def use(self, name):
+        """`with registry.use(name) as model:` holds that version until the block ends."""
+        return self._models[name].use()
+
+    def swap(self, name, version) -> Version:
+        return self._models[name].swap(version)
+
+    def report(self) -> dict:
+        return {name: m.to_dict() for name, m in self._models.items()}
+
+
+registry = ModelRegistry()
@@ -0,0 +1,399 @@
+"""
+Declarative stage pipelines for chat turns.
+
+A Stage names the context values it reads (inputs), the values it writes
+(outputs, default: its own name) and where it runs:
+  "inline"   on whichever thread finished its last dependency (cheap glue),
+  "thread"   the shared I/O thread pool (PIPELINE_THREADS),
+  "process"  the shared process pool (fn and inputs must be picklable),
+  any other name registered in STAGE_WORKERS (e.g. "asr", "route", "audio").
+A stage may also be cacheable (per-stage LRU keyed by its inputs; only OK
+results are stored, and a `cache_valid` check can reject a stale hit), have a
+timeout, and run only `when` a context value is truthy. Stage durations,
+outcomes and cache lookups are recorded in metrics.py. Inside a traced request,
+each run is a span and each stage is a child span. The stage span is current
+while the stage runs, so nested operations attach under it.
+
+A Pipeline wires stages together by matching inputs to outputs and runs every
+stage as soon as its inputs exist, so independent stages overlap. Execution is
+callback driven: start() returns immediately and no thread waits on the
+pipeline except run() callers. Each run records a trace (status, start and
+duration per stage) and per-stage timings.
+
+Input semantics:
+  inputs    required; if a producer was skipped, failed or timed out, the stage is skipped
+  optional  passed as None when unavailable; the stage still runs
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import log_config
+import metrics
+import tracing
+
+log = log_config.get_logger("pipeline")
+
+PIPELINE_THREADS = int(os.environ.get("PIPELINE_THREADS", "8"))
+PIPELINE_PROCESSES = int(os.environ.get("PIPELINE_PROCESSES", "2"))
+
+# Named single-purpose pools. "route" is single-threaded on purpose: the chatbot's
+# dialog state is process-global, so turns must not interleave inside route_message.
+STAGE_WORKERS = {
+    "asr": int(os.environ.get("PIPELINE_ASR_WORKERS", "4")),
+    "route": 1,
+    "audio": int(os.environ.get("PIPELINE_TTS_WORKERS", "2")),
+}
+
+OK, CACHED, SKIPPED, FAILED, TIMEOUT = "ok", "cached", "skipped", "failed", "timeout"
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def executor(name: str):
+    """Shared executor for a stage's `executor` name (None for inline)."""
+    if name == "inline":
+        return None
+    with _executors_lock:
+        if name not in _executors:
+            if name == "process":
+                _executors[name] = ProcessPoolExecutor(max_workers=max(1, PIPELINE_PROCESSES))
+            elif name == "thread":
+                _executors[name] = ThreadPoolExecutor(max_workers=max(1, PIPELINE_THREADS),
+                                                      thread_name_prefix="stage")
+            elif name in STAGE_WORKERS:
+                _executors[name] = ThreadPoolExecutor(max_workers=max(1, STAGE_WORKERS[name]),
+                                                      thread_name_prefix=f"stage-{name}")
+            else:
+                raise ValueError(f"Unknown stage executor '{name}'")
+        return _executors[name]
+
+
+def _after_fork():
+    """Pools made before a fork have no threads or processes in the child; start over lazily."""
+    global _executors_lock
+    _executors.clear()
+    _executors_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _timed_call(fn, kwargs, span=None):
+    """Run fn(**kwargs) and report (result, error, ms). Module-level so it pickles for "process"."""
+    token = tracing.activate(span) if span is not None else None
+    start = time.perf_counter()
+    try:
+        return fn(**kwargs), None, (time.perf_counter() - start) * 1000.0
+    except Exception as e:
+        return None, e, (time.perf_counter() - start) * 1000.0
+    finally:
+        if token is not None:
+            tracing.deactivate(token)
+
+
+class StageCache:
+    """Thread-safe LRU for one stage's results, keyed by its inputs."""
+
+    def __init__(self, maxsize):
+        self.maxsize = int(maxsize)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kwargs):
+        return json.dumps(kwargs, sort_keys=True, default=str)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def footprint(self):
+        """stats() plus the cached entries, for memstats."""
+        stats = self.stats()
+        with self._lock:
+            return dict(stats, objects=list(self._data.items()))
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), optional=(), outputs=None, executor="inline",
+                 cache=0, cache_valid=None, timeout=None, when=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.optional = tuple(optional)
+        self.outputs = tuple(outputs) if outputs else (name,)
+        self.executor = executor
+        self.cache = StageCache(cache) if cache else None
+        self.cache_valid = cache_valid  # value -> bool; a hit it rejects is dropped and recomputed
+        self.timeout = timeout
+        self.when = when
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {self.inputs} -> {self.outputs}, executor={self.executor!r})"
+
+
+class Pipeline:
+    """An ordered stage list with its dependency graph resolved from inputs/outputs."""
+
+    def __init__(self, name, stages, params=()):
+        self.name = name
+        self.stages = list(stages)
+        self.params = tuple(params)
+        names = [st.name for st in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"{name}: duplicate stage names")
+        producers = {}
+        for st in self.stages:
+            for out in st.outputs:
+                if out in producers or out in self.params:
+                    raise ValueError(f"{name}: '{out}' is produced twice")
+                producers[out] = st.name
+        self.producers = producers
+        self.deps = {}
+        for st in self.stages:
+            reads = st.inputs + st.optional + ((st.when,) if st.when else ())
+            for key in st.inputs + ((st.when,) if st.when else ()):
+                if key not in producers and key not in self.params:
+                    raise ValueError(f"{name}: stage '{st.name}' needs '{key}' which nothing provides")
+            self.deps[st.name] = {producers[k] for k in reads if k in producers}
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        seen, done = set(), set()
+
+        def visit(n):
+            if n in done:
+                return
+            if n in seen:
+                raise ValueError(f"{self.name}: stage dependency cycle through '{n}'")
+            seen.add(n)
+            for d in self.deps[n]:
+                visit(d)
+            done.add(n)
+
+        for st in self.stages:
+            visit(st.name)
+
+    def start(self, params, on_done=None):
+        """Begin a run; returns the PipelineRun immediately."""
+        run = PipelineRun(self, params, on_done)
+        run._advance()
+        return run
+
+    def run(self, params, on_done=None, timeout=None):
+        """Run to completion on the caller's thread (plus the stage executors)."""
+        run = self.start(params, on_done)
+        run.wait(timeout)
+        return run
+
+    def cache_stats(self):
+        return {st.name: st.cache.stats() for st in self.stages if st.cache}
+
+
+class PipelineRun:
+    """State of one pipeline execution: context values, per-stage status and trace."""
+
+    def __init__(self, pipeline, params, on_done=None):
+        self.pipeline = pipeline
+        self.values = dict(params)
+        self.status = {}
+        self.errors = {}
+        self.trace = []
+        self._on_done = on_done
+        self._started = set()
+        self._timers = {}
+        self._callbacks = []
+        self._lock = threading.RLock()
+        self._finished = threading.Event()
+        self._t0 = time.perf_counter()
+        self.total_ms = None
+        parent = tracing.current()
+        self._span = parent.child(pipeline.name, kind="pipeline") if parent is not None else None
+        self._stage_spans = {}
+
+    # ---------------- public ----------------
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def add_done_callback(self, fn):
+        """fn(run) once every stage has finished (immediately if already done)."""
+        with self._lock:
+            if not self.done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def available(self, key) -> bool:
+        if key in self.pipeline.params:
+            return key in self.values
+        return self.status.get(self.pipeline.producers.get(key)) in (OK, CACHED)
+
+    def first_error(self):
+        """The first exception recorded (in stage order), or None."""
+        for st in self.pipeline.stages:
+            if st.name in self.errors:
+                return self.errors[st.name]
+        return None
+
+    @property
+    def timings(self) -> dict:
+        with self._lock:
+            out = {t["stage"]: t["ms"] for t in self.trace if t["status"] in (OK, CACHED, FAILED, TIMEOUT)}
+        out["total"] = self.total_ms if self.total_ms is not None else round(self._elapsed(), 1)
+        return out
+
+    # ---------------- engine ----------------
+    def _elapsed(self):
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def _advance(self):
+        with self._lock:
+            ready = []
+            for st in self.pipeline.stages:
+                if st.name in self._started:
+                    continue
+                if all(d in self.status for d in self.pipeline.deps[st.name]):
+                    self._started.add(st.name)
+                    ready.append(st)
+            finished = not ready and len(self.status) == len(self.pipeline.stages) and not self.done
+        for st in ready:
+            self._launch(st)
+        if finished:
+            self._finish()
+
+    def _launch(self, st):
+        start_ms = self._elapsed()
+        span = None
+        if self._span is not None:
+            span = self._stage_spans[st.name] = self._span.child(st.name, executor=st.executor)
+        with self._lock:
+            missing = [k for k in st.inputs if not self.available(k)]
+            kwargs = {k: self.values.get(k) for k in st.inputs}
+            kwargs.update({k: (self.values.get(k) if self.available(k) else None) for k in st.optional})
+            skip_when = st.when is not None and not (self.available(st.when) and self.values.get(st.when))
+        if missing or skip_when:
+            reason = f"missing {missing}" if missing else f"{st.when} is false"
+            self._complete(st, None, None, 0.0, start_ms, SKIPPED, reason)
+            return
+        key = None
+        if st.cache is not None:
+            key = StageCache.key(kwargs)
+            hit, value = st.cache.get(key)
+            if hit and st.cache_valid is not None and not st.cache_valid(value):
+                st.cache.discard(key)
+                hit = False
+            metrics.cache_lookup(f"stage:{st.name}", hit)
+            if span is not None:
+                span.attrs["cache"] = "hit" if hit else "miss"
+            if hit:
+                self._complete(st, value, None, 0.0, start_ms, CACHED)
+                return
+        pool = executor(st.executor)
+        if pool is None:
+            self._complete(st, *_timed_call(st.fn, kwargs, span), start_ms, cache_key=key)
+            return
+        if st.timeout:
+            timer = threading.Timer(st.timeout, self._complete,
+                                    args=(st, None, TimeoutError(f"{st.name} timed out after {st.timeout}s"),
+                                          st.timeout * 1000.0, start_ms, TIMEOUT))
+            timer.daemon = True
+            with self._lock:
+                self._timers[st.name] = timer
+            timer.start()
+        # spans can't cross into another process
+        fut = pool.submit(_timed_call, st.fn, kwargs, None if st.executor == "process" else span)
+        fut.add_done_callback(lambda f: self._complete(st, *self._future_result(f), start_ms, cache_key=key))
+
+    @staticmethod
+    def _future_result(fut):
+        try:
+            return fut.result()
+        except Exception as e:  # e.g. BrokenProcessPool / pickling errors
+            return None, e, 0.0
+
+    def _complete(self, st, result, error, ms, start_ms, status=None, reason=None, cache_key=None):
+        with self._lock:
+            if st.name in self.status:
+                return  # already timed out (or completed)
+            timer = self._timers.pop(st.name, None)
+            if timer is not None:
+                timer.cancel()
+            status = status or (FAILED if error is not None else OK)
+            entry = {"stage": st.name, "status": status, "executor": st.executor,
+                     "start_ms": round(start_ms, 1), "ms": round(ms, 1)}
+            if status in (OK, CACHED):
+                if len(st.outputs) == 1:
+                    self.values[st.outputs[0]] = result
+                else:
+                    for out in st.outputs:
+                        self.values[out] = (result or {}).get(out)
+            elif error is not None:
+                self.errors[st.name] = error
+                entry["error"] = str(error)
+            if reason:
+                entry["reason"] = reason
+            self.trace.append(entry)
+            self.status[st.name] = status
+            span = self._stage_spans.get(st.name)
+        if span is not None:
+            span.finish(status=status, **({"reason": reason} if reason else {}))
+        metrics.STAGE_TOTAL.inc(pipeline=self.pipeline.name, stage=st.name, status=status)
+        if status in (OK, FAILED, TIMEOUT):
+            metrics.STAGE_SECONDS.observe(ms / 1000.0, pipeline=self.pipeline.name, stage=st.name)
+        if error is not None:
+            log.error("%s: stage '%s' %s: %s", self.pipeline.name, st.name, status, error)
+        if status == OK and cache_key is not None:
+            st.cache.put(cache_key, result)
+        if status in (OK, CACHED) and self._on_done:
+            try:
+                self._on_done(st.name, self)
+            except Exception as e:
+                log.error("%s: on_done for '%s' failed: %s", self.pipeline.name, st.name, e)
+        self._advance()
+
+    def _finish(self):
+        with self._lock:
+            if self.done:
+                return
+            self.total_ms = round(self._elapsed(), 1)
+            if self._span is not None:
+                self._span.finish()
+            self._finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                log.error("%s: completion callback failed: %s", self.pipeline.name, e)
@@ -0,0 +1,211 @@
+"""
+On-demand sampling profiler for individual requests.
+
+Off by default. A traced chat/transcribe/fusion request is profiled when:
+  - PROFILE_SAMPLE_RATE > 0 and the request is sampled (e.g. 0.01 = 1%), or
+  - PROFILE_TOKEN is set and the request sends "X-Profile: <token>".
+
+While a request is profiled, a single background thread reads the Python
+stack of every thread working for it every PROFILE_INTERVAL_MS. That covers
+the request thread and any pipeline stage threads. tracing.py tells us when a
+request's span is activated on a worker thread. Nothing is sampled while no
+profile is active.
+
+Each profile is written to PROFILE_DIR as collapsed stacks ("a;b;c 12" per
+line). flamegraph.pl, inferno and speedscope read this format directly. Only
+the newest PROFILE_KEEP files are kept. The response carries X-Profile-Id, and
+GET /debug/profiles lists recent profiles. Listing and downloading profiles
+needs "X-Profile: <token>", so both are off while PROFILE_TOKEN is unset (the
+files are still written and can be read from PROFILE_DIR).
+"""
+
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import log_config
+import memstats
+import tracing
+
+log = log_config.get_logger("profiler")
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "instance", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+PROFILE_MAX_DEPTH = 96
+
+SUFFIX = ".folded"
+_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def enabled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+
+
+def should_profile(header_value) -> bool:
+    if authorized(header_value):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def authorized(header_value) -> bool:
+    """Whether header_value is the profile token; always False while PROFILE_TOKEN is unset."""
+    if not PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(header_value or "", PROFILE_TOKEN)
+
+
+class Profile:
+    def __init__(self, label):
+        self.label = label
+        self.stacks = Counter()
+        self.samples = 0
+        self.threads = Counter()  # thread ident -> activation depth
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.name = None
+
+
+_lock = threading.Lock()
+_by_root = {}       # id(root span) -> Profile
+_wake = threading.Event()
+_sampler = None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        names.append(_frame_label(frame))
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def _sample_loop():
+    own = threading.get_ident()
+    while True:
+        with _lock:
+            profiles = list(_by_root.values())
+            if not profiles:
+                _wake.clear()
+        if not profiles:
+            _wake.wait()
+            continue
+        frames = sys._current_frames()
+        with _lock:
+            for profile in profiles:
+                for ident in list(profile.threads):
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own:
+                        profile.stacks[_fold(frame)] += 1
+                profile.samples += 1
+        del frames
+        time.sleep(PROFILE_INTERVAL_MS / 1000.0)
+
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="profiler-sampler", daemon=True)
+            _sampler.start()
+
+
+def _on_activate(span, active):
+    if not _by_root:
+        return
+    ident = threading.get_ident()
+    with _lock:
+        profile = _by_root.get(id(span.root))
+        if profile is None:
+            return
+        if active:
+            profile.threads[ident] += 1
+        else:
+            profile.threads[ident] -= 1
+            if profile.threads[ident] <= 0:
+                del profile.threads[ident]
+
+
+tracing.add_activation_hook(_on_activate)
+memstats.register("disk.profiles", "disk", lambda: memstats.directory_usage(PROFILE_DIR, ("", SUFFIX)))
+
+
+def start(root, label) -> Profile:
+    """Profile the request whose trace is rooted at `root`, starting on this thread."""
+    _ensure_sampler()
+    profile = Profile(label)
+    with _lock:
+        profile.threads[threading.get_ident()] = 1
+        _by_root[id(root)] = profile
+    _wake.set()
+    return profile
+
+
+def stop(root):
+    """Stop sampling and write the profile; returns its name (None if nothing was sampled)."""
+    with _lock:
+        profile = _by_root.pop(id(root), None)
+    if profile is None:
+        return None
+    duration_ms = (time.perf_counter() - profile.start) * 1000.0
+    if not profile.stacks:
+        return None
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(profile.started_at))
+    profile.name = f"{stamp}-{_NAME_RE.sub('_', profile.label).strip('_')}-{int(duration_ms)}ms-{os.getpid()}-{random.randrange(1 << 16):04x}"
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, profile.name + SUFFIX), "w", encoding="utf-8") as f:
+            for stack, count in profile.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        _rotate()
+    except OSError as e:
+        log.warning("Could not write profile %s: %s", profile.name, e)
+        return None
+    log.info("Profile %s written (%d samples)", profile.name, profile.samples)
+    return profile.name
+
+
+def _rotate():
+    files = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(SUFFIX))
+    for old in files[:max(0, len(files) - PROFILE_KEEP)]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, old))
+        except OSError:
+            pass
+
+
+def recent(limit=PROFILE_KEEP) -> list:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for fname in sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith(SUFFIX)), reverse=True)[:limit]:
+        path = os.path.join(PROFILE_DIR, fname)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        out.append({"id": fname[:-len(SUFFIX)], "bytes": st.st_size,
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(st.st_mtime))})
+    return out
+
+
+def path_for(profile_id):
+    """Path of a stored profile, or None (ids are validated, never joined blindly)."""
+    if not profile_id or _NAME_RE.search(profile_id) or profile_id.startswith("."):
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + SUFFIX)
+    return path if os.path.isfile(path) else None
@@ -5,6 +5,9 @@ from werkzeug.security import generate_password_hash
 import models
 from models import User, Prediction
 import re
+import log_config
+
+log = log_config.get_logger("auth")
 
 # Create namespace for authentication
 auth_ns = Namespace('auth', description='Authentication operations')
@@ -45,11 +48,11 @@ class Register(Resource):
     def post(self):
         """Register a new user"""
         data = request.get_json()
-        print(f"Registration request received: {data}")
+        log.debug("Registration request received for username: %s", (data or {}).get('username'))
         
         # Validate required fields
         if not data.get('username') or not data.get('email') or not data.get('password'):
-            print("Missing required fields")
+            log.debug("Missing required fields")
             return {'message': 'Username, email, and password are required'}, 400
         
         # Validate email format
@@ -84,14 +87,14 @@ class Register(Resource):
             # Generate token
             access_token = user.generate_token()
             
-            print(f"User created successfully: {user.username}")
+            log.info("User created successfully: %s", user.username)
             return {
                 'access_token': access_token,
                 'user': user.to_dict()
             }, 201
             
         except Exception as e:
-            print(f"Registration error: {e}")
+            log.error("Registration error: %s", e)
             models.db.session.rollback()
             return {'message': f'Registration failed: {str(e)}'}, 500
 
@@ -102,10 +105,10 @@ class Login(Resource):
     def post(self):
         """Login user"""
         data = request.get_json()
-        print(f"Login request received: {data}")
+        log.debug("Login request received for: %s", (data or {}).get('username'))
         
         if not data.get('username') or not data.get('password'):
-            print("Missing username or password")
+            log.debug("Missing username or password")
             return {'message': 'Username and password are required'}, 400
         
         # Find user by username or email
@@ -113,10 +116,10 @@ class Login(Resource):
             (User.username == data['username']) | (User.email == data['username'])
         ).first()
         
-        print(f"User found: {user.username if user else 'None'}")
+        log.debug("User found: %s", user.username if user else 'None')
         
         if not user or not user.check_password(data['password']):
-            print("Invalid credentials")
+            log.debug("Invalid credentials")
             return {'message': 'Invalid credentials'}, 401
         
         if not user.is_active:
@@ -125,7 +128,7 @@ class Login(Resource):
         # Generate token
         access_token = user.generate_token()
         
-        print(f"Login successful for user: {user.username}")
+        log.info("Login successful for user: %s", user.username)
         return {
             'access_token': access_token,
             'user': user.to_dict()
@@ -139,18 +142,18 @@ class Profile(Resource):
         """Get current user profile"""
         try:
             current_user_id = int(get_jwt_identity())
-            print(f"Profile request for user ID: {current_user_id}")
+            log.debug("Profile request for user ID: %s", current_user_id)
             
             user = User.query.get(current_user_id)
             
             if not user:
-                print(f"User not found for ID: {current_user_id}")
+                log.debug("User not found for ID: %s", current_user_id)
                 return {'message': 'User not found'}, 404
             
-            print(f"Profile data for user: {user.username}")
+            log.debug("Profile data for user: %s", user.username)
             return user.to_dict(), 200
         except Exception as e:
-            print(f"Profile endpoint error: {e}")
+            log.error("Profile endpoint error: %s", e)
             return {'message': f'Profile error: {str(e)}'}, 500
     
     @jwt_required()
@@ -226,7 +229,7 @@ class Predictions(Resource):
             }, 200
             
         except Exception as e:
-            print(f"Error fetching predictions: {e}")
+            log.error("Error fetching predictions: %s", e)
             return {'message': f'Error fetching predictions: {str(e)}'}, 500
 
 @auth_ns.route('/predictions/<int:prediction_id>')
@@ -254,6 +257,6 @@ class PredictionDetail(Resource):
             return {'message': 'Prediction deleted successfully'}, 200
             
         except Exception as e:
-            print(f"Error deleting prediction: {e}")
+            log.error("Error deleting prediction: %s", e)
             models.db.session.rollback()
             return {'message': f'Error deleting prediction: {str(e)}'}, 500
@@ -0,0 +1,233 @@
+"""
+Production serving: a preforked gunicorn master that loads the models once and
+shares them with its workers copy-on-write.
+
+gunicorn.conf.py calls prefork_master() before anything imports torch or numpy,
+then gunicorn imports app.py once in the master (preload_app). gunicorn reads
+./gunicorn.conf.py on its own when started from this directory. Started
+elsewhere without -c, `gunicorn --preload wsgi:application` gets the same
+through wsgi.py: it finds the preloading master with preload_arbiter() and
+installs the config file's when_ready / post_fork hooks (without the
+memory-based pool sizing). Without --preload every worker imports the app
+itself after the fork, and none of this applies.
+app.py sees `prefork` set and finishes the warm-up there, except for the
+components named in PREFORK_DEFER: Whisper (CTranslate2) starts native threads
+as it loads and they do not survive a fork, so each worker loads it itself
+after the fork. The worker processes are then forked from the master with the
+intent classifiers, ML1/ML2, the glossary and the clip index already in memory;
+their pages stay shared until a worker writes to them. when_ready() calls
+gc.freeze() first, so the workers' garbage collector does not touch (and copy)
+every object the master loaded.
+
+Torch and the BLAS libraries run single-threaded in the master: an OpenMP pool
+started before fork() leaves the child hanging the first time it is used.
+after_fork() applies the thread budget (cpu_budget.py) over each worker's share
+of the cores and restarts what a fork leaves behind (log writer, executors, DB
+pools and the Whisper pool reset themselves through os.register_at_fork hooks
+in their modules).
+
+The chatbot keeps one process-global dialog state per language (see pipeline.py,
+the "route" executor). With several workers a conversation's turns land on
+different processes, so SharedDialogState keeps that one state in an anonymous
+shared mapping created before the fork and moves it in and out around each
+turn, one worker at a time.
+
+Sizing (plan()): one worker per core, capped by how many WEB_WORKER_MEMORY_MB
+slices fit in the memory still available, and 2 * cores-per-worker + 2 threads
+per worker (requests mostly wait on Whisper, the DB or the route executor).
+
+Environment:
+  WEB_WORKERS           worker processes (0 = from cores and memory)
+  WEB_THREADS           threads per worker (0 = from cores per worker)
+  WEB_WORKER_MEMORY_MB  private memory one worker grows to beyond what it shares (default 400)
+  PREFORK_DEFER         warm-up components each worker loads after the fork (default whisper)
+"""
+
+import atexit
+import fcntl
+import json
+import mmap
+import os
+import random
+import sys
+import tempfile
+import threading
+
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "0"))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "0"))
+WEB_WORKER_MEMORY_MB = int(os.environ.get("WEB_WORKER_MEMORY_MB", "400"))
+PREFORK_DEFER = {n.strip() for n in os.environ.get("PREFORK_DEFER", "whisper").split(",") if n.strip()}
+DIALOG_STATE_BYTES = 64 * 1024
+
+THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+prefork = False
+_thread_env = {}
+
+
+def prefork_master():
+    """Mark this process as a prefork master and keep native thread pools out of it until the fork."""
+    global prefork
+    if prefork:
+        return
+    prefork = True
+    for var in THREAD_VARS:
+        _thread_env[var] = os.environ.get(var)
+        os.environ[var] = "1"
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def preload_arbiter():
+    """gunicorn's Arbiter while its master is importing the app (preload_app), else None (workers, other servers)."""
+    arbiter = sys.modules.get("gunicorn.arbiter")
+    if arbiter is None:
+        return None
+    base = sys.modules.get("gunicorn.workers.base")
+    frame = sys._getframe(1)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if base is not None and isinstance(owner, base.Worker):
+            return None  # a worker loading the app after the fork (Arbiter frames sit below it)
+        if isinstance(owner, arbiter.Arbiter):
+            return owner
+        frame = frame.f_back
+    return None
+
+
+def _cgroup_cpus():
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def cpu_count() -> int:
+    """Cores this process may run on: its affinity mask, capped by a cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpus()
+    return min(cpus, quota) if quota else cpus
+
+
+def memory_available():
+    """Bytes that can still be allocated (MemAvailable, or the cgroup limit's headroom), or None."""
+    available = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        with open("/sys/fs/cgroup/memory.current") as f:
+            used = int(f.read())
+        if limit != "max":
+            headroom = max(0, int(limit) - used)
+            available = headroom if available is None else min(available, headroom)
+    except (OSError, ValueError):
+        pass
+    return available
+
+
+def plan(cpus=None, available=None) -> dict:
+    """Worker processes and threads per worker for this machine (WEB_WORKERS / WEB_THREADS win)."""
+    cpus = cpus or cpu_count()
+    available = memory_available() if available is None else available
+    workers = WEB_WORKERS
+    if workers <= 0:
+        workers = cpus
+        if available is not None:
+            workers = min(workers, available // (WEB_WORKER_MEMORY_MB * 1024 * 1024))
+    workers = max(1, int(workers))
+    cores = max(1, cpus // workers)
+    threads = WEB_THREADS if WEB_THREADS > 0 else 2 * cores + 2
+    return {"workers": workers, "threads": threads, "cores_per_worker": cores, "cpus": cpus,
+            "memory_available": available}
+
+
+def after_fork(cores_per_worker):
+    """Run in each worker right after the fork: per-worker randomness, thread pools and deferred loads."""
+    random.seed()
+    for var, value in _thread_env.items():
+        if value is None:
+            os.environ.pop(var, None)
+        else:
+            os.environ[var] = value
+    import cpu_budget
+    import warmup
+    cpu_budget.apply(cores_per_worker)
+    warmup.manager.start_deferred()
+
+
+class SharedDialogState:
+    """
+    One dialog-state dict shared by every worker, in a mapping made before the
+    fork. wrap() turns a bot's route_message / reset_state into functions that
+    load the shared state into the bot's dict, run, and store it back.
+
+    Workers take turns through flock() on a lock file, which the kernel releases
+    if a worker dies mid-turn (gunicorn kills a worker past WEB_TIMEOUT).
+    """
+
+    def __init__(self, size=DIALOG_STATE_BYTES):
+        self.size = size
+        self._buf = mmap.mmap(-1, size)
+        fd, self._path = tempfile.mkstemp(prefix="saca-dialog-", suffix=".lock")
+        os.close(fd)
+        self._owner = os.getpid()
+        self._fds = {}                  # pid -> this process's own descriptor (flock is per open file)
+        self._local = threading.Lock()  # flock doesn't exclude threads of the same process
+        atexit.register(self._cleanup)
+
+    def _cleanup(self):
+        if os.getpid() == self._owner:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+    def _fd(self):
+        pid = os.getpid()
+        if pid not in self._fds:
+            self._fds = {pid: os.open(self._path, os.O_RDWR)}
+        return self._fds[pid]
+
+    def _load(self, state):
+        self._buf.seek(0)
+        n = int.from_bytes(self._buf.read(4), "little")
+        if n:
+            state.clear()
+            state.update(json.loads(self._buf.read(n)))
+
+    def _store(self, state):
+        raw = json.dumps(state, default=str).encode("utf-8")
+        if len(raw) + 4 > self.size:
+            raise ValueError(f"dialog state is {len(raw)} bytes, over the {self.size - 4} shared")
+        self._buf.seek(0)
+        self._buf.write(len(raw).to_bytes(4, "little") + raw)
+
+    def wrap(self, fn, state):
+        def shared(*args, **kwargs):
+            with self._local:
+                fd = self._fd()
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    self._load(state)
+                    result = fn(*args, **kwargs)
+                    self._store(state)
+                    return result
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        shared.__wrapped__ = fn
+        return shared
@@ -0,0 +1,167 @@
+"""
+Per-request span trees for the chat endpoints.
+
+app.py opens a trace for each traced request (begin/end). Code on the request
+path marks sections with `with tracing.span("name"):`. metrics.timed() does
+this for every instrumented operation. Pipeline stages become child spans
+even when they run on pool threads, because pipeline.py activates the stage
+span on the worker thread. Cache lookups annotate the span they happen in.
+
+The finished trace is reported as a Server-Timing header (server_timing()).
+With X-Debug-Trace: 1 it is also added to the JSON body as a nested tree
+(to_dict()). Outside a traced request, span() and annotate() do nothing.
+
+Activation hooks (add_activation_hook) are told when a span becomes current
+on a thread and when it stops being current. profiler.py uses them to follow
+a request onto pipeline worker threads.
+"""
+
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("saca_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "children", "start", "end", "root", "_lock", "_token")
+
+    def __init__(self, name, attrs=None, root=None):
+        self.name = name
+        self.root = root or self
+        self.attrs = dict(attrs or {})
+        self.children = []
+        self.start = time.perf_counter()
+        self.end = None
+        self._lock = threading.Lock()
+        self._token = None
+
+    def child(self, name, **attrs) -> "Span":
+        span = Span(name, attrs, self.root)
+        with self._lock:
+            self.children.append(span)
+        return span
+
+    def finish(self, **attrs):
+        if attrs:
+            self.attrs.update(attrs)
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000.0
+
+    def to_dict(self, origin=None) -> dict:
+        origin = self.start if origin is None else origin
+        out = {"name": self.name, "start_ms": round((self.start - origin) * 1000.0, 1), "ms": round(self.ms, 1)}
+        if self.attrs:
+            out["attrs"] = dict(self.attrs)
+        with self._lock:
+            children = list(self.children)
+        if children:
+            out["children"] = [c.to_dict(origin) for c in sorted(children, key=lambda c: c.start)]
+        return out
+
+
+def current():
+    return _current.get()
+
+
+_activation_hooks = []
+
+
+def add_activation_hook(fn):
+    """fn(span, active) runs on the thread where span is activated/deactivated."""
+    _activation_hooks.append(fn)
+
+
+def activate(span):
+    """Make span current on this thread; returns a token for deactivate()."""
+    token = _current.set(span)
+    if span is not None:
+        for hook in _activation_hooks:
+            hook(span, True)
+    return token
+
+
+def deactivate(token):
+    span = _current.get()
+    _current.reset(token)
+    if span is not None:
+        for hook in _activation_hooks:
+            hook(span, False)
+
+
+def begin(name: str) -> Span:
+    """Start a trace rooted at a new span (one per request)."""
+    root = Span(name)
+    root._token = _current.set(root)
+    return root
+
+
+def end(root: Span):
+    root.finish()
+    token, root._token = root._token, None
+    if token is not None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            _current.set(None)  # finished on a different context (e.g. teardown)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, **attrs)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.attrs["error"] = str(e)
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def annotate(**attrs):
+    """Attach attributes (e.g. cache hit/miss) to the current span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.attrs.update(attrs)
+
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def server_timing(root: Span) -> str:
+    """
+    Server-Timing value: one metric per top-level section, with pipeline
+    wrappers expanded into their stages (durations of same-named spans are
+    summed), then total.
+    """
+    totals, order = {}, []
+
+    def add(s):
+        name = _TOKEN_RE.sub("_", s.name)
+        if name not in totals:
+            order.append(name)
+            totals[name] = 0.0
+        totals[name] += s.ms
+
+    for s in list(root.children):
+        if s.attrs.get("kind") == "pipeline":
+            for stage in list(s.children):
+                if stage.attrs.get("status") != "skipped":
+                    add(stage)
+        else:
+            add(s)
+    parts = [f"{n};dur={totals[n]:.1f}" for n in order]
+    parts.append(f"total;dur={root.ms:.1f}")
+    return ", ".join(parts)
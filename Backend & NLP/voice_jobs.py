@@ -0,0 +1,192 @@
+"""
+Asynchronous chat turns (voice jobs and streamed /api/chat/ responses).
+
+Submitting a recording returns a job id at once; the turn's pipeline (see
+pipeline.py) runs in the background and every finished stage is appended to the
+job as an event. Clients either poll
+GET /api/chat/jobs/<id>?since=N or follow GET /api/chat/jobs/<id>/events
+(Server-Sent Events). No request thread is held while the turn is processed.
+/api/chat/?stream=ndjson|sse runs a turn the same way and streams its events
+on the response itself.
+
+Pipelines are callback driven, so a job only occupies a thread in the executor
+of the stage that is currently running.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import memstats
+
+VOICE_JOB_TTL_S = int(os.environ.get("VOICE_JOB_TTL_S", "600"))          # finished jobs kept this long
+VOICE_JOB_MAX_ACTIVE = int(os.environ.get("VOICE_JOB_MAX_ACTIVE", "64"))  # unfinished jobs before 503
+VOICE_JOB_RETRY_AFTER = 2
+SSE_HEARTBEAT_S = 15
+
+
+class JobQueueFullError(Exception):
+    """Too many unfinished jobs; surfaced as 503 + Retry-After."""
+
+    status_code = 503
+
+    def __init__(self, message="Too many voice turns in progress, please retry shortly",
+                 retry_after=VOICE_JOB_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Job:
+    """One chat turn: status, ordered stage events and the final response."""
+
+    def __init__(self, kind="voice"):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.created = time.time()
+        self.finished_at = None
+        self.status = "queued"
+        self.events = []
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    def _append(self, stage, data):
+        self.events.append({
+            "seq": len(self.events) + 1,
+            "stage": stage,
+            "elapsed_ms": int((time.time() - self.created) * 1000),
+            "data": data if data is not None else {},
+        })
+        self._cond.notify_all()
+
+    def emit(self, stage: str, data=None):
+        with self._cond:
+            if self.done:
+                return
+            self.status = "running"
+            self._append(stage, data)
+
+    def finish(self, result):
+        with self._cond:
+            if self.done:
+                return
+            self.result = result
+            self.status = "done"
+            self.finished_at = time.time()
+            self._append("done", result)
+
+    def fail(self, message, status_code=500):
+        with self._cond:
+            if self.done:
+                return
+            self.error = str(message)
+            self.error_status = status_code
+            self.status = "error"
+            self.finished_at = time.time()
+            self._append("error", {"message": self.error, "status": status_code})
+
+    def wait(self, since=0, timeout=None) -> list:
+        """Block until there are events after `since` (or the job ends); returns them."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > since or self.done, timeout)
+            return list(self.events[since:])
+
+    def to_dict(self, since=0) -> dict:
+        with self._cond:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "events": list(self.events[since:]),
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobStore:
+    """In-memory job table with a cap on unfinished jobs and TTL for finished ones."""
+
+    def __init__(self, ttl_s=VOICE_JOB_TTL_S, max_active=VOICE_JOB_MAX_ACTIVE):
+        self.ttl_s = ttl_s
+        self.max_active = max_active
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl_s
+        for jid in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[jid]
+
+    def create(self, kind="voice") -> Job:
+        with self._lock:
+            self._purge()
+            if sum(1 for j in self._jobs.values() if not j.done) >= self.max_active:
+                self.rejected += 1
+                raise JobQueueFullError()
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self.submitted += 1
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.done)
+            return {"active": active, "stored": len(self._jobs), "max_active": self.max_active,
+                    "submitted": self.submitted, "rejected": self.rejected}
+
+    def footprint(self) -> dict:
+        """stats() plus the stored jobs (events and results), for memstats."""
+        stats = self.stats()
+        with self._lock:
+            return dict(stats, objects=list(self._jobs.values()))
+
+
+jobs = JobStore()
+memstats.register("jobs.voice", "jobs", lambda: jobs.footprint())
+
+
+def sse_stream(job: Job, since=0):
+    """Server-Sent Events for a job: one event per stage, ends after done/error."""
+    seq = since
+    while True:
+        events = job.wait(seq, timeout=SSE_HEARTBEAT_S)
+        if not events:
+            if job.done:
+                return
+            yield ": keep-alive\n\n"
+            continue
+        for ev in events:
+            seq = ev["seq"]
+            yield f"id: {ev['seq']}\nevent: {ev['stage']}\ndata: {json.dumps(ev, default=str)}\n\n"
+            if ev["stage"] in ("done", "error"):
+                return
+
+
+def ndjson_stream(job: Job, since=0):
+    """Newline-delimited JSON: one line per stage event, ends after done/error."""
+    seq = since
+    while True:
+        events = job.wait(seq, timeout=SSE_HEARTBEAT_S)
+        if not events:
+            if job.done:
+                return
+            yield "\n"  # keep-alive; readers skip blank lines
+            continue
+        for ev in events:
+            seq = ev["seq"]
+            yield json.dumps(ev, default=str) + "\n"
+            if ev["stage"] in ("done", "error"):
+                return
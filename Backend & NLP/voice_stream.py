@@ -0,0 +1,181 @@
+"""
+Streaming (incremental) transcription for voice mode.
+
+The client streams raw PCM16 little-endian mono audio over a WebSocket while the
+patient speaks. StreamingTranscriber:
+- runs the energy VAD from asr_service on every chunk (adaptive noise floor),
+- re-decodes the tail of the utterance every STREAM_PARTIAL_INTERVAL_S for partial
+  transcripts (greedy decode, skipped when ASR is busy),
+- commits text whenever the undecoded tail grows past STREAM_WINDOW_S, cutting at the
+  quietest frame so words aren't split, which keeps each decode bounded,
+- emits the final transcript as soon as trailing silence reaches STREAM_END_SILENCE_MS.
+  If ASR is busy then, the utterance is kept and the final decode is retried on the
+  next chunk or "stop".
+"""
+
+import os
+
+import numpy as np
+
+import asr_service
+
+STREAM_WINDOW_S = float(os.environ.get("STREAM_WINDOW_S", "12"))
+STREAM_PARTIAL_INTERVAL_S = float(os.environ.get("STREAM_PARTIAL_INTERVAL_S", "1.0"))
+STREAM_END_SILENCE_MS = int(os.environ.get("STREAM_END_SILENCE_MS", "800"))
+STREAM_MAX_UTTERANCE_S = float(os.environ.get("STREAM_MAX_UTTERANCE_S", "120"))
+STREAM_PREROLL_MS = 300
+
+SAMPLE_RATE = asr_service.SAMPLE_RATE
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    if len(data) % 2:
+        data = data[:-1]
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Linear-interpolation resample; good enough for speech going into Whisper."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+    n_out = int(round(len(samples) * dst_rate / float(src_rate)))
+    x_old = np.linspace(0.0, 1.0, num=len(samples), endpoint=False)
+    x_new = np.linspace(0.0, 1.0, num=n_out, endpoint=False)
+    return np.interp(x_new, x_old, samples).astype(np.float32)
+
+
+def _join_text(*parts) -> str:
+    return " ".join(p.strip() for p in parts if p and p.strip())
+
+
+class StreamingTranscriber:
+    """Turns a stream of PCM chunks into partial and final transcript events."""
+
+    def __init__(self, language=None, sample_rate=SAMPLE_RATE, transcribe=None):
+        self.language = language
+        self.sample_rate = int(sample_rate)
+        self._transcribe = transcribe or asr_service.transcribe_pcm
+        self._frame = int(SAMPLE_RATE * asr_service.VAD_FRAME_MS / 1000)
+        self._noise_floor = None
+        self._vad_tail = np.zeros(0, dtype=np.float32)
+        self._reset_utterance()
+
+    def _reset_utterance(self):
+        self._preroll = np.zeros(0, dtype=np.float32)
+        self._chunks = []
+        self._utt_len = 0
+        self._in_speech = False
+        self._silence_ms = 0.0
+        self._committed = ""
+        self._offset = 0
+        self._since_partial = 0
+        self._last_partial = ""
+
+    # ---------------- VAD ----------------
+    def _classify(self, samples):
+        """Speech flags for the complete frames in samples (+ leftover from the last chunk)."""
+        buf = np.concatenate([self._vad_tail, samples])
+        usable = (len(buf) // self._frame) * self._frame
+        self._vad_tail = buf[usable:]
+        levels = asr_service.frame_db(buf[:usable])
+        if len(levels) == 0:
+            return np.zeros(0, dtype=bool)
+        if self._noise_floor is None:
+            self._noise_floor = float(np.percentile(levels, 10))
+        mask = asr_service.speech_mask(levels, self._noise_floor)
+        quiet = levels[~mask]
+        if len(quiet):
+            self._noise_floor = 0.9 * self._noise_floor + 0.1 * float(np.mean(quiet))
+        return mask
+
+    # ---------------- buffer helpers ----------------
+    def _utterance(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def _decode(self, samples, beam_size):
+        if len(samples) < self._frame:
+            return ""
+        return self._transcribe(samples, language=self.language, beam_size=beam_size)["text"]
+
+    def _quietest_cut(self, pending: np.ndarray) -> int:
+        """Sample index in the second half of pending with the lowest frame energy."""
+        levels = asr_service.frame_db(pending)
+        half = len(levels) // 2
+        if len(levels) - half <= 0:
+            return len(pending)
+        return (half + int(np.argmin(levels[half:]))) * self._frame
+
+    # ---------------- public API ----------------
+    def feed(self, data) -> list:
+        """Add a chunk (PCM16 bytes or float32 array). Returns a list of events to send back."""
+        samples = pcm16_to_float32(data) if isinstance(data, (bytes, bytearray)) else np.asarray(data, dtype=np.float32)
+        samples = resample(samples, self.sample_rate)
+        if len(samples) == 0:
+            return []
+        mask = self._classify(samples)
+        frame_ms = asr_service.VAD_FRAME_MS
+        if mask.any():
+            last = int(np.flatnonzero(mask)[-1])
+            self._silence_ms = (len(mask) - 1 - last) * frame_ms
+        else:
+            self._silence_ms += len(samples) * 1000.0 / SAMPLE_RATE
+
+        if not self._in_speech:
+            if not mask.any():
+                keep = int(SAMPLE_RATE * STREAM_PREROLL_MS / 1000)
+                self._preroll = np.concatenate([self._preroll, samples])[-keep:]
+                return []
+            self._in_speech = True
+            self._chunks = [self._preroll]
+            self._utt_len = len(self._preroll)
+
+        self._chunks.append(samples)
+        self._utt_len += len(samples)
+        self._since_partial += len(samples)
+        events = []
+
+        # Slide the window: commit the older part so decodes stay bounded
+        if self._utt_len - self._offset > STREAM_WINDOW_S * SAMPLE_RATE:
+            utt = self._utterance()
+            pending = utt[self._offset:]
+            cut = self._quietest_cut(pending)
+            try:
+                self._committed = _join_text(self._committed, self._decode(pending[:cut], beam_size=1))
+                self._offset += cut
+            except asr_service.ASRBusyError:
+                pass
+
+        if self._silence_ms >= STREAM_END_SILENCE_MS or self._utt_len >= STREAM_MAX_UTTERANCE_S * SAMPLE_RATE:
+            events.append(self._finalize())
+        elif self._since_partial >= STREAM_PARTIAL_INTERVAL_S * SAMPLE_RATE:
+            self._since_partial = 0
+            try:
+                text = _join_text(self._committed, self._decode(self._utterance()[self._offset:], beam_size=1))
+            except asr_service.ASRBusyError:
+                text = None  # drop this partial; the final decode will catch up
+            if text and text != self._last_partial:
+                self._last_partial = text
+                events.append({"type": "partial", "text": text})
+        return events
+
+    def _finalize(self) -> dict:
+        utt = self._utterance()
+        duration = self._utt_len / float(SAMPLE_RATE)
+        try:
+            text = _join_text(self._committed, self._decode(utt[self._offset:], beam_size=5))
+        except asr_service.ASRBusyError:
+            raise  # keep the utterance: the next chunk or "stop" retries the final decode
+        except Exception:
+            self._reset_utterance()
+            raise
+        self._reset_utterance()
+        return {"type": "final", "text": text, "duration": round(duration, 2)}
+
+    def finish(self):
+        """Client said stop: flush whatever is buffered. Returns the final event or None."""
+        if not self._in_speech:
+            self._reset_utterance()
+            return None
+        return self._finalize()
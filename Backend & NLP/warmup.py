@@ -0,0 +1,177 @@
+"""
+Background warm-up of models and indexes, and the readiness report behind GET /ready.
+
+app.py registers each component with a load function and an optional warm
+function. The warm function runs one dummy inference, so costs such as lazy
+imports, torch kernel selection and the first Whisper decode are paid before a
+patient is waiting. start() runs all components concurrently on WARMUP_THREADS
+threads.
+
+Each component loads at most once. ensure(name, timeout) waits for a load in
+progress, or starts one that is still pending, so a request path can depend on
+a component without racing the warm-up.
+
+Status goes pending -> loading -> warming -> ready, or ends in failed.
+/ready answers 200 once every component named in WARMUP_REQUIRED is ready. A
+failed optional component is listed (degraded) but does not hold readiness
+back. /health stays a plain liveness check.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import log_config
+
+log = log_config.get_logger("warmup")
+
+WARMUP_THREADS = int(os.environ.get("WARMUP_THREADS", "4"))
+WARMUP_REQUIRED = [n.strip() for n in os.environ.get(
+    "WARMUP_REQUIRED", "chatbot.english,chatbot.arrernte,glossary").split(",") if n.strip()]
+
+PENDING, LOADING, WARMING, READY, FAILED = "pending", "loading", "warming", "ready", "failed"
+
+
+class Component:
+    def __init__(self, name, load, warm=None, required=False):
+        self.name = name
+        self.load = load
+        self.warm = warm
+        self.required = required
+        self.status = PENDING
+        self.error = None
+        self.load_s = None
+        self.warm_s = None
+        self.value = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def run(self):
+        """Load, then warm. A second caller returns at once; use wait() to block on the result."""
+        with self._lock:
+            if self.status != PENDING:
+                return
+            self.status = LOADING
+        start = time.perf_counter()
+        try:
+            self.value = self.load()
+            self.load_s = time.perf_counter() - start
+            if self.warm is not None:
+                self.status = WARMING
+                start = time.perf_counter()
+                self.warm(self.value)
+                self.warm_s = time.perf_counter() - start
+            self.status = READY
+            log.info("%s ready (load %.2fs, warm %.2fs)", self.name, self.load_s, self.warm_s or 0.0)
+        except Exception as e:
+            self.status = FAILED
+            self.error = f"{type(e).__name__}: {e}"
+            log.warning("%s failed to load: %s", self.name, self.error)
+        finally:
+            self._done.set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        out = {"status": self.status, "required": self.required}
+        if self.load_s is not None:
+            out["load_s"] = round(self.load_s, 3)
+        if self.warm_s is not None:
+            out["warm_s"] = round(self.warm_s, 3)
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class WarmupManager:
+    def __init__(self, threads=WARMUP_THREADS, required=WARMUP_REQUIRED):
+        self.threads = max(1, threads)
+        self.required = set(required)
+        self._components = {}
+        self.started_at = None
+        self.finished_at = None
+        self._launched = set()
+
+    def register(self, name, load, warm=None):
+        self._components[name] = Component(name, load, warm, required=name in self.required)
+
+    def get(self, name) -> Component:
+        return self._components[name]
+
+    def start(self, defer=()):
+        """
+        Load every registered component concurrently; returns immediately. Those
+        named in `defer` stay pending until start_deferred() (a preforked worker
+        loads them after the fork, see serving.py).
+        """
+        if self.started_at is not None:
+            return
+        self.started_at = time.time()
+        self._launch([c for c in self._components.values() if c.name not in defer])
+
+    def start_deferred(self):
+        """Load what start() held back; nothing to do if start() never ran (MODEL_PRELOAD=lazy)."""
+        if self.started_at is None:
+            return
+        rest = [c for c in self._components.values() if c.name not in self._launched]
+        if rest:
+            self._launch(rest)
+
+    def _launch(self, components):
+        self._launched.update(c.name for c in components)
+        self.finished_at = None
+        pool = ThreadPoolExecutor(self.threads, thread_name_prefix="warmup")
+        futures = [pool.submit(c.run) for c in components]
+        pool.shutdown(wait=False)
+
+        def finished():
+            for f in futures:
+                f.result()
+            if len(self._launched) < len(self._components):
+                return
+            self.finished_at = time.time()
+            log.info("Warm-up finished in %.1fs: %s", self.finished_at - self.started_at,
+                     ", ".join(f"{c.name}={c.status}" for c in self._components.values()))
+        threading.Thread(target=finished, name="warmup-report", daemon=True).start()
+
+    def wait_all(self, timeout=None):
+        """Wait for the components start() launched; returns at once if it never ran (MODEL_PRELOAD=lazy)."""
+        if self.started_at is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for c in self._components.values():
+            if c.name in self._launched:
+                c.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def ensure(self, name, timeout=None) -> Component:
+        """The component once it has finished loading, starting it if nothing has yet."""
+        c = self._components[name]
+        if c.status == PENDING:
+            threading.Thread(target=c.run, name=f"warmup-{name}", daemon=True).start()
+        c.wait(timeout)
+        return c
+
+    def ready(self) -> bool:
+        for c in self._components.values():
+            if not c.required:
+                continue
+            if c.status == FAILED or (c.status != READY and self.started_at is not None):
+                return False
+        return True
+
+    def report(self) -> dict:
+        components = {name: c.to_dict() for name, c in self._components.items()}
+        out = {
+            "ready": self.ready(),
+            "degraded": any(c.status == FAILED for c in self._components.values()),
+            "started": self.started_at is not None,
+            "components": components,
+        }
+        if self.started_at is not None:
+            out["elapsed_s"] = round((self.finished_at or time.time()) - self.started_at, 3)
+        return out
+
+
+manager = WarmupManager()
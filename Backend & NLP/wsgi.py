@@ -0,0 +1,20 @@
+"""WSGI entry point for production servers: gunicorn -c gunicorn.conf.py wsgi:application"""
+
+import gc
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import serving  # noqa: E402  (reads the env just loaded)
+
+# `gunicorn --preload wsgi:application` without gunicorn.conf.py: prepare the
+# master for the fork here and install the config file's when_ready / post_fork
+_arbiter = serving.preload_arbiter()
+if _arbiter is not None and not serving.prefork:
+    serving.prefork_master()
+    _cores = max(1, serving.cpu_count() // max(1, _arbiter.num_workers))
+    _arbiter.cfg.set("when_ready", lambda server: gc.freeze())
+    _arbiter.cfg.set("post_fork", lambda server, worker: serving.after_fork(_cores))
+
+from app import app as application  # noqa: E402,F401